@@ -11,6 +11,14 @@ from backend.models.transaction import Transaction  # noqa
 from backend.models.goal import Goal  # noqa
 from backend.models.transaction_category import TransactionCategory  # noqa
 from backend.models.setting import Setting  # noqa
+from backend.models.transaction_fingerprint import TransactionFingerprint  # noqa
+from backend.models.upload_profile import UploadSchemaProfile  # noqa
+from backend.models.cluster_index import ClusterIndexEntry  # noqa
+from backend.models.categorization_cache import CategorizationCache  # noqa
+from backend.models.schema_meta import SchemaMeta  # noqa
+from backend.models.monthly_rollup import MonthlyRollup  # noqa
+from backend.models.merchant import Merchant, MerchantAlias  # noqa
+from backend.models.merchant_recurrence import MerchantRecurrence  # noqa
 
 # this is the Alembic Config object, which provides access to the values within the .ini file in use.
 config = context.config
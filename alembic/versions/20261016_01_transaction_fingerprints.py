@@ -0,0 +1,64 @@
+"""transaction fingerprints for idempotent uploads
+
+Revision ID: 20261016_01_transaction_fingerprints
+Revises: 20250903_01_initial
+Create Date: 2026-10-16
+"""
+import hashlib
+from collections import Counter
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261016_01_transaction_fingerprints'
+down_revision = '20250903_01_initial'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'transaction_fingerprints',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('fingerprint', sa.String(length=40), nullable=False),
+        sa.Column('transaction_id', sa.Integer(), sa.ForeignKey('transactions.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP')),
+    )
+    op.create_index('ix_transaction_fingerprints_fingerprint', 'transaction_fingerprints', ['fingerprint'], unique=True)
+    op.create_index('ix_transaction_fingerprints_transaction_id', 'transaction_fingerprints', ['transaction_id'])
+
+    # Backfill existing rows in id order so a re-upload of already imported exports is recognised
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, date, description, amount, merchant FROM transactions ORDER BY id")).all()
+    if not rows:
+        return
+    fp_table = sa.table('transaction_fingerprints', sa.column('fingerprint'), sa.column('transaction_id'))
+    op.bulk_insert(fp_table, [
+        {'fingerprint': fp, 'transaction_id': int(tid)} for tid, fp in _fingerprints(rows)
+    ])
+
+
+def _normalize(value) -> str:
+    return ' '.join(('' if value is None else str(value)).lower().split())
+
+
+def _fingerprints(rows):
+    """(id, sha1) per row; a frozen copy of the upload fingerprint as of this revision.
+
+    Key: 'YYYY-MM-DD|amount to the cent|description|merchant|occurrence', with
+    lowercased, whitespace-collapsed text and occurrence numbering identical
+    rows in id order.
+    """
+    seen = Counter()
+    for tid, d, description, amount, merchant in rows:
+        base = f"{str(d)[:10]}|{float(amount):.2f}|{_normalize(description)}|{_normalize(merchant)}"
+        key = f"{base}|{seen[base]}"
+        seen[base] += 1
+        yield tid, hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def downgrade():
+    op.drop_index('ix_transaction_fingerprints_transaction_id', table_name='transaction_fingerprints')
+    op.drop_index('ix_transaction_fingerprints_fingerprint', table_name='transaction_fingerprints')
+    op.drop_table('transaction_fingerprints')
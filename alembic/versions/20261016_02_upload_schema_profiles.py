@@ -0,0 +1,34 @@
+"""upload schema profiles
+
+Revision ID: 20261016_02_upload_schema_profiles
+Revises: 20261016_01_transaction_fingerprints
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261016_02_upload_schema_profiles'
+down_revision = '20261016_01_transaction_fingerprints'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'upload_schema_profiles',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('signature', sa.String(length=40), nullable=False),
+        sa.Column('delimiter', sa.String(length=4), nullable=False),
+        sa.Column('columns', sa.Text(), nullable=False),
+        sa.Column('description_source', sa.String(), nullable=False),
+        sa.Column('use_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_upload_schema_profiles_signature', 'upload_schema_profiles', ['signature'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_upload_schema_profiles_signature', table_name='upload_schema_profiles')
+    op.drop_table('upload_schema_profiles')
@@ -0,0 +1,34 @@
+"""persisted cluster index
+
+Revision ID: 20261016_03_cluster_index
+Revises: 20261016_02_upload_schema_profiles
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261016_03_cluster_index'
+down_revision = '20261016_02_upload_schema_profiles'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'cluster_index',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('label', sa.String(), nullable=False),
+        sa.Column('tokens', sa.Text(), nullable=False),
+        sa.Column('threshold', sa.Float(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('renamed', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP')),
+    )
+    op.create_index('ix_cluster_index_label', 'cluster_index', ['label'])
+
+
+def downgrade():
+    op.drop_index('ix_cluster_index_label', table_name='cluster_index')
+    op.drop_table('cluster_index')
@@ -0,0 +1,33 @@
+"""categorization cache
+
+Revision ID: 20261016_04_categorization_cache
+Revises: 20261016_03_cluster_index
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261016_04_categorization_cache'
+down_revision = '20261016_03_cluster_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'categorization_cache',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('text_hash', sa.String(length=40), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('category', sa.String(), nullable=False),
+        sa.Column('confidence', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.UniqueConstraint('text_hash', 'model', name='uq_categorization_cache_text_model'),
+    )
+    op.create_index('ix_categorization_cache_text_hash', 'categorization_cache', ['text_hash'])
+
+
+def downgrade():
+    op.drop_index('ix_categorization_cache_text_hash', table_name='categorization_cache')
+    op.drop_table('categorization_cache')
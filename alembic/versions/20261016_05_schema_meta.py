@@ -0,0 +1,38 @@
+"""schema_meta marker table
+
+Revision ID: 20261016_05_schema_meta
+Revises: 20261016_04_categorization_cache
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261016_05_schema_meta'
+down_revision = '20261016_04_categorization_cache'
+branch_labels = None
+depends_on = None
+
+SCHEMA_VERSION = '1'  # marker value as of this revision; later revisions bump it
+
+
+def upgrade():
+    op.create_table(
+        'schema_meta',
+        sa.Column('key', sa.String(), primary_key=True),
+        sa.Column('value', sa.String(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP')),
+    )
+    # Databases stamped onto this chain after a create_all deployment may still lack these
+    existing = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('transaction_categories')}
+    with op.batch_alter_table('transaction_categories') as batch:
+        if 'promoted' not in existing:
+            batch.add_column(sa.Column('promoted', sa.Boolean(), nullable=False, server_default=sa.false()))
+        if 'original_category' not in existing:
+            batch.add_column(sa.Column('original_category', sa.String(), nullable=True))
+    meta = sa.table('schema_meta', sa.column('key'), sa.column('value'))
+    op.bulk_insert(meta, [{'key': 'schema_version', 'value': SCHEMA_VERSION}])
+
+
+def downgrade():
+    op.drop_table('schema_meta')
@@ -0,0 +1,46 @@
+"""monthly_rollups table with backfill
+
+Revision ID: 20261016_06_monthly_rollups
+Revises: 20261016_05_schema_meta
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261016_06_monthly_rollups'
+down_revision = '20261016_05_schema_meta'
+branch_labels = None
+depends_on = None
+
+SCHEMA_VERSION = '2'  # marker value as of this revision; later revisions bump it
+
+
+def upgrade():
+    op.create_table(
+        'monthly_rollups',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('month', sa.String(length=7), nullable=False),
+        sa.Column('category', sa.String(), nullable=False),
+        sa.Column('merchant', sa.String(), nullable=False),
+        sa.Column('sign', sa.SmallInteger(), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.UniqueConstraint('month', 'category', 'merchant', 'sign', name='uq_monthly_rollups_key'),
+    )
+    op.create_index('ix_monthly_rollups_month', 'monthly_rollups', ['month'])
+    bind = op.get_bind()
+    month = "to_char(date, 'YYYY-MM')" if bind.dialect.name == 'postgresql' else "strftime('%Y-%m', date)"
+    op.execute(
+        "INSERT INTO monthly_rollups (month, category, merchant, sign, total, count) "
+        f"SELECT {month}, COALESCE(category, ''), COALESCE(merchant, ''), "
+        "CASE WHEN amount > 0 THEN 1 WHEN amount < 0 THEN -1 ELSE 0 END, SUM(amount), COUNT(*) "
+        "FROM transactions GROUP BY 1, 2, 3, 4"
+    )
+    op.execute(f"UPDATE schema_meta SET value = '{SCHEMA_VERSION}' WHERE key = 'schema_version'")
+
+
+def downgrade():
+    op.drop_index('ix_monthly_rollups_month', table_name='monthly_rollups')
+    op.drop_table('monthly_rollups')
+    op.execute("UPDATE schema_meta SET value = '1' WHERE key = 'schema_version'")
@@ -0,0 +1,34 @@
+"""composite indexes on transactions for hot read paths
+
+Revision ID: 20261016_07_transaction_indexes
+Revises: 20261016_06_monthly_rollups
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20261016_07_transaction_indexes'
+down_revision = '20261016_06_monthly_rollups'
+branch_labels = None
+depends_on = None
+
+SCHEMA_VERSION = '3'  # marker value as of this revision; later revisions bump it
+
+# Mirrors backend/models/transaction_indexes.py
+INDEXES = [
+    ('ix_transactions_date_amount', ['date', 'amount']),
+    ('ix_transactions_merchant_date_amount', ['merchant', 'date', 'amount']),
+    ('ix_transactions_dupe_key', ['date', 'merchant', 'category', 'amount']),
+]
+
+
+def upgrade():
+    for name, columns in INDEXES:
+        op.create_index(name, 'transactions', columns, if_not_exists=True)
+    op.execute(f"UPDATE schema_meta SET value = '{SCHEMA_VERSION}' WHERE key = 'schema_version'")
+
+
+def downgrade():
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name='transactions')
+    op.execute("UPDATE schema_meta SET value = '2' WHERE key = 'schema_version'")
@@ -0,0 +1,51 @@
+"""merchant_recurrences table (filled by the next revision)
+
+Revision ID: 20261016_08_merchant_recurrences
+Revises: 20261016_07_transaction_indexes
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261016_08_merchant_recurrences'
+down_revision = '20261016_07_transaction_indexes'
+branch_labels = None
+depends_on = None
+
+SCHEMA_VERSION = '4'  # marker value as of this revision; later revisions bump it
+
+
+def upgrade():
+    op.create_table(
+        'merchant_recurrences',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('merchant', sa.String(), nullable=False),
+        sa.Column('occurrences', sa.Integer(), nullable=False),
+        sa.Column('first_date', sa.Date(), nullable=False),
+        sa.Column('first_amount', sa.Float(), nullable=False),
+        sa.Column('last_date', sa.Date(), nullable=False),
+        sa.Column('last_id', sa.Integer(), nullable=False),
+        sa.Column('last_amount', sa.Float(), nullable=False),
+        sa.Column('distinct_months', sa.Integer(), nullable=False),
+        sa.Column('interval_mean', sa.Float(), nullable=False),
+        sa.Column('interval_m2', sa.Float(), nullable=False),
+        sa.Column('amount_mean', sa.Float(), nullable=False),
+        sa.Column('amount_m2', sa.Float(), nullable=False),
+        sa.Column('amount_min', sa.Float(), nullable=False),
+        sa.Column('amount_max', sa.Float(), nullable=False),
+        sa.Column('flags', sa.String(), nullable=False),
+        sa.Column('next_charge', sa.Date(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint('merchant'),
+    )
+    op.create_index('ix_merchant_recurrences_next_charge', 'merchant_recurrences', ['next_charge'])
+    # Filled by 20261016_09_merchants, which re-keys the table on merchant_id
+    # before running the (Python, Welford) rebuild against the current models
+    op.execute(f"UPDATE schema_meta SET value = '{SCHEMA_VERSION}' WHERE key = 'schema_version'")
+
+
+def downgrade():
+    op.drop_index('ix_merchant_recurrences_next_charge', table_name='merchant_recurrences')
+    op.drop_table('merchant_recurrences')
+    op.execute("UPDATE schema_meta SET value = '3' WHERE key = 'schema_version'")
@@ -0,0 +1,94 @@
+"""canonical merchants and aliases; merchant_recurrences keyed by merchant_id
+
+Revision ID: 20261016_09_merchants
+Revises: 20261016_08_merchant_recurrences
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261016_09_merchants'
+down_revision = '20261016_08_merchant_recurrences'
+branch_labels = None
+depends_on = None
+
+SCHEMA_VERSION = '5'  # keep in sync with backend/utils/schema.py
+
+
+def _recurrence_columns(key_column):
+    return [
+        sa.Column('id', sa.Integer(), primary_key=True),
+        *key_column,
+        sa.Column('occurrences', sa.Integer(), nullable=False),
+        sa.Column('first_date', sa.Date(), nullable=False),
+        sa.Column('first_amount', sa.Float(), nullable=False),
+        sa.Column('last_date', sa.Date(), nullable=False),
+        sa.Column('last_id', sa.Integer(), nullable=False),
+        sa.Column('last_amount', sa.Float(), nullable=False),
+        sa.Column('distinct_months', sa.Integer(), nullable=False),
+        sa.Column('interval_mean', sa.Float(), nullable=False),
+        sa.Column('interval_m2', sa.Float(), nullable=False),
+        sa.Column('amount_mean', sa.Float(), nullable=False),
+        sa.Column('amount_m2', sa.Float(), nullable=False),
+        sa.Column('amount_min', sa.Float(), nullable=False),
+        sa.Column('amount_max', sa.Float(), nullable=False),
+        sa.Column('flags', sa.String(), nullable=False),
+        sa.Column('next_charge', sa.Date(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    ]
+
+
+def upgrade():
+    op.create_table(
+        'merchants',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('key', sa.String(), nullable=False, unique=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_table(
+        'merchant_aliases',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('raw', sa.String(), nullable=False, unique=True),
+        sa.Column('merchant_id', sa.Integer(), sa.ForeignKey('merchants.id', ondelete='CASCADE'), nullable=False),
+    )
+    op.create_index('ix_merchant_aliases_merchant_id', 'merchant_aliases', ['merchant_id'])
+    with op.batch_alter_table('transactions') as batch:
+        batch.add_column(sa.Column('merchant_id', sa.Integer(), nullable=True))
+        batch.create_foreign_key('fk_transactions_merchant_id', 'merchants', ['merchant_id'], ['id'])
+    op.create_index('ix_transactions_merchant_id_date', 'transactions', ['merchant_id', 'date', 'id'])
+    # Recurrence state is derived; re-key it on the canonical merchant and rebuild
+    op.drop_index('ix_merchant_recurrences_next_charge', table_name='merchant_recurrences')
+    op.drop_table('merchant_recurrences')
+    op.create_table(
+        'merchant_recurrences',
+        *_recurrence_columns([
+            sa.Column('merchant_id', sa.Integer(), sa.ForeignKey('merchants.id', ondelete='CASCADE'), nullable=False, unique=True),
+            sa.Column('merchant', sa.String(), nullable=False),
+        ]),
+    )
+    op.create_index('ix_merchant_recurrences_next_charge', 'merchant_recurrences', ['next_charge'])
+    from backend.utils import merchants, recurrence
+    bind = op.get_bind()
+    merchants.backfill(bind)
+    recurrence.rebuild(bind)
+    op.execute(f"UPDATE schema_meta SET value = '{SCHEMA_VERSION}' WHERE key = 'schema_version'")
+
+
+def downgrade():
+    op.drop_index('ix_merchant_recurrences_next_charge', table_name='merchant_recurrences')
+    op.drop_table('merchant_recurrences')
+    op.create_table(
+        'merchant_recurrences',
+        *_recurrence_columns([sa.Column('merchant', sa.String(), nullable=False, unique=True)]),
+    )
+    op.create_index('ix_merchant_recurrences_next_charge', 'merchant_recurrences', ['next_charge'])
+    op.drop_index('ix_transactions_merchant_id_date', table_name='transactions')
+    with op.batch_alter_table('transactions') as batch:
+        batch.drop_constraint('fk_transactions_merchant_id', type_='foreignkey')
+        batch.drop_column('merchant_id')
+    op.drop_index('ix_merchant_aliases_merchant_id', table_name='merchant_aliases')
+    op.drop_table('merchant_aliases')
+    op.drop_table('merchants')
+    op.execute("UPDATE schema_meta SET value = '4' WHERE key = 'schema_version'")
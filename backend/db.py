@@ -1,9 +1,12 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from starlette.concurrency import run_in_threadpool
 import os
 import sys
 import importlib.util
 
+from backend.utils.db_metrics import TimedAsyncQueuePool, TimedQueuePool, instrument_engine
+
 RAW_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/app.db")
 
 # Graceful fallback: if URL is Postgres but driver not installed (e.g. CI without psycopg),
@@ -17,16 +20,165 @@ if RAW_DATABASE_URL.startswith("postgres"):
 else:
     DATABASE_URL = RAW_DATABASE_URL
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
-)
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)) or default)
+
+
+# Pool sizing for server databases (Postgres); SQLite file databases use the same
+# QueuePool, with the connection pragmas below doing most of the work.
+POOL_SIZE = _env_int("DB_POOL_SIZE", 5)
+POOL_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 10)
+POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 30)
+POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() not in ("0", "false", "no")
+
+# SQLite: WAL lets readers proceed while an upload commits; busy_timeout waits out
+# the remaining writer/writer contention instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000),
+    "mmap_size": _env_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024),
+    "cache_size": _env_int("SQLITE_CACHE_SIZE", -64 * 1024),  # negative = KiB
+}
+
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url.split("?", 1)[0].rstrip("/") in ("sqlite:", "sqlite+aiosqlite:") or ":memory:" in url
+
+
+def engine_options(url: str, async_: bool = False) -> dict:
+    if _is_sqlite(url):
+        if _is_memory_sqlite(url):
+            return {"connect_args": {"check_same_thread": False}}
+        return {
+            "connect_args": {"check_same_thread": False},
+            "poolclass": TimedAsyncQueuePool if async_ else TimedQueuePool,
+            "pool_size": POOL_SIZE,
+            "max_overflow": POOL_MAX_OVERFLOW,
+            "pool_timeout": POOL_TIMEOUT,
+        }
+    return {
+        "poolclass": TimedAsyncQueuePool if async_ else TimedQueuePool,
+        "pool_size": POOL_SIZE,
+        "max_overflow": POOL_MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING,
+    }
+
+
+def apply_sqlite_pragmas(sync_engine):
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in SQLITE_PRAGMAS.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+if _is_sqlite(DATABASE_URL) and not _is_memory_sqlite(DATABASE_URL):
+    apply_sqlite_pragmas(engine)
+instrument_engine(engine, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Keys per IN (...) list in batched lookups; keeps statements under SQLite's bound-parameter limit
+LOOKUP_BATCH = 500
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+def connection_for(db):
+    """The Connection behind a Session (or a Connection as is), so Core statements join the caller's transaction."""
+    return db.connection() if isinstance(db, Session) else db
+
+def dialect_insert(db, table):
+    """insert(table) with the dialect's ON CONFLICT clauses (SQLite and Postgres) for race-free upserts."""
+    if connection_for(db).dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
+# --- async access for `async def` routes ---------------------------------------
+# DATABASE_URL stays a sync URL; the async driver is derived from it when installed
+# (aiosqlite for SQLite, asyncpg for Postgres). DB_ASYNC=off forces the threadpool facade.
+ASYNC_DRIVERS = {
+    "sqlite": ("aiosqlite", "sqlite+aiosqlite"),
+    "postgresql": ("asyncpg", "postgresql+asyncpg"),
+}
+
+
+def async_database_url(url: str) -> str | None:
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    if dialect == "postgres":
+        dialect = "postgresql"
+    module, async_scheme = ASYNC_DRIVERS.get(dialect, (None, None))
+    if not sep or module is None or importlib.util.find_spec(module) is None:
+        return None
+    return f"{async_scheme}://{rest}"
+
+
+ASYNC_DATABASE_URL = None if os.getenv("DB_ASYNC", "auto").lower() == "off" else async_database_url(DATABASE_URL)
+if ASYNC_DATABASE_URL:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, async_=True))
+    if _is_sqlite(ASYNC_DATABASE_URL) and not _is_memory_sqlite(ASYNC_DATABASE_URL):
+        apply_sqlite_pragmas(async_engine.sync_engine)
+    instrument_engine(async_engine.sync_engine, "async")
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+else:
+    async_engine = None
+    AsyncSessionLocal = None
+
+
+class ThreadedSession:
+    """Async facade over a sync Session for deployments without an async driver.
+
+    Exposes the subset of AsyncSession the routes use; each call runs in the
+    threadpool, so a slow query still does not block the event loop.
+    """
+
+    def __init__(self):
+        self.sync_session = SessionLocal()
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def execute(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, statement, *args, **kwargs)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+
+async def get_async_db():
+    """Async counterpart of get_db: an AsyncSession, or a ThreadedSession when no async driver is available."""
+    if AsyncSessionLocal is None:
+        db = ThreadedSession()
+        try:
+            yield db
+        finally:
+            await db.close()
+        return
+    async with AsyncSessionLocal() as db:
+        yield db
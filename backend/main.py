@@ -1,17 +1,31 @@
+from contextlib import asynccontextmanager
+
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
 from fastapi.responses import Response
-from backend.db import Base, engine
+from backend.db import engine
 from backend.security.middleware import LoggingMiddleware
+from backend.utils.schema import ensure_schema
+from backend.utils.response_cache import ResponseCacheMiddleware
+from backend.utils import warmup
 from backend.routes import upload, transactions, insights, forecast, subscriptions, coach, health, dashboard, settings, goals, anomalies, enrichment, breakdown, invest, auth
 
 load_dotenv()  # Load environment variables from .env if present
-Base.metadata.create_all(bind=engine)
+ensure_schema(engine)  # create tables + one-time legacy column upgrade (see utils/schema.py)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Heavy scientific imports are deferred to first use (utils/lazy.py); optionally pull them in now, off the request path
+    if warmup.enabled():
+        warmup.start()
+    yield
 
-app = FastAPI(title="Smart Financial Coach")
+app = FastAPI(title="Smart Financial Coach", lifespan=lifespan)
 app.add_middleware(LoggingMiddleware)
+app.add_middleware(ResponseCacheMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, UniqueConstraint, func
+from backend.db import Base
+
+
+class CategorizationCache(Base):
+    """Model answer for a normalized description+merchant text, reused across transactions."""
+    __tablename__ = 'categorization_cache'
+    __table_args__ = (UniqueConstraint('text_hash', 'model', name='uq_categorization_cache_text_model'),)
+
+    id = Column(Integer, primary_key=True)
+    text_hash = Column(String(40), nullable=False, index=True)
+    model = Column(String, nullable=False)
+    category = Column(String, nullable=False)
+    confidence = Column(Float, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
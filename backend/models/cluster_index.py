@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Float, Text, Boolean, DateTime, func
+from backend.db import Base
+
+
+class ClusterIndexEntry(Base):
+    """Persisted centroid of a description cluster (the seed's token set).
+
+    New transactions join the entry whose tokens they overlap best (Jaccard >=
+    the threshold the cluster was built with). Several entries may share a
+    label, e.g. after `rename_cluster` merges two clusters under one name.
+    """
+    __tablename__ = 'cluster_index'
+
+    id = Column(Integer, primary_key=True)
+    label = Column(String, nullable=False, index=True)
+    tokens = Column(Text, nullable=False)  # JSON sorted list of centroid tokens
+    threshold = Column(Float, nullable=False)
+    size = Column(Integer, nullable=False, default=0)
+    renamed = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
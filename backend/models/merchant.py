@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func
+from backend.db import Base
+from backend.models.transaction import Transaction
+
+
+class Merchant(Base):
+    """Canonical merchant: every raw spelling with the same normalized key.
+
+    "NETFLIX.COM 866-579", "Netflix" and "NETFLIX *2341" all normalize to
+    `netflix` (backend/utils/merchants.py); `name` is the first spelling seen
+    with the reference noise stripped.
+    """
+    __tablename__ = 'merchants'
+
+    id = Column(Integer, primary_key=True)
+    key = Column(String, nullable=False, unique=True)
+    name = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class MerchantAlias(Base):
+    """Exact raw merchant string -> canonical merchant, so repeat strings skip normalization."""
+    __tablename__ = 'merchant_aliases'
+
+    id = Column(Integer, primary_key=True)
+    raw = Column(String, nullable=False, unique=True)
+    merchant_id = Column(Integer, ForeignKey('merchants.id', ondelete='CASCADE'), nullable=False, index=True)
+
+
+# Declared here rather than on the Transaction model so the schema step and the
+# `20261016_09_merchants` revision can add it to existing tables; NULL when the
+# row has no merchant. Indexed through models/transaction_indexes.py.
+Transaction.merchant_id = Column(Integer, ForeignKey('merchants.id'), nullable=True)
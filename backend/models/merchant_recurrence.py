@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, func
+from backend.db import Base
+
+
+class MerchantRecurrence(Base):
+    """Running recurring-charge statistics per canonical merchant (expenses only).
+
+    Maintained by backend/utils/recurrence.py: charges are folded in (date, id)
+    order with Welford updates for the interval and amount variance, and
+    `flags` / `next_charge` are re-derived on every change so /subscriptions
+    and the dashboard read finished answers. Amount stats are over absolute
+    values; `last_amount` keeps the sign of the latest charge.
+    """
+    __tablename__ = 'merchant_recurrences'
+
+    id = Column(Integer, primary_key=True)
+    merchant_id = Column(Integer, ForeignKey('merchants.id', ondelete='CASCADE'), nullable=False, unique=True)
+    merchant = Column(String, nullable=False)  # canonical display name
+    occurrences = Column(Integer, nullable=False, default=0)
+    first_date = Column(Date, nullable=False)
+    first_amount = Column(Float, nullable=False)
+    last_date = Column(Date, nullable=False)
+    last_id = Column(Integer, nullable=False)
+    last_amount = Column(Float, nullable=False)
+    distinct_months = Column(Integer, nullable=False, default=1)
+    interval_mean = Column(Float, nullable=False, default=0.0)
+    interval_m2 = Column(Float, nullable=False, default=0.0)
+    amount_mean = Column(Float, nullable=False, default=0.0)
+    amount_m2 = Column(Float, nullable=False, default=0.0)
+    amount_min = Column(Float, nullable=False)
+    amount_max = Column(Float, nullable=False)
+    flags = Column(String, nullable=False, default='')  # comma-separated
+    next_charge = Column(Date, nullable=True, index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
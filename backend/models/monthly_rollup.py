@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Float, SmallInteger, UniqueConstraint
+from backend.db import Base
+
+
+class MonthlyRollup(Base):
+    """Materialized transaction totals per (month, category, merchant, sign).
+
+    Maintained incrementally by backend/utils/rollups.py. Missing category /
+    merchant are stored as '' so the key stays unique; sign is -1 (outflow),
+    0 or 1 (inflow) and `total` keeps the signed sum of amounts.
+    """
+    __tablename__ = 'monthly_rollups'
+    __table_args__ = (UniqueConstraint('month', 'category', 'merchant', 'sign', name='uq_monthly_rollups_key'),)
+
+    id = Column(Integer, primary_key=True)
+    month = Column(String(7), nullable=False, index=True)  # 'YYYY-MM'
+    category = Column(String, nullable=False, default='')
+    merchant = Column(String, nullable=False, default='')
+    sign = Column(SmallInteger, nullable=False)
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, DateTime, func
+from backend.db import Base
+
+
+class SchemaMeta(Base):
+    """Key/value markers owned by the startup schema step (e.g. schema_version)."""
+    __tablename__ = 'schema_meta'
+
+    key = Column(String, primary_key=True)
+    value = Column(String, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func
+from backend.db import Base
+
+
+class TransactionFingerprint(Base):
+    """Stable content hash of an ingested row (date, amount, description, merchant, occurrence).
+
+    Kept 1:1 beside `transactions` so a repeated upload resolves to an indexed
+    lookup. `transaction_id` is nulled (not deleted) when the transaction is
+    removed, leaving a tombstone so deduped rows are not re-imported.
+    """
+    __tablename__ = 'transaction_fingerprints'
+
+    id = Column(Integer, primary_key=True)
+    fingerprint = Column(String(40), nullable=False, unique=True, index=True)
+    transaction_id = Column(Integer, ForeignKey('transactions.id', ondelete='SET NULL'), nullable=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,24 @@
+"""Composite indexes on `transactions`, matched to the hot read paths.
+
+Declared here (rather than next to the columns) so the schema step and the
+`20261016_07_transaction_indexes` revision can add them to existing tables.
+Each entry notes the queries it serves; tests/test_query_plans.py fails when
+one of those queries falls back to a full table scan.
+"""
+from sqlalchemy import Index
+
+from backend.models import merchant  # noqa: F401  (attaches Transaction.merchant_id)
+from backend.models.transaction import Transaction
+
+_t = Transaction.__table__
+
+TRANSACTION_INDEXES = [
+    # date-window + expense filters: dashboard largest expenses / subscription window, anomalies, coach snapshot
+    Index('ix_transactions_date_amount', _t.c.date, _t.c.amount),
+    # per-merchant history by raw string (kept for ad-hoc merchant filters)
+    Index('ix_transactions_merchant_date_amount', _t.c.merchant, _t.c.date, _t.c.amount),
+    # per canonical merchant, date-ordered: recurrence refresh / rebuild (utils/recurrence.py)
+    Index('ix_transactions_merchant_id_date', _t.c.merchant_id, _t.c.date, _t.c.id),
+    # duplicate groups (same date, merchant, category, amount) for /anomalies/dedupe validation
+    Index('ix_transactions_dupe_key', _t.c.date, _t.c.merchant, _t.c.category, _t.c.amount),
+]
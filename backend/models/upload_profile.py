@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, func
+from backend.db import Base
+
+
+class UploadSchemaProfile(Base):
+    """Remembered layout of a bank export, keyed by a hash of its header line."""
+    __tablename__ = 'upload_schema_profiles'
+
+    id = Column(Integer, primary_key=True)
+    signature = Column(String(40), nullable=False, unique=True, index=True)
+    delimiter = Column(String(4), nullable=False)
+    columns = Column(Text, nullable=False)  # JSON list of normalized (remapped) column names
+    description_source = Column(String, nullable=False)
+    use_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), nullable=True)
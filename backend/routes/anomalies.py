@@ -1,71 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from datetime import date, timedelta
-from collections import defaultdict
-from statistics import mean, stdev, StatisticsError
 from backend.db import get_db
 from backend.models.transaction import Transaction
+from backend.utils import anomaly
+from backend.utils import duplicates as dup_utils
 
 router = APIRouter(prefix="/anomalies", tags=["anomalies"])
 
 
 @router.get('/')
-def anomalies(db: Session = Depends(get_db)):
+def anomalies(
+    window_days: int = Query(anomaly.WINDOW_DAYS, ge=1, le=3650),
+    baseline_days: int = Query(anomaly.BASELINE_DAYS, ge=1, le=7300),
+    z_threshold: float = Query(anomaly.Z_THRESHOLD, gt=0),
+    min_group_size: int = Query(anomaly.MIN_GROUP_SIZE, ge=2),
+    as_of: date | None = None,
+    db: Session = Depends(get_db),
+):
     """Return potential spending anomalies and possible duplicate charges.
 
     Heuristics:
-    - Outliers: amounts whose absolute value exceeds mean+2*std for last 60d expenses.
+    - Outliers: expenses in the last `window_days` whose robust z-score against
+      their merchant's (else category's, else all expenses') median/MAD over the
+      last `baseline_days` is >= z_threshold (see utils/anomaly.py).
     - Duplicates: same absolute amount, same day, same merchant/category appearing >1.
     """
-    cutoff = date.today() - timedelta(days=60)
-    txns = db.query(Transaction).filter(Transaction.date >= cutoff).all()
-    expenses = [t for t in txns if t.amount < 0]
-    abs_amounts = [abs(t.amount) for t in expenses]
-    outliers = []
-    if len(abs_amounts) >= 5:
-        m = mean(abs_amounts)
-        try:
-            s = stdev(abs_amounts)
-        except StatisticsError:  # occurs if variance undefined (all equal)
-            s = 0
-        threshold = m + 2 * s
-        for t in expenses:
-            if abs(t.amount) >= threshold and abs(t.amount) > 0:
-                outliers.append({
-                    'date': t.date.isoformat(),
-                    'description': t.description,
-                    'amount': float(t.amount),
-                    'category': t.category,
-                    'merchant': t.merchant,
-                    'threshold': round(threshold, 2)
-                })
-
-    dup_map = defaultdict(list)
-    for t in expenses:
-        key = (t.date, round(abs(t.amount), 2), t.merchant or '', t.category or '')
-        dup_map[key].append(t)
-    duplicates = []
-    for key, group in dup_map.items():
-        if len(group) > 1:
-            duplicates.append({
-                'date': key[0].isoformat(),
-                'amount': -key[1],
-                'merchant': key[2],
-                'category': key[3],
-                'count': len(group),
-                'transactions': [
-                    {
-                        'id': g.id,
-                        'description': g.description,
-                        'amount': g.amount,
-                        'category': g.category,
-                        'merchant': g.merchant,
-                        'date': g.date.isoformat()
-                    } for g in group
-                ]
-            })
-
+    as_of = as_of or date.today()
+    outliers = anomaly.detect_outliers(
+        db, as_of=as_of, window_days=window_days, baseline_days=baseline_days,
+        z_threshold=z_threshold, min_group_size=min_group_size,
+    )
+    duplicates = dup_utils.find_groups(db, as_of - timedelta(days=window_days), as_of)
     return {'outliers': outliers, 'duplicates': duplicates}
 
 
@@ -85,50 +53,32 @@ def remove_duplicates(payload: DedupeRequest, db: Session = Depends(get_db)):
     """
     if not payload.transaction_ids:
         raise HTTPException(status_code=400, detail="No transaction_ids supplied")
-    # Fetch all referenced transactions
-    txns = db.query(Transaction).filter(Transaction.id.in_(payload.transaction_ids)).all()
-    found_ids = {t.id for t in txns}
-    missing = [i for i in payload.transaction_ids if i not in found_ids]
+    ids = list(dict.fromkeys(payload.transaction_ids))
+    txns = db.execute(
+        select(Transaction.id, Transaction.date, Transaction.amount, Transaction.category, Transaction.merchant, Transaction.merchant_id)
+        .where(Transaction.id.in_(ids))
+    ).all()
+    found = {t.id: t for t in txns}
+    missing = [i for i in payload.transaction_ids if i not in found]
     if missing:
         raise HTTPException(status_code=404, detail=f"Transactions not found: {missing}")
 
-    # Build grouping for validation
     if payload.validate_duplicates:
-        groups = {}
         for t in txns:
             if t.amount >= 0:  # only consider expenses duplicates
                 raise HTTPException(status_code=400, detail=f"Transaction {t.id} is not an expense; aborting")
-            key = (t.date, round(abs(t.amount), 2), t.merchant or '', t.category or '')
-            groups.setdefault(key, []).append(t)
-        # Re-query full group membership to ensure >1
-        for key in groups.keys():
-            date_k, amt_k, merch_k, cat_k = key
-            full_group = db.query(Transaction).filter(
-                Transaction.date == date_k,
-                Transaction.amount < 0,
-                (Transaction.merchant == merch_k) if merch_k else (Transaction.merchant.is_(None) | (Transaction.merchant == '')),
-                (Transaction.category == cat_k) if cat_k else (Transaction.category.is_(None) | (Transaction.category == '')),
-            ).all()
-            # Filter to same absolute amount
-            full_group = [g for g in full_group if round(abs(g.amount), 2) == amt_k]
-            if len(full_group) <= 1:
+        # Group sizes come from the whole table, not just the selection
+        for row in dup_utils.annotate_selection(db, ids):
+            if row.group_size <= 1:
                 raise HTTPException(
                     status_code=400,
-                    detail=f"Group for amount {amt_k} on {date_k} merchant '{merch_k}' has size 1; not a duplicate group"
+                    detail=f"Group for amount {row.abs_amount} on {row.date} merchant '{row.merchant or ''}' has size 1; not a duplicate group"
                 )
-            if payload.keep_one_per_group:
-                # Retain earliest id in group if all provided
-                full_ids = {g.id for g in full_group}
-                if full_ids.issubset(found_ids):
-                    earliest = min(full_ids)
-                    # remove earliest from deletion set
-                    found_ids.discard(earliest)
+            if payload.keep_one_per_group and row.selected_in_group == row.group_size:
+                # Entire group selected: retain its earliest id
+                found.pop(row.earliest_id, None)
 
-    # Perform deletions
-    to_delete = db.query(Transaction).filter(Transaction.id.in_(found_ids)).all()
-    deleted_ids = [t.id for t in to_delete]
-    for t in to_delete:
-        db.delete(t)
+    deleted_ids = dup_utils.delete_transactions(db, found.values())
     db.commit()
     return {
         'status': 'deduped',
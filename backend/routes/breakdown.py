@@ -1,8 +1,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case
 from backend.db import get_db
-from backend.models.transaction import Transaction
+from backend.utils import rollups
 
 router = APIRouter(prefix="/breakdown", tags=["breakdown"])
 
@@ -15,24 +14,14 @@ def category_breakdown(months: int = 3, db: Session = Depends(get_db)):
     # approximate months window by subtracting 31*months days then clamp to first of that month
     window_start = (start - timedelta(days=31*months)).replace(day=1)
 
-    rows = (
-        db.query(
-            Transaction.category,
-            func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)).label('income'),
-            func.sum(case((Transaction.amount < 0, Transaction.amount), else_=0)).label('spend')
-        )
-        .filter(Transaction.date >= window_start)
-        .group_by(Transaction.category)
-        .all()
-    )
-    income_total = sum(r.income or 0 for r in rows)
-    spend_total = abs(sum(r.spend or 0 for r in rows))
+    rows = rollups.category_totals(db, since_month=rollups.month_key(window_start))
+    income_total = sum(income for _, income, _, _ in rows)
+    spend_total = abs(sum(spend for _, _, spend, _ in rows))
     categories = []
-    for r in rows:
-        inc = float(r.income or 0)
-        sp = abs(float(r.spend or 0))
+    for category, inc, spend, _ in rows:
+        sp = abs(spend)
         categories.append({
-            'category': r.category or 'Uncategorized',
+            'category': category or 'Uncategorized',
             'income': round(inc,2),
             'spend': round(sp,2),
             'net': round(inc - sp,2),
@@ -51,26 +40,12 @@ def category_breakdown(months: int = 3, db: Session = Depends(get_db)):
 
 @router.get("/merchants")
 def merchant_breakdown(limit: int = 15, db: Session = Depends(get_db)):
-    rows = (
-        db.query(
-            Transaction.merchant,
-            func.count('*').label('count'),
-            func.sum(Transaction.amount).label('net'),
-            func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)).label('income'),
-            func.sum(case((Transaction.amount < 0, Transaction.amount), else_=0)).label('spend')
-        )
-        .group_by(Transaction.merchant)
-        .order_by(func.sum(case((Transaction.amount < 0, Transaction.amount), else_=0)).asc())  # largest absolute spend first
-        .limit(limit)
-        .all()
-    )
     data = []
-    for r in rows:
-        income = float(r.income or 0)
-        spend = abs(float(r.spend or 0))
+    for merchant, count, income, spend in rollups.merchant_totals(db, limit=limit):  # largest absolute spend first
+        spend = abs(spend)
         data.append({
-            'merchant': r.merchant or 'Unknown',
-            'transactions': r.count,
+            'merchant': merchant or 'Unknown',
+            'transactions': count,
             'income': round(income,2),
             'spend': round(spend,2),
             'net': round(income - spend,2)
@@ -82,20 +57,8 @@ def monthly_timeline(months: int = 6, db: Session = Depends(get_db)):
     from datetime import date, timedelta
     today = date.today().replace(day=1)
     window_start = (today - timedelta(days=31*months)).replace(day=1)
-    rows = (
-        db.query(
-            func.strftime('%Y-%m', Transaction.date).label('month'),
-            func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)).label('income'),
-            func.sum(case((Transaction.amount < 0, Transaction.amount), else_=0)).label('spend')
-        )
-        .filter(Transaction.date >= window_start)
-        .group_by('month')
-        .order_by('month')
-        .all()
-    )
     points = []
-    for r in rows:
-        inc = float(r.income or 0)
-        sp = abs(float(r.spend or 0))
-        points.append({'month': r.month, 'income': round(inc,2), 'spend': round(sp,2), 'net': round(inc - sp,2)})
+    for month, inc, spend in rollups.month_totals(db, since_month=rollups.month_key(window_start)):
+        sp = abs(spend)
+        points.append({'month': month, 'income': round(inc,2), 'spend': round(sp,2), 'net': round(inc - sp,2)})
     return {'months': months, 'window_start': window_start.isoformat(), 'timeline': points}
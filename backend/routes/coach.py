@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException, Query
 import os
 from backend.utils.logging import logger
 from backend.models.schemas import CoachRequest, CoachResponse
-from backend.db import get_db
+from backend.db import get_async_db
 from sqlalchemy.orm import Session
 from fastapi import Depends
 from backend.utils.summary import build_financial_snapshot
@@ -30,9 +30,14 @@ def _fetch_recent_history(db: Session, user_id: int, limit: int = 10):
     # Return chronological
     return list(reversed(rows))
 
+def _persist_exchange(db: Session, user_id: int, model: str, message: str, response_text: str):
+    db.add(CoachMessage(user_id=user_id, role='user', content=message, model=model, tokens_in=_approx_tokens(message)))
+    db.add(CoachMessage(user_id=user_id, role='assistant', content=response_text, model=model, tokens_out=_approx_tokens(response_text)))
+    db.commit()
+
 @router.get('/coach/history')
-async def coach_history(limit: int = 25, db: Session = Depends(get_db), user_id: int = Query(1)):
-    rows = _fetch_recent_history(db, user_id, min(limit, 100))
+async def coach_history(limit: int = 25, db=Depends(get_async_db), user_id: int = Query(1)):
+    rows = await db.run_sync(_fetch_recent_history, user_id, min(limit, 100))
     return [
         {
             'id': r.id,
@@ -44,9 +49,9 @@ async def coach_history(limit: int = 25, db: Session = Depends(get_db), user_id:
     ]
 
 @router.post('/coach', response_model=CoachResponse)
-async def coach(query: CoachRequest, db: Session = Depends(get_db), user_id: int = Query(1), include_history: bool = Query(True, description="Include prior conversation for personalization")):
+async def coach(query: CoachRequest, db=Depends(get_async_db), user_id: int = Query(1), include_history: bool = Query(True, description="Include prior conversation for personalization")):
     chosen_model = (query.model or MODEL).strip()
-    full_snapshot = build_financial_snapshot(db) if query.include_data else "(User opted out of data context)"
+    full_snapshot = await db.run_sync(build_financial_snapshot) if query.include_data else "(User opted out of data context)"
     if query.fast:
         # Fast mode
         snapshot = full_snapshot[:400]
@@ -60,7 +65,7 @@ async def coach(query: CoachRequest, db: Session = Depends(get_db), user_id: int
     # Build conversation memory (exclude if disabled or none)
     history_block = ""
     if include_history and not query.fast:  # omit in fast for latency
-        recent = _fetch_recent_history(db, user_id, limit=8)
+        recent = await db.run_sync(_fetch_recent_history, user_id, limit=8)
         if recent:
             lines = []
             for m in recent:
@@ -78,9 +83,7 @@ async def coach(query: CoachRequest, db: Session = Depends(get_db), user_id: int
         response_text = await provider.generate(prompt=prompt, model=chosen_model, fast=query.fast)
         # Persist both sides
         try:
-            db.add(CoachMessage(user_id=user_id, role='user', content=query.message, model=chosen_model, tokens_in=_approx_tokens(query.message)))
-            db.add(CoachMessage(user_id=user_id, role='assistant', content=response_text, model=chosen_model, tokens_out=_approx_tokens(response_text)))
-            db.commit()
+            await db.run_sync(_persist_exchange, user_id, chosen_model, query.message, response_text)
         except Exception as persist_err:  # noqa: BLE001
             logger.warning("coach_message_persist_failed", error=str(persist_err))
         return CoachResponse(response=response_text)
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from datetime import date, timedelta
 from collections import defaultdict
 import os
 
-from backend.db import get_db
+from backend.db import get_async_db
 from backend.models.transaction import Transaction
 from backend.models.setting import Setting
+from backend.utils import recurrence, rollups
 
 router = APIRouter()
 
@@ -21,39 +23,37 @@ def _month_range(d: date):
 
 
 @router.get('/dashboard')
-async def dashboard(db: Session = Depends(get_db)):
+async def dashboard(db=Depends(get_async_db)):
+    return await db.run_sync(build_dashboard)
+
+
+def build_dashboard(db: Session) -> dict:
     today = date.today()
     start_this, end_this = _month_range(today)
     # Previous month
     prev_reference = (start_this - timedelta(days=1))
-    start_prev, end_prev = _month_range(prev_reference)
-
-    txns = db.query(Transaction).all()
+    start_prev, _ = _month_range(prev_reference)
 
+    # Month totals per category: one conditional-SUM query over monthly_rollups
     mtd_income = mtd_spend = 0.0
     prev_spend_by_cat = defaultdict(float)
     this_spend_by_cat = defaultdict(float)
-    largest_expenses = []
-    expenses = []
-    subs_map = defaultdict(list)
-
-    for t in txns:
-        # Build subscription grouping baseline
-        if t.merchant:
-            subs_map[t.merchant].append(t)
-        if start_prev <= t.date <= end_prev and t.amount < 0:
-            prev_spend_by_cat[t.category or 'Uncategorized'] += -t.amount
-        if start_this <= t.date <= end_this:
-            if t.amount > 0:
-                mtd_income += t.amount
-            elif t.amount < 0:
-                amt = -t.amount
-                mtd_spend += amt
-                this_spend_by_cat[t.category or 'Uncategorized'] += amt
-                expenses.append(t)
+    for category, income, spend, prev_spend in rollups.compare_months(db, rollups.month_key(start_this), rollups.month_key(start_prev)):
+        key = category or 'Uncategorized'
+        mtd_income += income
+        if spend < 0:
+            mtd_spend += -spend
+            this_spend_by_cat[key] += -spend
+        if prev_spend < 0:
+            prev_spend_by_cat[key] += -prev_spend
 
-    # Largest expenses this month
-    expenses.sort(key=lambda t: t.amount)  # negative amounts ascending
+    # Largest expenses this month (index range scan on date, top 5 by amount)
+    expenses = db.execute(
+        select(Transaction.date, Transaction.description, Transaction.amount, Transaction.category)
+        .where(Transaction.date >= start_this, Transaction.date <= end_this, Transaction.amount < 0)
+        .order_by(Transaction.amount.asc(), Transaction.id.asc())
+        .limit(5)
+    ).all()
     largest_expenses = [
         {
             'date': e.date.isoformat(),
@@ -61,7 +61,7 @@ async def dashboard(db: Session = Depends(get_db)):
             'amount': float(e.amount),
             'category': e.category,
         }
-        for e in sorted(expenses, key=lambda t: t.amount)[:5]
+        for e in expenses
     ]
 
     # Month-over-month category changes
@@ -97,20 +97,8 @@ async def dashboard(db: Session = Depends(get_db)):
             monthly_budget = 0.0
     budget_used_pct = (mtd_spend / monthly_budget * 100) if monthly_budget > 0 else None
 
-    # Upcoming subscriptions heuristic: merchants with >=3 occurrences; estimate next charge ~30 days after last negative
-    upcoming = []
-    for merchant, mtxns in subs_map.items():
-        negs = [t for t in mtxns if t.amount < 0]
-        if len(negs) >= 3:
-            last = max(negs, key=lambda t: t.date)
-            next_est = last.date + timedelta(days=30)
-            if 0 <= (next_est - today).days <= 14:
-                upcoming.append({
-                    'merchant': merchant,
-                    'last_amount': float(negs[-1].amount),
-                    'next_estimate': next_est.isoformat(),
-                })
-    upcoming.sort(key=lambda x: x['next_estimate'])
+    # Upcoming subscriptions: the /subscriptions entries due within the next 14 days (utils/recurrence.py)
+    upcoming = recurrence.upcoming(db, today)
 
     return {
         'mtd_income': round(mtd_income, 2),
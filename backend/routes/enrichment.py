@@ -1,43 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from backend.db import get_db
 from backend.models.transaction import Transaction
 from backend.models.transaction_category import TransactionCategory
-from backend.utils.enrich import categorize_with_model
+from backend.utils.enrich import categorize_with_model, BATCH_MARKER, DEFAULT_CONCURRENCY, DEFAULT_BATCH_SIZE
+from backend.utils.categorize import categorize_text, FALLBACK_CATEGORY, FALLBACK_CONFIDENCE
+from backend.utils.clustering import tokenize, cluster_token_sets, cluster_label
+from backend.utils.cluster_index import load_index, remember_clusters, invalidate as invalidate_cluster_index
+from backend.models.cluster_index import ClusterIndexEntry
+from backend.utils import rollups
 from sqlalchemy import or_
 from backend.utils.logging import logger
-from collections import Counter  # used for cluster token frequency
+import json
 import re
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/enrich", tags=["enrichment"])
 
+# "Description: ..." / "Merchant: ..." lines written by utils.enrich.build_prompt
+_PROMPT_FIELD_RE = re.compile(r'^(Description|Merchant): ?(.*)$', re.M)
+
 class SimpleModelClient:
     async def categorize(self, prompt: str, model: str = 'phi3:mini'):
-        """Richer keyword heuristic to give better coverage for demo purposes."""
-        text = prompt.lower()
-        def any_kw(words):
-            return any(w in text for w in words)
-        if any_kw(['grocery','groceries','wholefoods','trader joe','kroger','safeway']):
-            return {'category': 'Groceries', 'confidence': 0.92, 'model': model}
-        if any_kw(['coffee','starbucks','cafe','drink','restaurant','dining','pizza','chipotle','mcdonald','burger']):
-            return {'category': 'Food & Drink', 'confidence': 0.87, 'model': model}
-        if any_kw(['uber','lyft','gas','shell','exxon','transport','bus','train','metro','taxi']):
-            return {'category': 'Transport', 'confidence': 0.88, 'model': model}
-        if any_kw(['netflix','spotify','hulu','disney','prime video','subscription','subscrip','monthly plan']):
-            return {'category': 'Subscriptions', 'confidence': 0.9, 'model': model}
-        if any_kw(['rent','mortgage','landlord','apartment']):
-            return {'category': 'Housing', 'confidence': 0.9, 'model': model}
-        if any_kw(['pharmacy','doctor','hospital','clinic','health','dental']):
-            return {'category': 'Health', 'confidence': 0.88, 'model': model}
-        if any_kw(['amazon','walmart','target','store','mall','shopping']):
-            return {'category': 'Shopping', 'confidence': 0.86, 'model': model}
-        if any_kw(['cinema','movie','theater','entertainment','concert','ticket']):
-            return {'category': 'Entertainment', 'confidence': 0.85, 'model': model}
-        if any_kw(['salary','payroll','bonus','dividend','interest','refund','rebate']):
-            return {'category': 'Income', 'confidence': 0.95, 'model': model}
-        # fallback 'Other' with moderate confidence slightly above default threshold suggestion if user lowers it
-        return {'category': 'Other', 'confidence': 0.75, 'model': model}
+        """Keyword stand-in for a model: runs the shared rule engine on the prompt's transaction fields."""
+        fields = dict(_PROMPT_FIELD_RE.findall(prompt))
+        category, confidence = categorize_text(fields.get('Description', prompt), fields.get('Merchant'))
+        if category is None:
+            # fallback 'Other' with moderate confidence slightly above default threshold suggestion if user lowers it
+            return {'category': FALLBACK_CATEGORY, 'confidence': FALLBACK_CONFIDENCE, 'model': model}
+        return {'category': category, 'confidence': confidence, 'model': model}
+
+    async def categorize_batch(self, prompt: str, model: str = 'phi3:mini'):
+        """Batch variant: answers the JSON transaction list of a build_batch_prompt prompt with a JSON array."""
+        items = json.loads(prompt.split(BATCH_MARKER, 1)[1])
+        out = []
+        for item in items:
+            category, confidence = categorize_text(item.get('description', ''), item.get('merchant'))
+            out.append({
+                'index': item['index'],
+                'category': category or FALLBACK_CATEGORY,
+                'confidence': confidence if category else FALLBACK_CONFIDENCE,
+            })
+        return json.dumps(out)
 
 @router.post('/')
 async def trigger_enrichment(
@@ -52,6 +56,10 @@ async def trigger_enrichment(
     cluster_threshold: float = 0.5,
     cluster_min_size: int = 2,
     cluster_max_tokens: int = 2,
+    recluster: bool = False,
+    concurrency: int = Query(DEFAULT_CONCURRENCY, ge=1, le=64, description="Model requests in flight"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=200, description="Transactions per model prompt (1 = one prompt per transaction)"),
+    use_cache: bool = Query(True, description="Answer repeat descriptions from the categorization cache"),
     db: Session = Depends(get_db)
 ):
     # Base query
@@ -61,7 +69,8 @@ async def trigger_enrichment(
             or_(
                 Transaction.category == None,  # noqa: E711
                 Transaction.category == '',
-                Transaction.category.ilike('%uncategorized%')
+                # Resolve '%uncategorized%' against the rollup's category list so the filter stays indexable
+                Transaction.category.in_(rollups.categories_matching(db, '%uncategorized%')),
             )
         )
     if not include_already_enriched and not cluster_mode:
@@ -69,6 +78,13 @@ async def trigger_enrichment(
         q = q.filter(
             ~db.query(TransactionCategory.id).filter(TransactionCategory.transaction_id == Transaction.id).exists()
         )
+    elif cluster_mode and not recluster and not include_already_enriched:
+        # Incremental clustering only looks at transactions not yet attached to a cluster
+        q = q.filter(
+            ~db.query(TransactionCategory.id).filter(
+                TransactionCategory.transaction_id == Transaction.id, TransactionCategory.source == 'cluster'
+            ).exists()
+        )
     txns = (
         q.order_by(Transaction.id.desc())
         .limit(limit)
@@ -78,46 +94,39 @@ async def trigger_enrichment(
         return {"enriched": 0, "processed_ids": [], "reason": "no candidates", "cluster_mode": cluster_mode}
 
     if cluster_mode:
-        # Lightweight greedy Jaccard clustering on token sets
-        stop = set(['the','and','for','to','a','of','in','at','on','store','inc','llc','co','payment','purchase'])
-        token_cache = {}
-        def tokenize(t: Transaction):
-            key = t.id
-            if key in token_cache:
-                return token_cache[key]
-            base = f"{t.description or ''} {t.merchant or ''}".lower()
-            toks = [w for w in re.split(r"[^a-z0-9]+", base) if w and len(w) > 2 and w not in stop]
-            token_cache[key] = set(toks)
-            return token_cache[key]
-        unassigned = set(t.id for t in txns)
-        clusters = []  # list of (member_ids, label, avg_sim)
+        # Oldest first so seeds (and therefore clusters and labels) do not depend on query order
+        txns = sorted(txns, key=lambda t: t.id)
         id_to_tx = {t.id: t for t in txns}
-        while unassigned:
-            seed_id = unassigned.pop()
-            seed_tokens = tokenize(id_to_tx[seed_id])
-            members = [seed_id]
-            sims = []
-            # iterate snapshot list for deterministic behavior
-            for other_id in list(unassigned):
-                other_tokens = tokenize(id_to_tx[other_id])
-                if not seed_tokens or not other_tokens:
-                    continue
-                inter = len(seed_tokens & other_tokens)
-                union = len(seed_tokens | other_tokens)
-                j = inter/union if union else 0.0
-                if j >= cluster_threshold:
-                    unassigned.remove(other_id)
-                    members.append(other_id)
-                    sims.append(j)
-            if len(members) >= cluster_min_size:
-                # derive label: top tokens by frequency across members
-                freq = Counter()
-                for mid in members:
-                    freq.update(tokenize(id_to_tx[mid]))
-                top_tokens = [tok for tok,_ in freq.most_common(cluster_max_tokens)] or ['misc']
-                label = 'Cluster: ' + '_'.join(top_tokens)
-                avg_sim = sum(sims)/len(sims) if sims else 1.0
-                clusters.append((members, label, avg_sim))
+        token_sets = [tokenize(t.description, t.merchant) for t in txns]
+        index = load_index(db)
+        clusters = []  # list of (member_ids, label, avg_sim)
+        pending = list(range(len(txns)))
+        joined_existing = 0
+        if not recluster and len(index):
+            # Incremental: attach to persisted centroids first, cluster only what is left
+            by_label, pending = {}, []
+            for i, toks in enumerate(token_sets):
+                entry, sim = index.match(toks)
+                if entry is None:
+                    pending.append(i)
+                else:
+                    by_label.setdefault(entry[1], []).append((txns[i].id, sim))
+            for label, hits in by_label.items():
+                clusters.append(([tid for tid, _ in hits], label, sum(sim for _, sim in hits)/len(hits)))
+                joined_existing += len(hits)
+        pending_sets = [token_sets[i] for i in pending]
+        new_entries = []
+        # Greedy Jaccard clustering on token sets; candidates come from a MinHash/LSH index
+        for member_idx, sims in cluster_token_sets(pending_sets, cluster_threshold, cluster_min_size):
+            members = [pending[k] for k in member_idx]
+            seed_tokens = token_sets[members[0]]
+            known, _ = index.match(seed_tokens)  # keep an existing (possibly renamed) label for the same centroid
+            label = known[1] if known else cluster_label(pending_sets, member_idx, cluster_max_tokens)
+            avg_sim = sum(sims)/len(sims) if sims else 1.0
+            clusters.append(([txns[i].id for i in members], label, avg_sim))
+            if seed_tokens:
+                new_entries.append((label, seed_tokens, len(members)))
+        remember_clusters(db, new_entries, cluster_threshold)
         processed_ids = []
         promoted_ids = []
         cluster_detail = []  # list of dict: label, members:[{id, prev_category, description, merchant}], avg_similarity
@@ -172,6 +181,9 @@ async def trigger_enrichment(
             "threshold": promotion_min_confidence,
             "cluster_threshold": cluster_threshold,
             "cluster_min_size": cluster_min_size,
+            "recluster": recluster,
+            "joined_existing": joined_existing,
+            "index_entries": len(load_index(db)),
         }
     else:
         client = SimpleModelClient()
@@ -183,6 +195,9 @@ async def trigger_enrichment(
             promote=promote,
             promotion_min_confidence=promotion_min_confidence,
             overwrite_existing=overwrite_existing,
+            concurrency=concurrency,
+            batch_size=batch_size,
+            use_cache=use_cache,
         )
         return {
             "cluster_mode": False,
@@ -195,6 +210,9 @@ async def trigger_enrichment(
             "threshold": promotion_min_confidence,
             "only_uncategorized": only_uncategorized,
             "include_already_enriched": include_already_enriched,
+            "concurrency": concurrency,
+            "batch_size": batch_size,
+            "cache": result["cache"],
         }
 
 @router.get('/latest')
@@ -237,9 +255,15 @@ def rename_cluster(payload: RenameClusterIn, db: Session = Depends(get_db)):
     updated_hist = 0
     if payload.update_transactions:
         updated_tx = db.query(Transaction).filter(Transaction.category == old_label).update({Transaction.category: new_label}, synchronize_session=False)
+        rollups.rename_category(db, old_label, new_label)
     if payload.update_history:
         updated_hist = db.query(TransactionCategory).filter(TransactionCategory.category == old_label, TransactionCategory.source=='cluster').update({TransactionCategory.category: new_label}, synchronize_session=False)
+    # Centroids follow the rename so new rows join the renamed cluster
+    db.query(ClusterIndexEntry).filter(ClusterIndexEntry.label == old_label).update(
+        {ClusterIndexEntry.label: new_label, ClusterIndexEntry.renamed: True}, synchronize_session=False
+    )
     db.commit()
+    invalidate_cluster_index()
     logger.info("cluster_renamed", old=old_label, new=new_label, tx_updated=updated_tx, history_updated=updated_hist)
     return {
         "status": "renamed",
@@ -5,12 +5,13 @@ from typing import Optional, List
 from sqlalchemy.orm import Session
 from backend.db import get_db
 from backend.models.goal import Goal
-from sqlalchemy import func, case
+from sqlalchemy import func
 from datetime import timedelta
 import os
 from backend.providers import get_coach_provider, ModelProviderError
 from backend.utils.logging import logger
 from backend.models.transaction import Transaction
+from backend.utils import rollups
 
 router = APIRouter(prefix="/goals", tags=["goals"])
 
@@ -183,25 +184,9 @@ def _monthly_net_savings(db: Session, months: int = 3) -> float:
     """Compute average net savings (income - spend) per month over recent period."""
     start = date.today().replace(day=1)
     window_start = (start - timedelta(days=31*months)).replace(day=1)
-    rows = (
-        db.query(
-            func.strftime('%Y-%m', Transaction.date).label('m'),
-            func.sum(
-                case((Transaction.amount > 0, Transaction.amount), else_=0.0)
-            ).label('inc'),
-            func.sum(
-                case((Transaction.amount < 0, Transaction.amount), else_=0.0)
-            ).label('spend'),
-        )
-        .filter(Transaction.date >= window_start)
-        .group_by('m')
-        .all()
-    )
     nets = []
-    for r in rows:
-        inc = float(r.inc or 0)
-        spend = abs(float(r.spend or 0))
-        nets.append(inc - spend)
+    for _, inc, spend in rollups.month_totals(db, since_month=rollups.month_key(window_start)):
+        nets.append(inc - abs(spend))
     if not nets:
         return 0.0
     return sum(nets)/len(nets)
@@ -1,21 +1,23 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from backend.db import get_db
-from backend.models.transaction import Transaction
+from backend.db import get_async_db
+from backend.utils import rollups
 
 router = APIRouter()
 
 @router.get('/insights')
-async def insights(db: Session = Depends(get_db)):
-    txns = db.query(Transaction).all()
+async def insights(db=Depends(get_async_db)):
+    return await db.run_sync(_insights)
+
+
+def _insights(db: Session) -> dict:
     spending = {}
     income_total = 0.0
-    for t in txns:
-        if t.amount < 0:  # expense
-            key = t.category or 'Uncategorized'
-            spending[key] = spending.get(key, 0.0) + (-t.amount)  # store as positive outflow
-        elif t.amount > 0:  # income
-            income_total += t.amount
+    for category, income, spend, _ in rollups.category_totals(db):  # all-time, from monthly_rollups
+        if spend < 0:  # expense
+            key = category or 'Uncategorized'
+            spending[key] = spending.get(key, 0.0) + (-spend)  # store as positive outflow
+        income_total += income
     spending_list = [
         { 'category': c, 'total': round(v, 2)} for c, v in sorted(spending.items(), key=lambda x: x[1], reverse=True)
     ]
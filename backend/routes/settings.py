@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from backend.db import get_db
 from backend.models.setting import Setting
+from backend.utils import dataset_version
 
 router = APIRouter(prefix="/settings", tags=["settings"])
 
@@ -35,6 +36,7 @@ def upsert_setting(key: str, payload: SettingIn, db: Session = Depends(get_db)):
         db.add(obj)
     else:
         obj.value = payload.value
+    dataset_version.bump(db)  # settings such as MONTHLY_BUDGET feed cached /dashboard responses
     db.commit()
     db.refresh(obj)
     return obj
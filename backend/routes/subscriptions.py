@@ -1,10 +1,8 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
 from datetime import timedelta
 from statistics import mean, pstdev
-from backend.db import get_db
-from backend.models.transaction import Transaction
+from backend.db import get_async_db
+from backend.utils import recurrence
 
 router = APIRouter()
 
@@ -57,15 +55,23 @@ def _analyze_merchant(txns):
 
 
 @router.get('/subscriptions')
-async def subscriptions(db: Session = Depends(get_db)):
-    # Pull negative (expense) transactions with merchant
-    rows = db.query(Transaction).filter(Transaction.amount < 0, Transaction.merchant.isnot(None)).all()
+async def subscriptions(db=Depends(get_async_db)):
+    # Precomputed per-merchant state (utils/recurrence.py); no transaction scan per request
+    result = await db.execute(recurrence.subscriptions_query())
+    return {'subscriptions': recurrence.order_subscriptions([recurrence.describe(row) for row in result.all()])}
+
+
+def _subscriptions_from_rows(rows) -> dict:
+    """Original per-request analysis over (merchant, date, amount) rows ordered by merchant, date, id.
+
+    Kept as the reference for tests and backend/scripts/bench_dashboard.py; the
+    route reads the persisted state instead.
+    """
     by_merchant = {}
     for t in rows:
         by_merchant.setdefault(t.merchant, []).append(t)
     analyzed = []
     for merchant, txns in by_merchant.items():
-        txns.sort(key=lambda t: t.date)
         info = _analyze_merchant(txns)
         if info and ('recurring' in info['flags'] or 'trial_converted' in info['flags']):
             analyzed.append(info)
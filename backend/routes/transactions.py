@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from backend.db import get_db
 from backend.models.transaction import Transaction
 from backend.models.transaction_category import TransactionCategory
+from backend.utils import merchants, recurrence, rollups
 
 router = APIRouter()
 
@@ -67,11 +68,18 @@ def wipe_all_data(db: Session = Depends(get_db)):
     # Import locally to avoid circular imports
     from backend.models.goal import Goal
     from backend.models.setting import Setting
+    from backend.models.transaction_fingerprint import TransactionFingerprint
+    from backend.models.cluster_index import ClusterIndexEntry
     deleted = {
         "transaction_categories": db.query(TransactionCategory).delete(),
+        "transaction_fingerprints": db.query(TransactionFingerprint).delete(),
         "transactions": db.query(Transaction).delete(),
         "goals": db.query(Goal).delete(),
         "settings": db.query(Setting).delete(),
+        "cluster_index": db.query(ClusterIndexEntry).delete(),
     }
+    rollups.clear(db)
+    recurrence.clear(db)
+    merchants.clear(db)
     db.commit()
     return {"status": "wiped", "deleted": deleted}
@@ -1,28 +1,27 @@
+from __future__ import annotations
+
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
-import pandas as pd
-import io, csv
-from datetime import datetime
-from backend.db import get_db
-from backend.models.transaction import Transaction
+import io, csv, os, shutil, tempfile
+from collections import Counter
+from backend.db import get_db, SessionLocal
 from backend.utils.logging import logger
-from backend.utils.categorize import simple_category
+from backend.utils.ingest import normalize_frame, parse_date, DATE_FORMATS  # noqa: F401
+from backend.utils.persist import persist_records, DEFAULT_CHUNK_SIZE
+from backend.utils import progress, jobs
+from backend.utils.cluster_index import assign_new_transactions
+from backend.utils.upload_profiles import header_signature, find_profile, save_profile, touch_profile, hold_frame, claim_frame
+from backend.utils.lazy import lazy_module
+
+pd = lazy_module('pandas')
 
 router = APIRouter()
 
 # Core fields required for minimal ingestion (merchant can be synthesized)
 REQUIRED_MIN_COLUMNS = {"date", "amount"}
 PRIMARY_TEXT_COLUMN = "description"  # logical field we want for narrative text
-
-DATE_FORMATS = ["%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y", "%d-%m-%Y"]
-
-def parse_date(val: str):
-    for fmt in DATE_FORMATS:
-        try:
-            return datetime.strptime(val, fmt).date()
-        except ValueError:
-            continue
-    raise ValueError(f"Invalid date format: {val}")
+# Rows parsed per chunk when stream=true (bounds peak memory independent of file size)
+STREAM_CHUNK_ROWS = int(os.getenv('UPLOAD_STREAM_CHUNK_ROWS', '50000') or 50000)
 
 HEADER_SYNONYMS = {
     'merchant_name': 'merchant',
@@ -127,41 +126,32 @@ def _apply_description_replacement(df: pd.DataFrame, chosen: str):
     if chosen in df.columns:
         df.rename(columns={chosen: 'description'}, inplace=True)
 
-@router.post("/upload")
-async def upload_csv(
-    file: UploadFile = File(...),
-    dry_run: bool = False,
-    chosen_description: str | None = Query(None, description="Explicit column name to use as description if not auto-detected"),
-    auto_confirm_description: bool = Query(False, description="Proceed automatically with top candidate if confidence is high"),
-    force_description_choice: bool = Query(False, description="Always prompt for description selection even if a description column already exists"),
-    db: Session = Depends(get_db)
-):
-    if not file.filename.lower().endswith('.csv'):
-        raise HTTPException(status_code=400, detail="Only CSV files supported")
-    content = await file.read()
-    # Attempt delimiter sniffing
-    text = content.decode(errors='replace')
-    sample = text[:2048]
-    dialect = None
+def _sniff_delimiter(sample: str) -> str:
     try:
-        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
-        delimiter = dialect.delimiter
+        return csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
     except csv.Error:
-        delimiter = ','
-    try:
-        df = pd.read_csv(io.StringIO(text), delimiter=delimiter, comment='#')
-    except (pd.errors.ParserError, UnicodeDecodeError, ValueError) as e:
-        raise HTTPException(status_code=400, detail=f"CSV parse error: {e}") from e
-    if df.empty:
-        raise HTTPException(status_code=400, detail="CSV is empty after parsing (check content / delimiter)")
-    df.columns = _remap_headers(df.columns)
+        return ','
+
+def _resolve_columns(df: pd.DataFrame, chosen_description: str | None, auto_confirm_description: bool, force_description_choice: bool, profile_source: str | None = None):
+    """Settle which column becomes `description` on a header-remapped frame (mutates df).
+
+    profile_source is the column remembered by a matching schema profile; when it
+    is present candidate scoring and confirmation are skipped.
+
+    Returns {"confirmation": payload} when the client must pick a column, otherwise
+    {"description_source", "auto_confirmed", "candidate_meta", "cols"}.
+    """
     cols = set(df.columns)
     # If description missing, discover candidates and require confirmation unless confident & auto_confirm
     auto_confirmed = False
     candidate_meta = []
     # Track which original column was ultimately used for description so we can reason about category handling
     description_source = 'description' if 'description' in cols else None
-    if 'description' not in cols or force_description_choice:
+    if profile_source and profile_source in cols:
+        _apply_description_replacement(df, profile_source)
+        cols = set(df.columns)
+        description_source = profile_source
+    elif 'description' not in cols or force_description_choice:
         candidate_meta = _score_description_candidates(df)
         # If user provided explicit choice
         if chosen_description:
@@ -205,7 +195,7 @@ async def upload_csv(
                         'richness': round(richness,4),
                         'examples': [v for v in non_empty.head(3)],
                     })
-                return {
+                return {"confirmation": {
                     "status": "needs_confirmation",
                     "message": message,
                     "candidates": candidate_meta,
@@ -213,7 +203,7 @@ async def upload_csv(
                     "normalized_columns": list(df.columns),
                     "dry_run": True,
                     "forced": force_description_choice,
-                }
+                }}
         else:
             # No candidates; synthesize fallback from first non-required textual
             for col in df.columns:
@@ -230,95 +220,228 @@ async def upload_csv(
     if not REQUIRED_MIN_COLUMNS.issubset(cols) or 'description' not in cols:
         missing = (REQUIRED_MIN_COLUMNS | {'description'}) - cols
         raise HTTPException(status_code=400, detail=f"CSV missing required logical fields after normalization: {missing}")
-    records = 0
-    skipped = 0
-    errors = []
-    sign_inferred = 0
+    return {
+        "description_source": description_source,
+        "auto_confirmed": auto_confirmed,
+        "candidate_meta": candidate_meta,
+        "cols": cols,
+    }
+
+def _conform_chunk(chunk: pd.DataFrame, columns: list, description_source: str | None):
+    """Replay the header decisions taken on the first streamed chunk onto a later one."""
+    chunk.columns = columns
+    if description_source and description_source != 'description':
+        _apply_description_replacement(chunk, description_source)
+    if 'merchant' not in chunk.columns:
+        chunk['merchant'] = ''
 
-    income_keywords = {"income","salary","payroll","deposit","interest","refund","rebate","dividend","bonus"}
-    expense_keywords = {"grocery","rent","subscription","payment","purchase","expense","withdrawal","debit","fee","coffee","restaurant","transfer out","transfer-out"}
-    debit_tokens = {"debit","withdrawal","payment","purchase","fee","dr","out"}
-    credit_tokens = {"credit","deposit","refund","income","cr","in"}
-    for idx, row in df.iterrows():
+def _ingest_stream(
+    raw,
+    filename: str,
+    db: Session,
+    upload_id: str,
+    *,
+    dry_run: bool,
+    chosen_description: str | None,
+    auto_confirm_description: bool,
+    force_description_choice: bool,
+    chunk_size: int,
+    return_ids: bool,
+    stream_chunk_rows: int,
+    dedupe: str = 'skip',
+    use_profile: bool = True,
+    as_job: bool = False,
+):
+    """Ingest a binary CSV file object chunk by chunk, publishing progress under upload_id.
+
+    Only one parsed chunk is alive at a time and each is committed as soon as it
+    is normalized, so memory stays bounded by `stream_chunk_rows`. Description
+    inference runs on the first chunk. Rows committed before a mid-file parse
+    error are kept (the error detail reports how many).
+
+    With as_job the final phase is left to the job runner (utils/jobs.py), which
+    publishes it together with the returned summary.
+    """
+    def finish(**fields):
+        if not as_job:
+            progress.update(upload_id, finished=True, **fields)
+
+    raw.seek(0)
+    head = raw.read(65536).decode(errors='replace')
+    raw.seek(0)
+    signature = header_signature(head)
+    profile = None
+    if use_profile and not dry_run and not (chosen_description or force_description_choice):
+        profile = find_profile(db, signature)
+    delimiter = profile.delimiter if profile else _sniff_delimiter(head[:2048])
+    progress.update(upload_id, phase='parsing')
+    text_stream = io.TextIOWrapper(raw, encoding='utf-8', errors='replace', newline='')
+    records = skipped = sign_inferred = chunks = inserted = existing = updated = 0
+    occurrences = Counter()  # keeps fingerprint occurrence numbering continuous across chunks
+    errors = []
+    inserted_ids = [] if return_ids and not dry_run else None
+    insert_seconds = 0.0
+    clustered = 0
+    try:
         try:
-            raw_date = str(row['date']).strip()
-            if raw_date.startswith('#') or raw_date == '':  # comment / blank line
-                skipped += 1
-                continue
-            date_obj = parse_date(raw_date)
-            raw_desc = row['description']
-            if raw_desc is None or (isinstance(raw_desc, float) and pd.isna(raw_desc)):
-                raw_desc = ''
-            desc = str(raw_desc).strip()
-            if not desc:
-                desc = 'UNKNOWN'  # ensure non-empty to avoid downstream clustering nulls
-            merchant = str(row.get('merchant', '')).strip()
-            amount_val = float(row['amount'])
-            # Sign inference only if non-negative raw amount
-            if amount_val >= 0:
-                txntype = str(row.get('txn_type','')).strip().lower()
-                if txntype in debit_tokens:
-                    amount_val = -abs(amount_val)
-                    sign_inferred += 1
-                elif txntype in credit_tokens:
-                    amount_val = abs(amount_val)  # explicit, still counts if changed from negative? skip
-                else:
-                    # Fallback to keyword heuristic on combined text
-                    combined = ' '.join([
-                        str(desc),
-                        str(row.get('category','')),
-                        str(row.get('labels','')),
-                        str(row.get('notes','')),
-                        str(row.get('txn_type','')),
-                    ]).lower()
-                    has_income = any(k in combined for k in income_keywords)
-                    has_expense = any(k in combined for k in expense_keywords)
-                    if has_expense and not has_income:
-                        amount_val = -abs(amount_val)
-                        sign_inferred += 1
-                    # If neither detected, default assumption: treat as outflow unless obviously income keyword present
-                    elif not has_income:
-                        amount_val = -abs(amount_val)
-                        sign_inferred += 1
-            # Category resolution precedence:
-            # 1. If original category column existed AND wasn't repurposed as description, prefer its value
-            # 2. If the user explicitly selected the 'category' column as description (description_source == 'category'),
-            #    we treat the description text itself as the category label (better than leaving empty)
-            # 3. Fallback to heuristic simple_category
-            raw_category_val = None
-            if description_source != 'category' and 'category' in df.columns:
-                try:
-                    rc = row.get('category')
-                    if rc is not None and not (isinstance(rc, float) and pd.isna(rc)):
-                        txt = str(rc).strip()
-                        if txt:
-                            raw_category_val = txt
-                except Exception:
-                    pass
-            elif description_source == 'category':
-                # Original category column became description; reuse that text as category directly
-                raw_category_val = desc if desc and desc != 'UNKNOWN' else None
-            category = raw_category_val if raw_category_val else simple_category(desc, merchant)
-            txn = Transaction(
-                date=date_obj,
-                description=desc,
-                amount=amount_val,
-                merchant=merchant,
-                category=category,
-            )
+            reader = pd.read_csv(text_stream, delimiter=delimiter, comment='#', chunksize=stream_chunk_rows)
+            first = next(reader, None)
+        except (pd.errors.ParserError, UnicodeDecodeError, ValueError) as e:
+            finish(phase='failed', error=str(e))
+            raise HTTPException(status_code=400, detail=f"CSV parse error: {e}") from e
+        if first is None or first.empty:
+            finish(phase='failed', error='empty')
+            raise HTTPException(status_code=400, detail="CSV is empty after parsing (check content / delimiter)")
+        first.columns = _remap_headers(first.columns)
+        raw_columns = list(first.columns)
+        resolution = _resolve_columns(
+            first, chosen_description, auto_confirm_description, force_description_choice,
+            profile_source=profile.description_source if profile else None,
+        )
+        if "confirmation" in resolution:
+            # Streamed files are never held server-side, so there is nothing to confirm later
+            finish(phase='needs_confirmation')
+            return {
+                **resolution["confirmation"],
+                "confirmation_token": None,
+                "error": "Streamed and async uploads are not held for /upload/confirm; upload the file again with chosen_description set to one of the candidates.",
+                "upload_id": upload_id,
+                "phase": "needs_confirmation",
+            }
+        description_source = resolution["description_source"]
+        normalized_columns = list(first.columns)
+        profile_saved = False
+        if not dry_run:
+            if profile is not None:
+                touch_profile(profile)
+            elif resolution["candidate_meta"]:
+                profile_saved = save_profile(db, signature, delimiter, raw_columns, description_source)
+        chunk = first
+        while chunk is not None:
+            result = normalize_frame(chunk, description_source)
             if not dry_run:
-                db.add(txn)
-            records += 1
-        except (ValueError, TypeError) as e:
-            skipped += 1
-            if len(errors) < 5:  # cap error detail
-                errors.append({"row": int(idx), "error": str(e)})
-            continue
-    if not dry_run:
+                persisted = persist_records(db, result["frame"], mode=dedupe, chunk_size=chunk_size, returning=return_ids, occurrences=occurrences)
+                clustered += assign_new_transactions(db, persisted["new_ids"], result["frame"].loc[persisted["new_index"]])
+                db.commit()
+                inserted += persisted["inserted"]
+                existing += persisted["existing"]
+                updated += persisted["updated"]
+                insert_seconds += persisted["seconds"]
+                if return_ids:
+                    inserted_ids.extend(persisted["ids"])
+            records += result["records"]
+            skipped += result["skipped"]
+            sign_inferred += result["sign_inferred"]
+            errors.extend(result["errors"][:5 - len(errors)])
+            chunks += 1
+            progress.increment(upload_id, rows_read=len(chunk), records=result["records"], skipped=result["skipped"], chunks=1)
+            try:
+                chunk = next(reader, None)
+            except (pd.errors.ParserError, UnicodeDecodeError, ValueError) as e:
+                finish(phase='failed', error=str(e))
+                raise HTTPException(status_code=400, detail=f"CSV parse error after {records + skipped} rows ({inserted} persisted): {e}") from e
+            if chunk is not None:
+                _conform_chunk(chunk, raw_columns, description_source)
+    finally:
+        text_stream.detach()  # leave the underlying file for the caller to close
+    rows_per_sec = round((inserted + existing) / insert_seconds, 1) if insert_seconds > 0 else None
+    finish(phase='done')
+    logger.info("csv_uploaded", file=filename, records=records, skipped=skipped, dry_run=dry_run, streamed=True, chunks=chunks, rows_per_sec=rows_per_sec)
+    return {
+        "status": "ok",
+        "records": records,
+        "skipped": skipped,
+        "errors_sample": errors,
+        "delimiter": delimiter,
+        "normalized_columns": normalized_columns,
+        "dry_run": dry_run,
+        "sign_inferred": sign_inferred,
+        "description_column_used": 'description',
+        "description_source": description_source,
+        "auto_confirmed": resolution["auto_confirmed"],
+        "candidates_evaluated": resolution["candidate_meta"] or None,
+        "insert_seconds": round(insert_seconds, 4) if not dry_run else None,
+        "rows_per_sec": rows_per_sec,
+        "inserted_ids": inserted_ids,
+        "dedupe_mode": dedupe,
+        "new_records": inserted if not dry_run else None,
+        "already_existed": existing if not dry_run else None,
+        "updated_existing": updated if not dry_run else None,
+        "schema_profile": {"signature": signature, "applied": profile is not None, "saved": profile_saved},
+        "clustered": clustered if not dry_run else None,
+        "streamed": True,
+        "chunks": chunks,
+        "upload_id": upload_id,
+    }
+
+def _run_upload_job(job_id: str, path: str, filename: str, options: dict):
+    """Background job body: stream the spooled copy of an upload into the DB with its own session."""
+    db = SessionLocal()
+    try:
+        with open(path, 'rb') as raw:
+            return _ingest_stream(raw, filename, db, job_id, as_job=True, **options)
+    finally:
+        db.close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+@router.get("/upload/progress/{upload_id}")
+def upload_progress(upload_id: str):
+    entry = progress.get(upload_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Unknown upload id")
+    return entry
+
+@router.get("/upload/jobs/{job_id}")
+def upload_job_status(job_id: str):
+    """Phase (queued|running|parsing|done|needs_confirmation|failed), row counters, throughput and final summary."""
+    entry = progress.get(job_id)
+    if not entry or entry.get('kind') != 'job':
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return entry
+
+def _ingest_frame(
+    db: Session,
+    df: pd.DataFrame,
+    resolution: dict,
+    *,
+    filename: str,
+    delimiter: str,
+    signature: str | None,
+    raw_columns: list,
+    profile,
+    dry_run: bool,
+    chunk_size: int,
+    return_ids: bool,
+    dedupe: str,
+):
+    """Normalize and persist a fully parsed, column-resolved frame; builds the /upload response."""
+    description_source = resolution["description_source"]
+    auto_confirmed = resolution["auto_confirmed"]
+    candidate_meta = resolution["candidate_meta"]
+    cols = resolution["cols"]
+    result = normalize_frame(df, description_source)
+    records = result["records"]
+    skipped = result["skipped"]
+    errors = result["errors"]
+    sign_inferred = result["sign_inferred"]
+    persisted = None
+    rows_per_sec = None
+    profile_saved = False
+    clustered = None
+    if not dry_run:  # dry runs never touch the session
+        persisted = persist_records(db, result["frame"], mode=dedupe, chunk_size=chunk_size, returning=return_ids)
+        clustered = assign_new_transactions(db, persisted["new_ids"], result["frame"].loc[persisted["new_index"]])
+        if profile is not None:
+            touch_profile(profile)
+        elif candidate_meta:
+            profile_saved = save_profile(db, signature, delimiter, raw_columns, description_source)
         db.commit()
-    else:
-        db.rollback()
-    logger.info("csv_uploaded", file=file.filename, records=records, skipped=skipped, dry_run=dry_run, auto_confirmed=auto_confirmed)
+        if persisted["seconds"] > 0:
+            rows_per_sec = round((persisted["inserted"] + persisted["existing"]) / persisted["seconds"], 1)
+    logger.info("csv_uploaded", file=filename, records=records, skipped=skipped, dry_run=dry_run, auto_confirmed=auto_confirmed, rows_per_sec=rows_per_sec, profile_applied=profile is not None)
     return {
         "status": "ok",
         "records": records,
@@ -329,7 +452,142 @@ async def upload_csv(
         "dry_run": dry_run,
         "sign_inferred": sign_inferred,
         "description_column_used": 'description' if 'description' in cols else None,
-    "description_source": description_source,
+        "description_source": description_source,
         "auto_confirmed": auto_confirmed,
         "candidates_evaluated": candidate_meta if candidate_meta else None,
+        "insert_seconds": round(persisted["seconds"], 4) if persisted else None,
+        "rows_per_sec": rows_per_sec,
+        "inserted_ids": persisted["ids"] if persisted else None,
+        "dedupe_mode": dedupe,
+        "new_records": persisted["inserted"] if persisted else None,
+        "already_existed": persisted["existing"] if persisted else None,
+        "updated_existing": persisted["updated"] if persisted else None,
+        "schema_profile": {"signature": signature, "applied": profile is not None, "saved": profile_saved},
+        "clustered": clustered,
     }
+
+@router.post("/upload/confirm")
+def confirm_upload(
+    token: str = Query(..., description="confirmation_token returned by a needs_confirmation /upload response"),
+    chosen_description: str = Query(..., description="Column to use as description"),
+    dry_run: bool = False,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=100_000, description="Rows per bulk INSERT batch"),
+    return_ids: bool = Query(False, description="Include ids of inserted transactions in the response"),
+    dedupe: str = Query('skip', pattern='^(skip|upsert|off)$', description="skip rows already stored (by content fingerprint), upsert their category, or off to insert everything"),
+    db: Session = Depends(get_db),
+):
+    """Finish an upload that needed a description choice using the frame held server-side."""
+    held = claim_frame(token)
+    if held is None:
+        raise HTTPException(status_code=404, detail="Confirmation token unknown or expired; upload the file again")
+    df = held["frame"].copy()
+    try:
+        resolution = _resolve_columns(df, chosen_description, False, held["forced"])
+    except HTTPException:
+        hold_frame(held, token)  # let the client retry with a valid column
+        raise
+    if dry_run:
+        hold_frame(held, token)  # a dry-run preview keeps the token usable for the real import
+    return _ingest_frame(
+        db, df, resolution,
+        filename=held["filename"], delimiter=held["delimiter"], signature=held["signature"],
+        raw_columns=held["raw_columns"], profile=None,
+        dry_run=dry_run, chunk_size=chunk_size, return_ids=return_ids, dedupe=dedupe,
+    )
+
+@router.post("/upload")
+def upload_csv(  # sync on purpose: FastAPI runs it in the threadpool, so parsing and bulk inserts never block the event loop
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    chosen_description: str | None = Query(None, description="Explicit column name to use as description if not auto-detected"),
+    auto_confirm_description: bool = Query(False, description="Proceed automatically with top candidate if confidence is high"),
+    force_description_choice: bool = Query(False, description="Always prompt for description selection even if a description column already exists"),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=100_000, description="Rows per bulk INSERT batch"),
+    return_ids: bool = Query(False, description="Include ids of inserted transactions in the response"),
+    stream: bool = Query(False, description="Parse and persist chunk by chunk with bounded memory (for very large files)"),
+    stream_chunk_rows: int = Query(STREAM_CHUNK_ROWS, ge=100, le=1_000_000, description="Rows parsed per chunk in stream mode"),
+    upload_id: str | None = Query(None, description="Client-chosen id to poll GET /upload/progress/{upload_id} while streaming; 409 while another upload with this id is unfinished"),
+    dedupe: str = Query('skip', pattern='^(skip|upsert|off)$', description="skip rows already stored (by content fingerprint), upsert their category, or off to insert everything"),
+    run_async: bool = Query(False, alias="async", description="Queue the upload as a background job and return its id immediately"),
+    use_profile: bool = Query(True, description="Reuse a stored schema profile (delimiter + description column) for a known header layout"),
+    db: Session = Depends(get_db)
+):
+    if not file.filename.lower().endswith('.csv'):
+        raise HTTPException(status_code=400, detail="Only CSV files supported")
+    stream_options = dict(
+        dry_run=dry_run,
+        chosen_description=chosen_description,
+        auto_confirm_description=auto_confirm_description,
+        force_description_choice=force_description_choice,
+        chunk_size=chunk_size,
+        return_ids=return_ids,
+        stream_chunk_rows=stream_chunk_rows,
+        dedupe=dedupe,
+        use_profile=use_profile,
+    )
+    if run_async:
+        try:
+            jobs.reserve_slot()
+        except jobs.JobQueueFull as e:
+            raise HTTPException(status_code=429, detail=str(e)) from e
+        try:
+            job_id = progress.start(upload_id, kind='job', file=file.filename, streamed=True)
+        except progress.ProgressKeyInUse as e:
+            jobs.release_slot()
+            raise HTTPException(status_code=409, detail=str(e)) from e
+        try:
+            # The UploadFile is closed once this request ends, so spool a private copy for the worker
+            with tempfile.NamedTemporaryFile(prefix='upload-', suffix='.csv', delete=False) as tmp:
+                shutil.copyfileobj(file.file, tmp)
+            jobs.submit(job_id, _run_upload_job, tmp.name, file.filename, stream_options)
+        except Exception as e:
+            jobs.release_slot()
+            progress.update(job_id, phase='failed', finished=True, error=str(e))
+            raise
+        logger.info("csv_upload_job_queued", file=file.filename, job_id=job_id)
+        return {"status": "queued", "job_id": job_id, "status_url": f"/upload/jobs/{job_id}"}
+    if stream:
+        try:
+            upload_id = progress.start(upload_id, file=file.filename, streamed=True)
+        except progress.ProgressKeyInUse as e:
+            raise HTTPException(status_code=409, detail=str(e)) from e
+        try:
+            return _ingest_stream(file.file, file.filename, db, upload_id, **stream_options)
+        except Exception as e:
+            # Never leave the id registered as in progress, or it could not be reused
+            if not (progress.get(upload_id) or {}).get('finished'):
+                progress.update(upload_id, phase='failed', finished=True, error=getattr(e, 'detail', None) or str(e))
+            raise
+    content = file.file.read()
+    text = content.decode(errors='replace')
+    del content
+    signature = header_signature(text[:65536])
+    profile = None
+    if use_profile and not dry_run and not (chosen_description or force_description_choice):
+        profile = find_profile(db, signature)
+    # Known layout reuses its delimiter; otherwise attempt delimiter sniffing
+    delimiter = profile.delimiter if profile else _sniff_delimiter(text[:2048])
+    try:
+        df = pd.read_csv(io.StringIO(text), delimiter=delimiter, comment='#')
+    except (pd.errors.ParserError, UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"CSV parse error: {e}") from e
+    del text
+    if df.empty:
+        raise HTTPException(status_code=400, detail="CSV is empty after parsing (check content / delimiter)")
+    df.columns = _remap_headers(df.columns)
+    raw_columns = list(df.columns)
+    resolution = _resolve_columns(
+        df, chosen_description, auto_confirm_description, force_description_choice,
+        profile_source=profile.description_source if profile else None,
+    )
+    if "confirmation" in resolution:
+        # Keep the parsed frame server-side so the confirmation does not resend the file;
+        # _resolve_columns leaves df untouched when it asks for confirmation
+        token = hold_frame({"frame": df, "raw_columns": raw_columns, "delimiter": delimiter, "signature": signature,
+                            "filename": file.filename, "forced": force_description_choice})
+        return {**resolution["confirmation"], "confirmation_token": token, "confirm_url": f"/upload/confirm?token={token}"}
+    return _ingest_frame(
+        db, df, resolution,
+        filename=file.filename, delimiter=delimiter, signature=signature, raw_columns=raw_columns, profile=profile,
+        dry_run=dry_run, chunk_size=chunk_size, return_ids=return_ids, dedupe=dedupe,
+    )
@@ -0,0 +1,137 @@
+"""Backtest the /forecast methods (utils/forecasting.py) on the sample datasets.
+
+Usage:
+    PYTHONPATH=. python backend/scripts/backtest_forecast.py [holdout_days] [origins]
+
+For every dataset (the CSVs under data/ plus a seeded two-year synthetic
+history with weekly seasonality) and every method (simple, ets, and prophet
+when installed), the expense history is cut at up to `origins` points
+`holdout_days` apart; each method is fitted on the rows before the cut and
+scored on the `holdout_days` after it. Reported per dataset and method:
+
+* used:    the method that actually answered (fallbacks are shown as such)
+* mape:    mean absolute percentage error of weekly spend totals (days
+           without expenses make daily MAPE undefined)
+* total%:  mean absolute percentage error of the whole holdout's spend
+           (what next_30d_spend answers)
+* cover:   share of holdout days inside the forecast band (methods with bands)
+* fit_ms:  median wall time of `fit_forecast` (fit + predict + response build)
+
+Datasets too short for even one cut are listed as skipped.
+"""
+import glob
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from backend.utils import forecasting
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+MIN_TRAIN_DAYS = 14
+
+
+def _sample_expenses(path: str) -> list:
+    df = pd.read_csv(path, comment='#', skipinitialspace=True)
+    df = df[pd.to_numeric(df['amount'], errors='coerce') < 0]
+    return [(d.date(), float(a)) for d, a in zip(pd.to_datetime(df['date']), df['amount'].astype(float))]
+
+
+def _synthetic_expenses(days: int = 730, seed: int = 3) -> list:
+    """Groceries and dining with a weekend peak, monthly rent and subscriptions, and slow drift."""
+    rng = np.random.default_rng(seed)
+    start = date.today() - timedelta(days=days)
+    weekday_factor = np.array([0.8, 0.7, 0.8, 0.9, 1.2, 1.6, 1.4])
+    rows = []
+    for k in range(days):
+        d = start + timedelta(days=k)
+        for _ in range(rng.poisson(2 * weekday_factor[d.weekday()])):
+            rows.append((d, -round(float(rng.lognormal(3, 0.6)) * (1 + k / days * 0.2), 2)))
+        if d.day == 1:
+            rows.append((d, -1200.0))
+        if d.day in (5, 17):
+            rows.append((d, -round(float(rng.choice([9.99, 15.99])), 2)))
+    return rows
+
+
+def _datasets() -> dict:
+    datasets = {os.path.basename(p): _sample_expenses(p) for p in sorted(glob.glob(os.path.join(DATA_DIR, '*.csv')))}
+    datasets['synthetic_2y'] = _synthetic_expenses()
+    return datasets
+
+
+def _methods() -> list:
+    return ['simple', 'ets'] + (['prophet'] if forecasting.prophet_available() else [])
+
+
+def _daily(rows: list, start: date, days: int) -> np.ndarray:
+    out = np.zeros(days)
+    for d, amount in rows:
+        offset = (d - start).days
+        if 0 <= offset < days:
+            out[offset] += -amount
+    return out
+
+
+def backtest(rows: list, method: str, holdout_days: int, origins: int) -> dict | None:
+    if not rows:
+        return None
+    first, last = min(d for d, _ in rows), max(d for d, _ in rows)
+    errors, total_errors, covered, band_days, timings, used = [], [], 0, 0, [], set()
+    for k in range(origins):
+        cut = last - timedelta(days=holdout_days * (k + 1) - 1)  # first holdout day
+        if (cut - first).days < MIN_TRAIN_DAYS:
+            break
+        train = [r for r in rows if r[0] < cut]
+        start = time.perf_counter()
+        fit = forecasting.fit_forecast(train, method, holdout_days, today=cut - timedelta(days=1))
+        timings.append((time.perf_counter() - start) * 1000)
+        result = fit['result']
+        used.add(result['forecast_method'])
+        # Forecasts start the day after the last training expense; align them to the holdout window
+        by_date = {p['date']: p for p in result['daily_forecast']}
+        window = [cut + timedelta(days=i) for i in range(holdout_days)]
+        predicted = np.array([by_date.get(d.isoformat(), {}).get('predicted_spend', 0.0) for d in window])
+        actual = _daily(rows, cut, holdout_days)
+        weeks = holdout_days // 7
+        pred_weeks = predicted[:weeks * 7].reshape(weeks, 7).sum(axis=1)
+        act_weeks = actual[:weeks * 7].reshape(weeks, 7).sum(axis=1)
+        nonzero = act_weeks > 0
+        errors.extend(np.abs(pred_weeks[nonzero] - act_weeks[nonzero]) / act_weeks[nonzero])
+        if actual.sum() > 0:
+            total_errors.append(abs(predicted.sum() - actual.sum()) / actual.sum())
+        if all('lower' in by_date.get(d.isoformat(), {}) for d in window):
+            lower = np.array([by_date[d.isoformat()]['lower'] for d in window])
+            upper = np.array([by_date[d.isoformat()]['upper'] for d in window])
+            covered += int(((actual >= lower) & (actual <= upper)).sum())
+            band_days += holdout_days
+    if not timings:
+        return None
+    return {
+        'used': '/'.join(sorted(used)),
+        'origins': len(timings),
+        'mape': 100 * float(np.mean(errors)) if errors else float('nan'),
+        'total': 100 * float(np.mean(total_errors)) if total_errors else float('nan'),
+        'cover': covered / band_days if band_days else None,
+        'fit_ms': statistics.median(timings),
+    }
+
+
+def main(holdout_days: int = 28, origins: int = 3):
+    print(f"{'dataset':<28} {'method':<8} {'used':<16} {'origins':>7} {'mape%':>7} {'total%':>7} {'cover':>6} {'fit_ms':>8}")
+    for name, rows in _datasets().items():
+        for method in _methods():
+            report = backtest(rows, method, holdout_days, origins)
+            if report is None:
+                print(f"{name:<28} {method:<8} skipped (under {MIN_TRAIN_DAYS} days of history before the holdout)")
+                continue
+            cover = f"{report['cover']:.2f}" if report['cover'] is not None else '-'
+            print(f"{name:<28} {method:<8} {report['used']:<16} {report['origins']:>7} {report['mape']:>7.1f} {report['total']:>7.1f} {cover:>6} {report['fit_ms']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:3]))
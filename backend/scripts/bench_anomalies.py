@@ -0,0 +1,55 @@
+"""Benchmark vectorized anomaly scoring (utils/anomaly.py) on a synthetic history.
+
+Usage:
+    PYTHONPATH=. python backend/scripts/bench_anomalies.py [rows]
+
+Builds `rows` expenses spread over ~5 years, 2,000 merchants and 10
+categories with a handful of planted spikes, times `score_expenses` and checks
+that every planted spike scores above the default threshold.
+"""
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from backend.utils.anomaly import Z_THRESHOLD, score_expenses
+
+MERCHANTS = 2_000
+CATEGORIES = ['Groceries', 'Food & Drink', 'Transport', 'Subscriptions', 'Housing', 'Shopping', 'Entertainment', 'Health', 'Other', '']
+SPIKES = 50
+
+
+def _frame(rows: int) -> tuple:
+    rng = np.random.default_rng(7)
+    merchant_ids = rng.integers(0, MERCHANTS, rows)
+    typical = rng.lognormal(3, 1, MERCHANTS)  # each merchant's usual ticket size
+    amounts = -typical[merchant_ids] * rng.normal(1, 0.1, rows).clip(0.5, 1.5)
+    spikes = rng.choice(rows, SPIKES, replace=False)
+    amounts[spikes] *= 20
+    start = date.today() - timedelta(days=5 * 365)
+    frame = pd.DataFrame({
+        'id': np.arange(1, rows + 1),
+        'date': [start + timedelta(days=int(d)) for d in rng.integers(0, 5 * 365, rows)],
+        'description': 'txn',
+        'amount': amounts.round(2),
+        'category': np.array(CATEGORIES, dtype=object)[merchant_ids % len(CATEGORIES)],
+        'merchant': np.array([f'Merchant {i}' for i in range(MERCHANTS)], dtype=object)[merchant_ids],
+    })
+    return frame, spikes
+
+
+def main(rows: int):
+    frame, spikes = _frame(rows)
+    start = time.perf_counter()
+    scored = score_expenses(frame)
+    elapsed = time.perf_counter() - start
+    caught = int((scored['score'].to_numpy()[spikes] >= Z_THRESHOLD).sum())
+    flagged = int((scored['score'] >= Z_THRESHOLD).sum())
+    print(f"rows={rows:,} score_expenses={elapsed:.2f}s ({rows / elapsed:,.0f} rows/s) flagged={flagged} planted_caught={caught}/{SPIKES}")
+    assert caught == SPIKES, "planted spikes missed"
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
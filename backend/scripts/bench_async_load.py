@@ -0,0 +1,141 @@
+"""Concurrent load test: async DB layer vs. synchronous queries on the event loop.
+
+Usage:
+    PYTHONPATH=. python backend/scripts/bench_async_load.py [rows] [concurrency] [requests]
+
+Builds a throwaway SQLite database with `rows` synthetic transactions, then
+drives /subscriptions, /dashboard and /insights with `concurrency` workers
+through an in-process ASGI client while a probe polls /health. It runs twice:
+
+* blocking - get_async_db overridden to run the sync queries inline on the
+  event loop (what the `async def` routes did before the async layer);
+* async    - the real get_async_db (AsyncSession on aiosqlite/asyncpg, or the
+  threadpool facade when no async driver is installed).
+
+Reports throughput and /health latency for both; the response cache is
+disabled so every request reaches the database.
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+_TMP = tempfile.TemporaryDirectory()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_TMP.name, 'load.db')}"
+os.environ['RESPONSE_CACHE_ENABLED'] = 'false'
+
+import logging  # noqa: E402
+
+import httpx  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from backend.db import ASYNC_DATABASE_URL, SessionLocal, get_async_db  # noqa: E402
+from backend.main import app  # noqa: E402
+from backend.models.transaction import Transaction  # noqa: E402
+from backend.utils import rollups  # noqa: E402
+
+ROUTES = ['/subscriptions', '/dashboard', '/insights']
+MERCHANTS = [f"Merchant {i}" for i in range(300)]
+
+
+def _populate(rows: int, seed: int = 5):
+    rnd = random.Random(seed)
+    today = date.today()
+    db = SessionLocal()
+    for start in range(0, rows, 50_000):
+        db.execute(insert(Transaction.__table__), [
+            {
+                'date': today - timedelta(days=rnd.randrange(2 * 365)),
+                'description': f"Purchase {rnd.randrange(500)}",
+                'amount': -round(rnd.uniform(1, 300), 2),
+                'category': rnd.choice(['Groceries', 'Shopping', 'Transport', None]),
+                'merchant': rnd.choice(MERCHANTS),
+            }
+            for _ in range(min(50_000, rows - start))
+        ])
+    rollups.rebuild(db)
+    db.commit()
+    db.close()
+
+
+class InlineSession:
+    """The pre-async behaviour: sync Session calls made directly on the event loop."""
+
+    def __init__(self):
+        self.sync_session = SessionLocal()
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.sync_session, *args, **kwargs)
+
+    async def execute(self, statement, *args, **kwargs):
+        return self.sync_session.execute(statement, *args, **kwargs)
+
+    async def commit(self):
+        self.sync_session.commit()
+
+
+async def _inline_db():
+    db = InlineSession()
+    try:
+        yield db
+    finally:
+        db.sync_session.close()
+
+
+async def _run(concurrency: int, total: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://load') as client:
+        queue = asyncio.Queue()
+        for i in range(total):
+            queue.put_nowait(ROUTES[i % len(ROUTES)])
+        done = asyncio.Event()
+        health = []
+
+        async def worker():
+            while not queue.empty():
+                path = queue.get_nowait()
+                r = await client.get(path)
+                assert r.status_code == 200, (path, r.status_code)
+
+        async def probe():
+            while not done.is_set():
+                t0 = time.perf_counter()
+                await client.get('/health')
+                health.append(time.perf_counter() - t0)
+                await asyncio.sleep(0.01)
+
+        prober = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+    health.sort()
+    return {
+        'rps': total / elapsed,
+        'health_p50_ms': statistics.median(health) * 1000,
+        'health_p95_ms': health[int(len(health) * 0.95) - 1] * 1000 if len(health) > 1 else health[0] * 1000,
+        'health_max_ms': health[-1] * 1000,
+    }
+
+
+def main(rows: int = 50_000, concurrency: int = 16, total: int = 96):
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    _populate(rows)
+    print(f"rows={rows} concurrency={concurrency} requests={total} async_url={ASYNC_DATABASE_URL or 'threadpool facade'}")
+    app.dependency_overrides[get_async_db] = _inline_db
+    before = asyncio.run(_run(concurrency, total))
+    app.dependency_overrides.clear()
+    after = asyncio.run(_run(concurrency, total))
+    for name, res in (('blocking', before), ('async', after)):
+        print(f"{name:9s} {res['rps']:7.1f} req/s  /health p50 {res['health_p50_ms']:7.1f} ms  "
+              f"p95 {res['health_p95_ms']:7.1f} ms  max {res['health_max_ms']:7.1f} ms")
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:4]]
+    main(*args)
@@ -0,0 +1,89 @@
+"""Benchmark MinHash/LSH description clustering against the exact greedy loop.
+
+Usage:
+    PYTHONPATH=. python backend/scripts/bench_clustering.py [rows]
+
+First checks that both algorithms produce identical clusters on the bundled
+sample datasets for a few thresholds, then times them on a synthetic set of
+`rows` descriptions (the exact loop only on a prefix small enough to finish).
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from backend.utils.clustering import cluster_exact, cluster_token_sets, tokenize
+
+ROOT = Path(__file__).resolve().parents[2]
+SAMPLES = [
+    ROOT / 'data' / 'sample_transactions.csv',
+    ROOT / 'data' / 'sample_transactions_rich.csv',
+    ROOT / 'data' / 'sample_anomalies.csv',
+    ROOT / 'sample_data' / 'transactions_sample.csv',
+]
+THRESHOLDS = [0.3, 0.5, 0.7]
+EXACT_LIMIT = 5_000
+
+WORDS = ['coffee', 'latte', 'grocery', 'market', 'fuel', 'station', 'netflix', 'spotify', 'rent', 'uber', 'trip',
+         'pharmacy', 'cinema', 'ticket', 'amazon', 'order', 'salary', 'dining', 'pizza', 'metro', 'card', 'online']
+MERCHANTS = ['Starbucks', 'Wholefoods', 'Shell', 'Netflix', 'Landlord', 'Uber', 'CVS', 'AMC', 'Amazon', 'Employer']
+
+
+def _token_sets(path: Path) -> list:
+    df = pd.read_csv(path, comment='#')
+    merchant = df['merchant'] if 'merchant' in df.columns else pd.Series('', index=df.index)
+    return [tokenize(d, m) for d, m in zip(df['description'].fillna(''), merchant.fillna(''))]
+
+
+def _canonical(clusters):
+    return sorted(tuple(sorted(members)) for members, _ in clusters)
+
+
+def synthetic_token_sets(rows: int, seed: int = 11) -> list:
+    """Bank-like descriptions: a few thousand merchants, each with a usual wording, plus noise tokens."""
+    rnd = random.Random(seed)
+    merchants = [f"{rnd.choice(MERCHANTS)}{k}" for k in range(max(rows // 30, 10))]
+    wording = {m: rnd.sample(WORDS, 2) for m in merchants}
+    out = []
+    for _ in range(rows):
+        m = rnd.choice(merchants)
+        words = list(wording[m])
+        if rnd.random() < 0.3:
+            words.append(rnd.choice(WORDS))
+        if rnd.random() < 0.3:
+            words.append(f"ref{rnd.randrange(100_000)}")
+        out.append(tokenize(' '.join(words), m))
+    return out
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main(rows: int = 100_000):
+    for path in SAMPLES:
+        sets = _token_sets(path)
+        for threshold in THRESHOLDS:
+            exact = cluster_exact(sets, threshold, 2)
+            lsh = cluster_token_sets(sets, threshold, 2)
+            assert _canonical(exact) == _canonical(lsh), f"cluster mismatch on {path.name} @ {threshold}"
+        print(f"{path.name}: {len(sets)} rows, clusters identical for thresholds {THRESHOLDS}")
+
+    sets = synthetic_token_sets(rows)
+    prefix = sets[:EXACT_LIMIT]
+    exact, t_exact = _timed(cluster_exact, prefix, 0.5, 2)
+    lsh_prefix, _ = _timed(cluster_token_sets, prefix, 0.5, 2)
+    same = len(set(_canonical(exact)) & set(_canonical(lsh_prefix)))
+    print(f"synthetic prefix n={len(prefix)}: exact {t_exact:.3f}s, clusters {len(exact)} (lsh agrees on {same})")
+    lsh, t_lsh = _timed(cluster_token_sets, sets, 0.5, 2)
+    print(f"lsh n={rows}: {t_lsh:.3f}s ({rows / t_lsh:,.0f} rows/s), clusters {len(lsh)}")
+    est = t_exact * (rows / len(prefix)) ** 2
+    print(f"exact n={rows} (quadratic estimate): ~{est:,.0f}s")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
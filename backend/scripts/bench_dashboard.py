@@ -0,0 +1,131 @@
+"""Regression benchmark for the SQL-side /dashboard aggregation.
+
+Usage:
+    PYTHONPATH=. python backend/scripts/bench_dashboard.py [rows]
+
+Loads `rows` synthetic transactions (default 1,000,000) spread over three
+years into a throwaway SQLite database, builds the monthly rollups and merchant
+recurrence state, then times
+the dashboard computation and records its peak Python allocation with
+tracemalloc. The handler's output is checked against the original
+load-everything computation, which is only run on the same data for
+reference timing.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict, namedtuple
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from backend.db import Base
+from backend.models.transaction import Transaction
+from backend.models.transaction_indexes import TRANSACTION_INDEXES  # noqa: F401  (attach composite indexes)
+from backend.routes.dashboard import _month_range, build_dashboard
+from backend.routes.subscriptions import _subscriptions_from_rows
+from backend.utils import merchants, recurrence, rollups
+
+CATEGORIES = ['Groceries', 'Food & Drink', 'Transport', 'Subscriptions', 'Housing', 'Shopping', 'Entertainment', 'Health', None]
+MERCHANTS = [f"Merchant {i}" for i in range(400)] + ['Netflix', 'Spotify', 'Gym']
+CHUNK = 50_000
+MAX_PEAK_MB = 20  # O(categories) handler: must not grow with the row count
+
+
+def _populate(session, rows: int, seed: int = 11):
+    rnd = random.Random(seed)
+    today = date.today()
+    for start in range(0, rows, CHUNK):
+        batch = []
+        for _ in range(min(CHUNK, rows - start)):
+            income = rnd.random() < 0.05
+            batch.append({
+                'date': today - timedelta(days=rnd.randrange(3 * 365)),
+                'description': 'Salary' if income else f"Purchase {rnd.randrange(1000)}",
+                'amount': round(rnd.uniform(500, 3000), 2) if income else -round(rnd.uniform(1, 400), 2),
+                'category': 'Income' if income else rnd.choice(CATEGORIES),
+                'merchant': 'Employer' if income else rnd.choice(MERCHANTS),
+            })
+        session.execute(insert(Transaction.__table__), batch)
+    # A few recurring charges that land in the "due within 14 days" window
+    for merchant in ('Netflix', 'Spotify', 'Gym'):
+        last = today - timedelta(days=rnd.randrange(16, 31))
+        session.execute(insert(Transaction.__table__), [
+            {'date': last - timedelta(days=30 * k), 'description': f"{merchant} plan", 'amount': -12.99, 'category': 'Subscriptions', 'merchant': merchant}
+            for k in range(3)
+        ])
+    rollups.rebuild(session)
+    merchants.backfill(session)
+    recurrence.rebuild(session)
+    session.commit()
+
+
+def _legacy(session):
+    """The original handler's aggregation loop over every transaction (reference only)."""
+    today = date.today()
+    start_this, end_this = _month_range(today)
+    start_prev, end_prev = _month_range(start_this - timedelta(days=1))
+    mtd_income = mtd_spend = 0.0
+    this_by_cat, prev_by_cat = defaultdict(float), defaultdict(float)
+    expenses, negs = [], defaultdict(list)
+    rows = session.execute(select(Transaction.id, Transaction.date, Transaction.description, Transaction.amount, Transaction.category, Transaction.merchant).order_by(Transaction.id))
+    for tid, d, desc, amount, category, merchant in rows:
+        if merchant and amount < 0:
+            negs[merchant].append((d, tid, amount))
+        if start_prev <= d <= end_prev and amount < 0:
+            prev_by_cat[category or 'Uncategorized'] += -amount
+        if start_this <= d <= end_this:
+            if amount > 0:
+                mtd_income += amount
+            elif amount < 0:
+                mtd_spend += -amount
+                this_by_cat[category or 'Uncategorized'] += -amount
+                expenses.append((amount, tid))
+    charge = namedtuple('Charge', 'merchant date amount')
+    subs = _subscriptions_from_rows([charge(m, d, a) for m in sorted(negs) for d, _, a in sorted(negs[m])])['subscriptions']
+    horizon = (today + timedelta(days=14)).isoformat()
+    upcoming = [s['merchant'] for s in subs if s['estimated_next_charge'] and today.isoformat() <= s['estimated_next_charge'] <= horizon]
+    return {
+        'mtd_income': round(mtd_income, 2),
+        'mtd_spend': round(mtd_spend, 2),
+        'largest': [a for a, _ in sorted(expenses)[:5]],
+        'upcoming': sorted(upcoming),
+    }
+
+
+def main(rows: int = 1_000_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        start = time.perf_counter()
+        _populate(session, rows)
+        print(f"rows={rows} load+rollup: {time.perf_counter() - start:.1f}s")
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = build_dashboard(session)
+        t_new = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        ref = _legacy(session)
+        t_old = time.perf_counter() - start
+        session.close()
+        engine.dispose()
+
+    assert result['mtd_income'] == ref['mtd_income'] and result['mtd_spend'] == ref['mtd_spend']
+    assert [e['amount'] for e in result['largest_expenses']] == ref['largest']
+    assert sorted(u['merchant'] for u in result['upcoming_subscriptions']) == ref['upcoming']
+    print(f"full scan: {t_old:8.3f}s")
+    print(f"sql-side:  {t_new:8.3f}s  peak alloc {peak / 2**20:.1f} MiB")
+    assert peak < MAX_PEAK_MB * 2**20, f"dashboard allocated {peak / 2**20:.1f} MiB"
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
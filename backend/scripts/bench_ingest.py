@@ -0,0 +1,58 @@
+"""Benchmark columnar CSV normalization against the original per-row loop.
+
+Usage:
+    PYTHONPATH=. python backend/scripts/bench_ingest.py [rows]
+
+Generates a synthetic bank export (mixed date formats, unsigned amounts with a
+txn_type column, a sprinkling of malformed rows), runs both implementations and
+asserts they agree before reporting timings.
+"""
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from backend.utils.ingest import normalize_frame, normalize_rows
+
+MERCHANTS = ['Starbucks', 'Wholefoods', 'Netflix', 'Uber', 'Employer Inc', 'Shell', 'Amazon', 'Landlord LLC']
+DESCRIPTIONS = ['Coffee', 'Grocery run', 'Subscription', 'Ride', 'Salary', 'Fuel', 'Online purchase', 'Rent']
+FORMATS = ['%Y-%m-%d', '%Y/%m/%d', '%m/%d/%Y']
+
+
+def synthetic_frame(rows: int, seed: int = 7) -> pd.DataFrame:
+    rnd = random.Random(seed)
+    start = date(2023, 1, 1)
+    data = {'date': [], 'description': [], 'amount': [], 'merchant': [], 'txn_type': []}
+    for i in range(rows):
+        k = rnd.randrange(len(MERCHANTS))
+        d = start + timedelta(days=rnd.randrange(900))
+        data['date'].append('not-a-date' if i % 997 == 0 else d.strftime(rnd.choice(FORMATS)))
+        data['description'].append(f"{DESCRIPTIONS[k]} #{rnd.randrange(50)}")
+        data['amount'].append(str(round(rnd.uniform(1, 500), 2)) if i % 1499 else 'n/a')
+        data['merchant'].append(MERCHANTS[k])
+        data['txn_type'].append(rnd.choice(['debit', 'credit', '', 'purchase']))
+    return pd.DataFrame(data)
+
+
+def _timed(fn, df):
+    start = time.perf_counter()
+    result = fn(df, 'description')
+    return result, time.perf_counter() - start
+
+
+def main(rows: int = 200_000):
+    df = synthetic_frame(rows)
+    fast, t_fast = _timed(normalize_frame, df)
+    slow, t_slow = _timed(normalize_rows, df)
+    for key in ('records', 'skipped', 'sign_inferred', 'errors'):
+        assert fast[key] == slow[key], f"mismatch on {key}: {fast[key]} != {slow[key]}"
+    print(f"rows={rows} records={fast['records']} skipped={fast['skipped']} sign_inferred={fast['sign_inferred']}")
+    print(f"row loop:  {t_slow:8.3f}s  ({rows / t_slow:,.0f} rows/s)")
+    print(f"columnar:  {t_fast:8.3f}s  ({rows / t_fast:,.0f} rows/s)")
+    print(f"speedup:   {t_slow / t_fast:8.1f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,80 @@
+"""API cold-start benchmark: import time and first-request latency.
+
+Usage:
+    PYTHONPATH=. python backend/scripts/bench_startup.py [runs]
+
+Each run starts a fresh interpreter against a throwaway SQLite database and
+measures:
+
+* import:  `import backend.main` (routers, models, schema step)
+* client:  TestClient construction + startup
+* health:  the first GET /health
+* upload:  the first POST /upload of data/sample_transactions_rich.csv, which
+           is where pandas is imported now that it is deferred (utils/lazy.py)
+
+and which heavy modules (pandas, numpy, prophet, cmdstanpy) were already
+loaded after the import. Medians over `runs` are printed; the run fails when
+a heavy module is imported eagerly again or a median exceeds its budget
+(STARTUP_MAX_IMPORT_SECONDS, STARTUP_MAX_HEALTH_SECONDS), so CI catches
+start-up regressions.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ('pandas', 'numpy', 'prophet', 'cmdstanpy')
+MAX_IMPORT_SECONDS = float(os.getenv('STARTUP_MAX_IMPORT_SECONDS', '5') or 5)
+MAX_HEALTH_SECONDS = float(os.getenv('STARTUP_MAX_HEALTH_SECONDS', '0.5') or 0.5)
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+SAMPLE = os.path.join(ROOT, 'data', 'sample_transactions_rich.csv')
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import backend.main
+timings = {'import': time.perf_counter() - start}
+eager = [m for m in HEAVY_MODULES if m in sys.modules]
+from fastapi.testclient import TestClient
+start = time.perf_counter()
+client = TestClient(backend.main.app).__enter__()
+timings['client'] = time.perf_counter() - start
+start = time.perf_counter()
+assert client.get('/health').status_code == 200
+timings['health'] = time.perf_counter() - start
+start = time.perf_counter()
+with open(SAMPLE, 'rb') as f:
+    assert client.post('/upload', files={'file': ('rich.csv', f, 'text/csv')}).status_code == 200
+timings['upload'] = time.perf_counter() - start
+print(json.dumps({'timings': timings, 'eager': eager}))
+"""
+
+
+def run_once() -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            'PYTHONPATH': ROOT,
+            'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'startup.db')}",
+            'WARMUP_ON_STARTUP': 'false',
+        }
+        code = f"HEAVY_MODULES = {HEAVY_MODULES!r}\nSAMPLE = {SAMPLE!r}\n" + CHILD
+        out = subprocess.run([sys.executable, '-c', code], env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(runs: int = 3):
+    results = [run_once() for _ in range(runs)]
+    medians = {k: statistics.median(r['timings'][k] for r in results) for k in results[0]['timings']}
+    eager = sorted({m for r in results for m in r['eager']})
+    print(f"runs={runs} " + ' '.join(f"{k}={v * 1000:.0f}ms" for k, v in medians.items()))
+    print(f"heavy modules loaded by import: {', '.join(eager) or 'none'}")
+    assert not eager, f"imported eagerly at startup: {eager}"
+    assert medians['import'] <= MAX_IMPORT_SECONDS, f"import took {medians['import']:.2f}s (budget {MAX_IMPORT_SECONDS}s)"
+    assert medians['health'] <= MAX_HEALTH_SECONDS, f"first /health took {medians['health']:.2f}s (budget {MAX_HEALTH_SECONDS}s)"
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
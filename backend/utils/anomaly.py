@@ -0,0 +1,147 @@
+"""Vectorized expense outlier scoring for `GET /anomalies/`.
+
+Each expense is scored against a robust baseline of its own history: the
+median and MAD (median absolute deviation) of absolute amounts in the same
+merchant, falling back to the same category and then to all expenses when a
+group has fewer than `min_group_size` rows in the baseline window. The score
+is the robust z-score
+
+    (|amount| - median) / (1.4826 * MAD)
+
+where the scale is floored at `min_scale_frac` of the median so fixed-price
+charges (rent, subscriptions) with a zero MAD do not turn every cent of
+variation into an outlier.
+
+All baselines come from groupby transforms over one frame loaded with a
+single SELECT, so the cost is a few sorts over the baseline window no matter
+how many merchants or categories it holds; there is no per-row Python loop.
+"""
+from __future__ import annotations
+
+import os
+from datetime import date, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.models import merchant as _merchant_model  # noqa: F401  (attaches Transaction.merchant_id)
+from backend.models.transaction import Transaction
+from backend.utils.lazy import lazy_module
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+WINDOW_DAYS = int(os.getenv('ANOMALY_WINDOW_DAYS', '60') or 60)
+BASELINE_DAYS = int(os.getenv('ANOMALY_BASELINE_DAYS', '365') or 365)
+Z_THRESHOLD = float(os.getenv('ANOMALY_Z_THRESHOLD', '3.5') or 3.5)
+MIN_GROUP_SIZE = int(os.getenv('ANOMALY_MIN_GROUP_SIZE', '5') or 5)
+MIN_SCALE_FRAC = 0.1
+MAD_TO_SIGMA = 1.4826  # MAD of a normal distribution * 1.4826 == its standard deviation
+
+LEVELS = ('merchant', 'category', 'global')
+COLUMNS = ['id', 'date', 'description', 'amount', 'category', 'merchant', 'merchant_id']
+
+
+def load_expenses(db: Session, since: date, until: date) -> pd.DataFrame:
+    """Expenses dated in [since, until] as a frame (one query, served by ix_transactions_date_amount)."""
+    rows = db.execute(
+        select(
+            Transaction.id, Transaction.date, Transaction.description, Transaction.amount,
+            Transaction.category, Transaction.merchant, Transaction.merchant_id,
+        )
+        .where(Transaction.date >= since, Transaction.date <= until, Transaction.amount < 0)
+    ).all()
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def score_expenses(frame: pd.DataFrame, min_group_size: int = MIN_GROUP_SIZE, min_scale_frac: float = MIN_SCALE_FRAC) -> pd.DataFrame:
+    """Add baseline / scale / score / basis columns to an expense frame.
+
+    `basis` names the most specific level (merchant, category, global) with at
+    least `min_group_size` rows; rows whose group is too small at every level
+    (fewer than `min_group_size` expenses overall) get a NaN score. Merchants
+    are grouped on `merchant_id` (the canonical merchant) when the frame has
+    it, else on the raw string.
+    """
+    out = frame.copy()
+    n = len(out)
+    out['baseline'] = np.nan
+    out['scale'] = np.nan
+    out['score'] = np.nan
+    out['basis'] = None
+    if not n:
+        return out
+    x = out['amount'].abs().astype(float)
+    if 'merchant_id' in out:
+        merchant = out['merchant_id'].fillna(0).astype('int64')
+        has_merchant = merchant.ne(0)
+    else:
+        merchant = out['merchant'].fillna('').astype(str)
+        has_merchant = merchant.ne('')
+    category = out['category'].fillna('').astype(str)
+    # (group key, rows that may use it): a blank merchant/category is not a peer group
+    levels = {
+        'merchant': (merchant, has_merchant.to_numpy()),
+        'category': (category, category.ne('').to_numpy()),
+        'global': (pd.Series(0, index=out.index), np.ones(n, dtype=bool)),
+    }
+    unresolved = np.ones(n, dtype=bool)
+    for level in LEVELS:
+        key, eligible = levels[level]
+        grouped = x.groupby(key, sort=False)
+        size = grouped.transform('size').to_numpy()
+        median = grouped.transform('median').to_numpy()
+        mad = (x - median).abs().groupby(key, sort=False).transform('median').to_numpy()
+        take = unresolved & eligible & (size >= min_group_size)
+        out.loc[take, 'baseline'] = median[take]
+        out.loc[take, 'scale'] = np.maximum(MAD_TO_SIGMA * mad[take], min_scale_frac * median[take])
+        out.loc[take, 'basis'] = level
+        unresolved &= ~take
+    scale = out['scale'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = np.where(scale > 0, (x.to_numpy() - out['baseline'].to_numpy(dtype=float)) / scale, np.nan)
+    out['score'] = score
+    return out
+
+
+def detect_outliers(
+    db: Session,
+    as_of: date | None = None,
+    window_days: int = WINDOW_DAYS,
+    baseline_days: int = BASELINE_DAYS,
+    z_threshold: float = Z_THRESHOLD,
+    min_group_size: int = MIN_GROUP_SIZE,
+) -> list:
+    """Expenses from the last `window_days` (up to `as_of`) scoring >= z_threshold, highest score first.
+
+    Baselines are computed over the last `baseline_days` (at least the
+    reporting window), so a merchant's usual amount comes from its history
+    rather than only the rows being judged.
+    """
+    as_of = as_of or date.today()
+    window_start = as_of - timedelta(days=window_days)
+    frame = load_expenses(db, as_of - timedelta(days=max(baseline_days, window_days)), as_of)
+    scored = score_expenses(frame, min_group_size=min_group_size)
+    if scored.empty:
+        return []
+    hits = scored[(scored['date'] >= window_start) & (scored['score'] >= z_threshold)]
+    hits = hits.sort_values(['score', 'date', 'id'], ascending=[False, False, True])
+    thresholds = hits['baseline'] + z_threshold * hits['scale']
+    return [
+        {
+            'id': int(tid),
+            'date': d.isoformat(),
+            'description': desc,
+            'amount': float(amount),
+            'category': category,
+            'merchant': merchant,
+            'threshold': round(float(limit), 2),
+            'baseline': round(float(baseline), 2),
+            'score': round(float(score), 2),
+            'basis': basis,
+        }
+        for tid, d, desc, amount, category, merchant, limit, baseline, score, basis in zip(
+            hits['id'], hits['date'], hits['description'], hits['amount'], hits['category'], hits['merchant'],
+            thresholds, hits['baseline'], hits['score'], hits['basis'],
+        )
+    ]
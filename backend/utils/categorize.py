@@ -1,16 +1,106 @@
+"""Keyword category rules shared by /upload and /enrich.
+
+All rules are compiled into a single regex of zero-width lookaheads, one named
+group per rule in priority order. Scanning a text once with `finditer` reports,
+at every position, the highest-priority rule whose keyword starts there; the
+lowest rule index seen wins, i.e. exactly "first rule with any keyword in the
+text" without re-scanning the text once per rule. Matching is case-insensitive
+substring matching, except for the short keywords in WHOLE_WORD_KEYWORDS that
+are common inside other words ("business", "Las Vegas", "current").
+"""
+from __future__ import annotations
+
 import re
 
-KEYWORD_CATEGORIES = [
-    (re.compile(r'coffee|cafe|starbucks', re.I), 'Food & Drink'),
-    (re.compile(r'grocery|wholefoods|market', re.I), 'Groceries'),
-    (re.compile(r'spotify|music|netflix|subscription', re.I), 'Subscriptions'),
-    (re.compile(r'uber|lyft|ride', re.I), 'Transport'),
-    (re.compile(r'salary|payroll|employer', re.I), 'Income'),
+from backend.utils.lazy import lazy_module
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+
+# (label, confidence, keywords) in priority order: earlier rules win when a
+# text mentions keywords of several categories.
+CATEGORY_RULES = [
+    ('Groceries', 0.92, ('grocery', 'groceries', 'wholefoods', 'trader joe', 'kroger', 'safeway', 'market')),
+    ('Food & Drink', 0.87, ('coffee', 'starbucks', 'cafe', 'drink', 'restaurant', 'dining', 'pizza', 'chipotle', 'mcdonald', 'burger')),
+    ('Transport', 0.88, ('uber', 'lyft', 'ride', 'gas', 'shell', 'exxon', 'transport', 'bus', 'train', 'metro', 'taxi')),
+    ('Subscriptions', 0.9, ('netflix', 'spotify', 'hulu', 'disney', 'prime video', 'subscription', 'subscrip', 'monthly plan', 'music')),
+    ('Housing', 0.9, ('rent', 'mortgage', 'landlord', 'apartment')),
+    ('Health', 0.88, ('pharmacy', 'doctor', 'hospital', 'clinic', 'health', 'dental')),
+    ('Shopping', 0.86, ('amazon', 'walmart', 'target', 'store', 'mall', 'shopping')),
+    ('Entertainment', 0.85, ('cinema', 'movie', 'theater', 'entertainment', 'concert', 'ticket')),
+    ('Income', 0.95, ('salary', 'payroll', 'employer', 'bonus', 'dividend', 'interest', 'refund', 'rebate')),
 ]
+# Matched only as whole words
+WHOLE_WORD_KEYWORDS = {'bus', 'gas', 'rent', 'ride', 'store', 'mall', 'train', 'shell'}
+FALLBACK_CATEGORY = 'Other'
+FALLBACK_CONFIDENCE = 0.75
+
+# Keyword sets used by upload sign inference (see utils/ingest.py)
+INCOME_KEYWORDS = {"income","salary","payroll","deposit","interest","refund","rebate","dividend","bonus"}
+EXPENSE_KEYWORDS = {"grocery","rent","subscription","payment","purchase","expense","withdrawal","debit","fee","coffee","restaurant","transfer out","transfer-out"}
+
+
+def _keyword_regex(word: str) -> str:
+    return rf"\b{re.escape(word)}\b" if word in WHOLE_WORD_KEYWORDS else re.escape(word)
+
+
+def keyword_pattern(words) -> str:
+    """Alternation of escaped keywords, longest first so overlapping keywords match greedily."""
+    return "|".join(_keyword_regex(w) for w in sorted(set(words), key=lambda w: (-len(w), w)))
+
+
+def _compile_rules(rules):
+    groups = "|".join(f"(?P<r{i}>{keyword_pattern(words)})" for i, (_, _, words) in enumerate(rules))
+    return re.compile(f"(?=(?:{groups}))", re.I)
+
+
+_RULES_RE = _compile_rules(CATEGORY_RULES)
+
+
+def _rule_index(text: str) -> int | None:
+    best = None
+    for m in _RULES_RE.finditer(text):
+        idx = m.lastindex - 1  # only the matching rule's group participates
+        if best is None or idx < best:
+            best = idx
+            if best == 0:
+                break
+    return best
+
+
+def categorize_text(description: str, merchant: str | None = None) -> tuple[str | None, float | None]:
+    """(category, confidence) for one transaction; (None, None) when no rule matches."""
+    idx = _rule_index(f"{description} {merchant or ''}")
+    if idx is None:
+        return None, None
+    label, confidence, _ = CATEGORY_RULES[idx]
+    return label, confidence
+
 
 def simple_category(description: str, merchant: str | None = None) -> str | None:
-    text = f"{description} {merchant or ''}"
-    for pattern, label in KEYWORD_CATEGORIES:
-        if pattern.search(text):
-            return label
-    return None
+    return categorize_text(description, merchant)[0]
+
+
+def classify_series(desc: pd.Series, merchant: pd.Series | None = None) -> pd.DataFrame:
+    """Vectorized `categorize_text`: DataFrame[category, confidence] aligned to `desc`.
+
+    Each distinct description+merchant text is scanned once; unmatched rows get
+    None/NaN.
+    """
+    text = desc.astype(str) + ' '
+    if merchant is not None:
+        text = text + merchant.fillna('').astype(str)
+    codes, uniques = pd.factorize(text)
+    labels = np.full(len(uniques), None, dtype=object)
+    confidence = np.full(len(uniques), np.nan)
+    for i, val in enumerate(uniques):
+        idx = _rule_index(val)
+        if idx is not None:
+            labels[i], confidence[i], _ = CATEGORY_RULES[idx]
+    return pd.DataFrame({'category': labels[codes], 'confidence': confidence[codes]}, index=desc.index)
+
+
+def categorize_series(desc: pd.Series, merchant: pd.Series | None = None) -> pd.Series:
+    """Vectorized `simple_category`."""
+    return classify_series(desc, merchant)['category']
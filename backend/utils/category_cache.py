@@ -0,0 +1,107 @@
+"""Cache of model categorizations keyed by normalized description+merchant.
+
+Bank strings repeat with cosmetic noise ("STARBUCKS #1234", "Starbucks 0981"),
+so the key drops digits and punctuation before hashing. Lookups go through a
+bounded in-process LRU first, then the `categorization_cache` table. Entries
+are per model name and expire after ENRICH_CACHE_TTL_SECONDS; bumping
+CACHE_VERSION (e.g. when the prompt changes) invalidates every stored answer.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.db import LOOKUP_BATCH, dialect_insert
+from backend.models.categorization_cache import CategorizationCache
+
+CACHE_VERSION = 1
+TTL_SECONDS = int(os.getenv('ENRICH_CACHE_TTL_SECONDS', str(30 * 24 * 3600)) or 0)
+LRU_SIZE = int(os.getenv('ENRICH_CACHE_LRU_SIZE', '10000') or 10000)
+
+_NOISE_RE = re.compile(r"[^a-z]+")
+
+_LOCK = threading.Lock()
+_LRU: "OrderedDict[tuple[str, str], tuple[str, float | None, float]]" = OrderedDict()
+
+
+def normalize_text(description: str | None, merchant: str | None) -> str:
+    """Lowercase letters-only token string: 'STARBUCKS #1234' -> 'starbucks'."""
+    base = f"{description or ''} {merchant or ''}".lower()
+    return ' '.join(_NOISE_RE.sub(' ', base).split())
+
+
+def cache_key(description: str | None, merchant: str | None) -> str:
+    return hashlib.sha1(f"v{CACHE_VERSION}|{normalize_text(description, merchant)}".encode('utf-8')).hexdigest()
+
+
+def _fresh(stored_at: float) -> bool:
+    return TTL_SECONDS <= 0 or time.time() - stored_at < TTL_SECONDS
+
+
+def _remember(model: str, key: str, category: str, confidence, stored_at: float):
+    with _LOCK:
+        _LRU[(model, key)] = (category, confidence, stored_at)
+        _LRU.move_to_end((model, key))
+        while len(_LRU) > LRU_SIZE:
+            _LRU.popitem(last=False)
+
+
+def clear_memory():
+    with _LOCK:
+        _LRU.clear()
+
+
+def lookup(db: Session, keys: list, model: str) -> tuple[dict, dict]:
+    """Return ({key: (category, confidence)}, {"memory": n, "db": n}) for cached, unexpired keys."""
+    found, stats = {}, {"memory": 0, "db": 0}
+    missing = []
+    with _LOCK:
+        for key in dict.fromkeys(keys):
+            hit = _LRU.get((model, key))
+            if hit and _fresh(hit[2]):
+                _LRU.move_to_end((model, key))
+                found[key] = hit[:2]
+                stats["memory"] += 1
+            else:
+                missing.append(key)
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=TTL_SECONDS) if TTL_SECONDS > 0 else None
+    for offset in range(0, len(missing), LOOKUP_BATCH):
+        q = select(
+            CategorizationCache.text_hash, CategorizationCache.category,
+            CategorizationCache.confidence, CategorizationCache.created_at,
+        ).where(CategorizationCache.model == model, CategorizationCache.text_hash.in_(missing[offset:offset + LOOKUP_BATCH]))
+        for key, category, confidence, created_at in db.execute(q).all():
+            if created_at is not None and created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)  # SQLite returns naive UTC
+            if cutoff is not None and created_at is not None and created_at < cutoff:
+                continue
+            found[key] = (category, confidence)
+            stats["db"] += 1
+            _remember(model, key, category, confidence, created_at.timestamp() if created_at else time.time())
+    return found, stats
+
+
+def store(db: Session, answers: dict, model: str) -> int:
+    """Upsert {key: (category, confidence)} for `model` (caller commits)."""
+    if not answers:
+        return 0
+    now = datetime.now(timezone.utc)
+    # Replace expired / older answers for the same (text, model); ON CONFLICT keeps concurrent stores from colliding
+    stmt = dialect_insert(db, CategorizationCache.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['text_hash', 'model'],
+        set_={'category': stmt.excluded.category, 'confidence': stmt.excluded.confidence, 'created_at': stmt.excluded.created_at},
+    )
+    db.execute(stmt, [
+        {'text_hash': k, 'model': model, 'category': cat, 'confidence': conf, 'created_at': now}
+        for k, (cat, conf) in answers.items()
+    ])
+    for k, (cat, conf) in answers.items():
+        _remember(model, k, cat, conf, now.timestamp())
+    return len(answers)
@@ -0,0 +1,162 @@
+"""Persisted cluster index used to assign new transactions incrementally.
+
+`/enrich?cluster_mode=true` records every cluster it forms as a
+`ClusterIndexEntry` (label + seed token set + threshold). Later uploads and
+enrich calls match each new transaction against those centroids through a
+token -> entry inverted index, so assignment costs O(new rows x entries sharing
+a token) instead of a full recluster. Labels are reused whenever a seed matches
+an existing entry, which keeps labels (including ones set via
+`/enrich/rename_cluster`) stable across reclusters.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from collections import defaultdict
+
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from backend.models.cluster_index import ClusterIndexEntry
+from backend.models.transaction import Transaction
+from backend.models.transaction_category import TransactionCategory
+from backend.utils import rollups
+from backend.utils.clustering import jaccard, tokenize
+from backend.utils.lazy import lazy_module
+
+pd = lazy_module('pandas')
+
+INDEX_MODEL = 'cluster-index'
+
+_LOCK = threading.Lock()
+_CACHE = {"key": None, "index": None}
+
+
+class ClusterIndex:
+    def __init__(self, entries):
+        """entries: iterable of (id, label, tokens frozenset, threshold)."""
+        self.entries = sorted(entries, key=lambda e: e[0])
+        self.by_token = defaultdict(list)
+        for pos, (_, _, tokens, _) in enumerate(self.entries):
+            for tok in tokens:
+                self.by_token[tok].append(pos)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def match(self, tokens: frozenset):
+        """(entry tuple, similarity) of the best qualifying centroid, or (None, 0.0).
+
+        Ties go to the oldest entry so repeated calls give the same answer.
+        """
+        if not tokens:
+            return None, 0.0
+        best, best_sim = None, 0.0
+        for pos in sorted({p for tok in tokens for p in self.by_token.get(tok, ())}):
+            entry = self.entries[pos]
+            sim = jaccard(tokens, entry[2])
+            if sim >= entry[3] and sim > best_sim:
+                best, best_sim = entry, sim
+        return best, best_sim
+
+
+def invalidate():
+    with _LOCK:
+        _CACHE["key"] = None
+        _CACHE["index"] = None
+
+
+def load_index(db: Session) -> ClusterIndex:
+    """Return the in-process index, reloading when the table changed (count / max id / max updated_at)."""
+    key = tuple(db.execute(
+        select(func.count(ClusterIndexEntry.id), func.max(ClusterIndexEntry.id), func.max(ClusterIndexEntry.updated_at))
+    ).one())
+    with _LOCK:
+        if _CACHE["key"] == key and _CACHE["index"] is not None:
+            return _CACHE["index"]
+    rows = db.execute(
+        select(ClusterIndexEntry.id, ClusterIndexEntry.label, ClusterIndexEntry.tokens, ClusterIndexEntry.threshold)
+    ).all()
+    index = ClusterIndex((rid, label, frozenset(json.loads(tokens)), threshold) for rid, label, tokens, threshold in rows)
+    with _LOCK:
+        _CACHE["key"] = key
+        _CACHE["index"] = index
+    return index
+
+
+def _bump_sizes(db: Session, counts: dict):
+    if not counts:
+        return
+    stmt = (
+        update(ClusterIndexEntry.__table__)
+        .where(ClusterIndexEntry.__table__.c.id == bindparam('entry_id'))
+        # updated_at is left alone: it keys the in-process cache and sizes do not affect matching
+        .values(size=ClusterIndexEntry.__table__.c.size + bindparam('n'), updated_at=ClusterIndexEntry.__table__.c.updated_at)
+    )
+    db.execute(stmt, [{'entry_id': eid, 'n': n} for eid, n in counts.items()])
+
+
+def remember_clusters(db: Session, clusters: list, threshold: float) -> int:
+    """Persist (label, seed tokens, size) clusters; an identical label+tokens entry only grows. Caller commits."""
+    if not clusters:
+        return 0
+    existing = {
+        (label, tokens): rid
+        for rid, label, tokens in db.execute(select(ClusterIndexEntry.id, ClusterIndexEntry.label, ClusterIndexEntry.tokens)).all()
+    }
+    counts, added = defaultdict(int), 0
+    for label, tokens, size in clusters:
+        payload = json.dumps(sorted(tokens))
+        rid = existing.get((label, payload))
+        if rid is not None:
+            counts[rid] += size
+            continue
+        entry = ClusterIndexEntry(label=label, tokens=payload, threshold=threshold, size=size)
+        db.add(entry)
+        db.flush()
+        existing[(label, payload)] = entry.id
+        added += 1
+    _bump_sizes(db, counts)
+    invalidate()
+    return added
+
+
+def assign_new_transactions(db: Session, ids: list, frame: pd.DataFrame) -> int:
+    """Attach freshly inserted transactions to existing clusters (caller commits).
+
+    `frame` holds the inserted rows (description, merchant, category) aligned
+    with `ids`. Each match is recorded as a `cluster` TransactionCategory row;
+    rows that arrived without a category also get the cluster label promoted.
+    Returns the number of transactions assigned.
+    """
+    if not ids:
+        return 0
+    index = load_index(db)
+    if not len(index):
+        return 0
+    rows, promote, moved, counts = [], [], [], defaultdict(int)
+    for tid, d, amount, desc, merchant, category in zip(ids, frame['date'], frame['amount'], frame['description'], frame['merchant'], frame['category']):
+        entry, sim = index.match(tokenize(desc, merchant))
+        if entry is None:
+            continue
+        promoted = category is None or (isinstance(category, float) and pd.isna(category))
+        rows.append({
+            'transaction_id': tid,
+            'source': 'cluster',
+            'category': entry[1],
+            'confidence': min(0.99, max(0.3, sim)),
+            'model': INDEX_MODEL,
+            'promoted': promoted,
+            'original_category': None,
+        })
+        if promoted:
+            promote.append({'id': tid, 'category': entry[1]})
+            moved.append((d, amount, merchant, None, entry[1]))
+        counts[entry[0]] += 1
+    if rows:
+        db.execute(insert(TransactionCategory.__table__), rows)
+    if promote:
+        db.execute(update(Transaction), promote)  # ORM bulk UPDATE by primary key
+        rollups.recategorize(db, moved)
+    _bump_sizes(db, counts)
+    return len(rows)
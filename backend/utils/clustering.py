@@ -0,0 +1,205 @@
+"""Greedy Jaccard clustering of transaction descriptions for /enrich cluster_mode.
+
+`cluster_token_sets` keeps the original greedy semantics (each seed absorbs
+every still-unassigned item whose token-set Jaccard similarity to the seed is
+>= threshold) but finds those items through a MinHash/LSH candidate index
+instead of comparing the seed with everything left. Candidates are verified
+with the exact Jaccard, so LSH can only miss a pair (probability tuned below
+~0.5% at the threshold), never add one. Items with identical token sets are
+collapsed first; bank descriptions repeat heavily, so the index usually holds
+far fewer sets than there are transactions.
+
+`cluster_exact` is the original O(n^2) loop, kept as the reference for tests and
+backend/scripts/bench_clustering.py.
+"""
+from __future__ import annotations
+
+import re
+import zlib
+from collections import Counter
+
+from backend.utils.lazy import lazy_module
+
+np = lazy_module('numpy')
+
+
+STOP_TOKENS = {'the','and','for','to','a','of','in','at','on','store','inc','llc','co','payment','purchase'}
+
+NUM_PERM = 128
+TARGET_RECALL = 0.995
+_PRIME = 4294967311  # smallest prime above 2**32
+_SIGNATURE_BLOCK = 20_000
+
+
+def tokenize(description: str | None, merchant: str | None) -> frozenset:
+    base = f"{description or ''} {merchant or ''}".lower()
+    return frozenset(w for w in re.split(r"[^a-z0-9]+", base) if w and len(w) > 2 and w not in STOP_TOKENS)
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    inter = len(a & b)
+    union = len(a) + len(b) - inter
+    return inter / union if union else 0.0
+
+
+def cluster_exact(token_sets: list, threshold: float, min_size: int):
+    """Reference greedy clustering; seeds are taken in input order.
+
+    Returns [(member indexes, similarities of non-seed members)].
+    """
+    unassigned = list(range(len(token_sets)))
+    assigned = [False] * len(token_sets)
+    clusters = []
+    for seed in unassigned:
+        if assigned[seed]:
+            continue
+        assigned[seed] = True
+        seed_tokens = token_sets[seed]
+        members, sims = [seed], []
+        for other in unassigned:
+            if assigned[other]:
+                continue
+            other_tokens = token_sets[other]
+            if not seed_tokens or not other_tokens:
+                continue
+            j = jaccard(seed_tokens, other_tokens)
+            if j >= threshold:
+                assigned[other] = True
+                members.append(other)
+                sims.append(j)
+        if len(members) >= min_size:
+            clusters.append((members, sims))
+    return clusters
+
+
+def lsh_params(threshold: float, num_perm: int = NUM_PERM, target_recall: float = TARGET_RECALL):
+    """(bands, rows): the most selective banding that still catches a pair at `threshold` w.p. >= target_recall."""
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if bands < 1:
+            break
+        if 1 - (1 - threshold ** rows) ** bands >= target_recall:
+            best = (bands, rows)
+    return best
+
+
+def minhash_signatures(token_sets: list, num_perm: int = NUM_PERM, seed: int = 1) -> np.ndarray:
+    """(len(token_sets), num_perm) uint64 MinHash signatures; sets must be non-empty.
+
+    Tokens are hashed with crc32 (stable across processes) and permuted with
+    universal hashes a*x+b mod p, evaluated once per vocabulary token.
+    """
+    vocab = {}
+    token_ids = [np.fromiter((vocab.setdefault(t, len(vocab)) for t in toks), dtype=np.int64, count=len(toks)) for toks in token_sets]
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 2**31 - 1, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, 2**31 - 1, size=num_perm).astype(np.uint64)
+    token_hash = np.fromiter((zlib.crc32(t.encode('utf-8')) for t in vocab), dtype=np.uint64, count=len(vocab))
+    permuted = (token_hash[:, None] * a[None, :] + b[None, :]) % np.uint64(_PRIME)
+    signatures = np.empty((len(token_sets), num_perm), dtype=np.uint64)
+    for start in range(0, len(token_sets), _SIGNATURE_BLOCK):
+        block = token_ids[start:start + _SIGNATURE_BLOCK]
+        lengths = np.fromiter((len(ids) for ids in block), dtype=np.int64, count=len(block))
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        signatures[start:start + len(block)] = np.minimum.reduceat(permuted[np.concatenate(block)], offsets, axis=0)
+    return signatures
+
+
+def _band_index(signatures: np.ndarray, bands: int, rows: int):
+    """Per band: slots sorted by band hash, group boundaries and each slot's group.
+
+    Sort-based grouping keeps the index in flat int arrays instead of a dict of
+    bucket lists; combining a band's rows into one hash can only merge buckets,
+    which adds candidates but never hides one.
+    """
+    mult = np.random.RandomState(7).randint(1, 2**31 - 1, size=rows).astype(np.uint64) | np.uint64(1)
+    index = []
+    for band in range(bands):
+        h = (signatures[:, band * rows:(band + 1) * rows] * mult).sum(axis=1)  # wraps mod 2**64
+        members_of = np.argsort(h, kind='stable').astype(np.int32)
+        sorted_h = h[members_of]
+        starts = np.concatenate(([0], np.flatnonzero(sorted_h[1:] != sorted_h[:-1]) + 1, [len(h)])).astype(np.int32)
+        group_of = np.empty(len(h), dtype=np.int32)
+        group_of[members_of] = np.repeat(np.arange(len(starts) - 1, dtype=np.int32), np.diff(starts))
+        index.append((members_of, starts, group_of))
+    return index
+
+
+def cluster_token_sets(token_sets: list, threshold: float, min_size: int, num_perm: int = NUM_PERM):
+    """Same contract as `cluster_exact`, near-linear in the number of distinct token sets."""
+    if threshold <= 0:
+        return cluster_exact(token_sets, threshold, min_size)  # every non-empty pair qualifies; nothing to index
+    # Collapse identical token sets: they have the same similarity to any seed, so
+    # they always land in the same cluster. Empty sets never join anything.
+    groups: dict = {}
+    order = []  # first occurrence order of each distinct set (or individual empty item)
+    for i, toks in enumerate(token_sets):
+        if not toks:
+            order.append((None, [i]))
+            continue
+        if toks not in groups:
+            groups[toks] = [i]
+            order.append((toks, groups[toks]))
+        else:
+            groups[toks].append(i)
+    distinct = [toks for toks, _ in order if toks is not None]
+    slot_of = {toks: slot for slot, toks in enumerate(distinct)}
+    bands, rows = lsh_params(threshold, num_perm)
+    index = _band_index(minhash_signatures(distinct, num_perm), bands, rows) if distinct else []
+    live_buckets = {}  # (band, group) -> unassigned slots, materialized on first visit
+    assigned = [False] * len(distinct)
+    clusters = []
+    for toks, items in order:
+        if toks is None:
+            if min_size <= 1:
+                clusters.append((items, []))
+            continue
+        slot = slot_of[toks]
+        if assigned[slot]:
+            continue
+        assigned[slot] = True
+        joined = []  # (slot, similarity)
+        seen = {slot}
+        for band, (members_of, starts, group_of) in enumerate(index):
+            g = int(group_of[slot])
+            if starts[g + 1] - starts[g] == 1:
+                continue
+            key = (band, g)
+            bucket = live_buckets.get(key)
+            if bucket is None:
+                bucket = members_of[starts[g]:starts[g + 1]].tolist()
+            live = []
+            for other in bucket:
+                if assigned[other]:
+                    continue
+                live.append(other)
+                if other in seen:
+                    continue
+                seen.add(other)
+                j = jaccard(toks, distinct[other])
+                if j >= threshold:
+                    joined.append((other, j))
+            live_buckets[key] = live  # prune assigned entries so later seeds do not rescan them
+        for other, _ in joined:
+            assigned[other] = True
+        # Members in input order, as the reference loop would append them
+        members_sims = [(i, None) for i in items[1:]]
+        for other, j in joined:
+            members_sims.extend((i, j) for i in groups[distinct[other]])
+        members_sims.sort()
+        members = [items[0]] + [i for i, _ in members_sims]
+        sims = [1.0 if j is None else j for _, j in members_sims]
+        if len(members) >= min_size:
+            clusters.append((members, sims))
+    return clusters
+
+
+def cluster_label(token_sets: list, members: list, max_tokens: int) -> str:
+    """'Cluster: ' + the most frequent member tokens (ties broken alphabetically)."""
+    freq = Counter()
+    for m in members:
+        freq.update(token_sets[m])
+    ranked = sorted(freq.items(), key=lambda kv: (-kv[1], kv[0]))
+    top_tokens = [tok for tok, _ in ranked[:max_tokens]] or ['misc']
+    return 'Cluster: ' + '_'.join(top_tokens)
@@ -0,0 +1,31 @@
+"""Monotonic dataset version used to key cached analytics responses.
+
+The counter lives in `schema_meta` under DATASET_VERSION_KEY so every worker
+process sees the same value, and it is bumped inside the writing transaction:
+a rolled-back write leaves the version (and every cached response) intact.
+Transaction changes bump it through the rollup choke point
+(utils/rollups.py); other inputs to the cached endpoints (e.g. the
+MONTHLY_BUDGET setting) call `bump` directly.
+"""
+import time
+
+from sqlalchemy import BigInteger, String, cast, select
+from backend.db import connection_for, dialect_insert
+from backend.models.schema_meta import SchemaMeta
+
+DATASET_VERSION_KEY = 'dataset_version'
+_T = SchemaMeta.__table__
+
+
+def bump(db) -> None:
+    # One upsert, so two writers bumping a fresh database do not both insert the row. A missing
+    # row is seeded from the clock so a recreated database never reissues an earlier version number
+    stmt = dialect_insert(db, _T).values(key=DATASET_VERSION_KEY, value=str(time.time_ns() // 1_000_000))
+    connection_for(db).execute(stmt.on_conflict_do_update(
+        index_elements=['key'], set_={'value': cast(cast(_T.c.value, BigInteger) + 1, String)},
+    ))
+
+
+def current(db) -> int:
+    value = connection_for(db).execute(select(_T.c.value).where(_T.c.key == DATASET_VERSION_KEY)).scalar()
+    return int(value) if value else 0
@@ -0,0 +1,62 @@
+"""Prometheus instrumentation for SQLAlchemy connection pools.
+
+`TimedQueuePool` / `TimedAsyncQueuePool` time how long each checkout waited
+for a free connection; `instrument_engine` adds checkout counters and
+scrape-time gauges (pool size, connections in use, overflow) labelled by
+engine name ("sync" / "async"). A rising wait histogram while an upload runs
+means ingestion is starving the read endpoints of connections.
+"""
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+POOL_CHECKOUTS = Counter('db_pool_checkouts_total', 'Connections checked out of the pool', ['engine'])
+POOL_CHECKOUT_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled connection', ['engine'],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+POOL_SIZE = Gauge('db_pool_size', 'Configured pool size', ['engine'])
+POOL_CHECKED_OUT = Gauge('db_pool_checked_out', 'Connections currently in use', ['engine'])
+POOL_OVERFLOW = Gauge('db_pool_overflow', 'Connections open beyond pool_size', ['engine'])
+
+
+class _TimedGet:
+    metrics_label = 'sync'
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.labels(self.metrics_label).observe(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics_label = self.metrics_label
+        return pool
+
+
+class TimedQueuePool(_TimedGet, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedGet, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine, label: str):
+    """Attach checkout metrics to a (sync) Engine; pass async_engine.sync_engine for async engines."""
+    pool = engine.pool
+    if isinstance(pool, _TimedGet):
+        pool.metrics_label = label
+
+    @event.listens_for(engine, 'checkout')
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_CHECKOUTS.labels(label).inc()
+
+    # Read the live pool at scrape time (engine.pool may be replaced by dispose())
+    # QueuePool.overflow() counts down from -pool_size until the pool is exhausted, so clamp at 0
+    for gauge, attr in ((POOL_SIZE, 'size'), (POOL_CHECKED_OUT, 'checkedout'), (POOL_OVERFLOW, 'overflow')):
+        gauge.labels(label).set_function(lambda attr=attr: max(0.0, float(getattr(engine.pool, attr, lambda: 0)())))
@@ -0,0 +1,116 @@
+"""Set-based duplicate charge detection and removal for the anomalies routes.
+
+Two expenses are duplicates when they share (date, rounded absolute amount,
+canonical merchant, category); blank and NULL merchant/category compare equal,
+and spelling variants of one merchant ("NETFLIX *2341", "Netflix") share their
+`merchant_id`. Both discovery and dedupe validation annotate rows with window
+functions over that key, so a whole report or a dedupe request of any size
+costs a fixed number of statements, and the delete itself is a single
+`DELETE ... WHERE id IN`.
+"""
+from datetime import date
+from itertools import groupby
+
+from sqlalchemy import Numeric, case, cast, delete, func, select, update
+from sqlalchemy.orm import Session
+
+from backend.models.merchant import Merchant
+from backend.models.transaction import Transaction
+from backend.models.transaction_fingerprint import TransactionFingerprint
+from backend.utils import recurrence, rollups
+
+_T = Transaction.__table__
+
+
+def _key_columns():
+    return (
+        _T.c.date,
+        func.round(cast(func.abs(_T.c.amount), Numeric(asdecimal=False)), 2),
+        func.coalesce(_T.c.merchant_id, 0),
+        func.coalesce(_T.c.category, ''),
+    )
+
+
+def find_groups(db: Session, since: date, until: date) -> list:
+    """Duplicate expense groups dated in [since, until], members ordered by id.
+
+    One query: a window COUNT over the duplicate key keeps only rows whose
+    group has more than one member (served by ix_transactions_dupe_key).
+    """
+    key = _key_columns()
+    annotated = select(
+        _T.c.id, _T.c.date, _T.c.description, _T.c.amount, _T.c.category, _T.c.merchant,
+        key[1].label('abs_amount'), key[2].label('merchant_key'), key[3].label('category_key'),
+        func.count().over(partition_by=key).label('group_size'),
+    ).where(_T.c.date >= since, _T.c.date <= until, _T.c.amount < 0).subquery()
+    rows = db.execute(
+        select(annotated, func.coalesce(Merchant.name, '').label('merchant_name'))
+        .outerjoin(Merchant, Merchant.id == annotated.c.merchant_key)
+        .where(annotated.c.group_size > 1)
+        .order_by(annotated.c.date, annotated.c.abs_amount, annotated.c.merchant_key, annotated.c.category_key, annotated.c.id)
+    ).all()
+    groups = []
+    for (d, abs_amount, _, merchant, category), members in groupby(
+        rows, key=lambda r: (r.date, r.abs_amount, r.merchant_key, r.merchant_name, r.category_key)
+    ):
+        members = list(members)
+        groups.append({
+            'date': d.isoformat(),
+            'amount': -float(abs_amount),
+            'merchant': merchant,
+            'category': category,
+            'count': len(members),
+            'transactions': [
+                {
+                    'id': m.id,
+                    'description': m.description,
+                    'amount': m.amount,
+                    'category': m.category,
+                    'merchant': m.merchant,
+                    'date': m.date.isoformat(),
+                } for m in members
+            ],
+        })
+    return groups
+
+
+def annotate_selection(db: Session, ids: list) -> list:
+    """Per selected expense: its group size, how many of its group are selected, and the group's earliest id.
+
+    Partitions are computed over every expense on the selected rows' dates, so
+    unselected group members still count towards the group size.
+    """
+    key = _key_columns()
+    selected = _T.c.id.in_(ids)
+    annotated = select(
+        _T.c.id, _T.c.date, _T.c.amount, _T.c.category, _T.c.merchant, _T.c.merchant_id,
+        key[1].label('abs_amount'),
+        func.count().over(partition_by=key).label('group_size'),
+        func.sum(case((selected, 1), else_=0)).over(partition_by=key).label('selected_in_group'),
+        func.min(_T.c.id).over(partition_by=key).label('earliest_id'),
+    ).where(
+        _T.c.amount < 0,
+        _T.c.date.in_(select(_T.c.date).where(selected).distinct().scalar_subquery()),
+    ).subquery()
+    return db.execute(select(annotated).where(annotated.c.id.in_(ids)).order_by(annotated.c.id)).all()
+
+
+def delete_transactions(db: Session, rows) -> list:
+    """Bulk-delete transactions given (id, date, amount, category, merchant, merchant_id) rows; caller commits.
+
+    A Core DELETE bypasses the session flush hooks, so the rollup deltas are
+    applied explicitly (which also bumps the dataset version) and the affected
+    merchants' recurrence state is recomputed. Fingerprints are kept as
+    tombstones so re-uploading the same export does not restore removed
+    duplicates.
+    """
+    rows = list(rows)
+    ids = [r.id for r in rows]
+    if not ids:
+        return []
+    fp = TransactionFingerprint.__table__
+    db.execute(update(fp).where(fp.c.transaction_id.in_(ids)).values(transaction_id=None))
+    db.execute(delete(_T).where(_T.c.id.in_(ids)))
+    rollups.apply_rows(db, ((r.date, r.amount, r.category, r.merchant) for r in rows), direction=-1)
+    recurrence.refresh(db, {r.merchant_id for r in rows})
+    return ids
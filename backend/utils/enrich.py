@@ -4,12 +4,21 @@ This module provides a non-blocking style enrichment function that can be
 triggered after upload to categorize transactions that lack a category or
 were tagged as None by the heuristic.
 """
+import asyncio
+import json
+import os
+import time
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import insert
 from backend.models.transaction import Transaction
 from backend.models.transaction_category import TransactionCategory
 from backend.utils.logging import logger
+from backend.utils import category_cache
+
+DEFAULT_CONCURRENCY = int(os.getenv('ENRICH_MODEL_CONCURRENCY', '4') or 4)
+DEFAULT_BATCH_SIZE = int(os.getenv('ENRICH_BATCH_SIZE', '20') or 20)
+BATCH_MARKER = "Transactions (JSON): "
 
 ALLOWED_CATEGORIES = [
     'Income','Groceries','Food & Drink','Transport','Subscriptions','Housing','Shopping','Entertainment','Health','Other'
@@ -23,27 +32,60 @@ def build_prompt(description: str, merchant: str|None) -> str:
         f"Description: {description}\nMerchant: {merchant or ''}"
     )
 
-def _ensure_category_table_columns(db: Session):
-    """Ensure newly added columns exist for backward compatibility (online SQLite migrations)."""
-    try:
-        rows = db.execute(text("PRAGMA table_info(transaction_categories)")).fetchall()
-        existing = {r[1] for r in rows}
-        altered = False
-        if 'promoted' not in existing:
-            db.execute(text("ALTER TABLE transaction_categories ADD COLUMN promoted BOOLEAN DEFAULT 0"))
-            altered = True
-        if 'original_category' not in existing:
-            db.execute(text("ALTER TABLE transaction_categories ADD COLUMN original_category VARCHAR NULL"))
-            altered = True
-        if altered:
-            db.commit()
-            logger.info("enrich_runtime_migration_applied", columns_added=[c for c in ['promoted','original_category'] if c not in existing])
-    except Exception as e:
-        logger.warning("enrich_runtime_migration_failed", error=str(e))
+def build_batch_prompt(items: list) -> str:
+    """Prompt for several transactions at once; items are (description, merchant) pairs."""
+    payload = [{"index": i, "description": d, "merchant": m or ''} for i, (d, m) in enumerate(items)]
+    return (
+        "You are a financial transaction categorizer. For EACH transaction below, "
+        "choose ONE best-fit category from this list: " + ", ".join(ALLOWED_CATEGORIES) + ".\n"
+        "Return ONLY a raw JSON array with one object per transaction and keys index, category, confidence (0-1).\n"
+        f"{BATCH_MARKER}{json.dumps(payload)}"
+    )
+
+
+def parse_batch_response(resp, expected: int) -> list:
+    """Map a JSON-array reply (string or already-decoded list) to `expected` result slots.
+
+    Entries are placed by their `index` key when present, else positionally;
+    missing or malformed entries stay None so the caller can skip them.
+    """
+    if isinstance(resp, str):
+        start, end = resp.find('['), resp.rfind(']')
+        if start < 0 or end < start:
+            raise ValueError("batch response is not a JSON array")
+        resp = json.loads(resp[start:end + 1])
+    if not isinstance(resp, list):
+        raise ValueError("batch response is not a JSON array")
+    out = [None] * expected
+    for pos, item in enumerate(resp):
+        if not isinstance(item, dict):
+            continue
+        idx = item.get('index', pos)
+        if isinstance(idx, int) and 0 <= idx < expected:
+            out[idx] = item
+    return out
+
+
+async def _categorize_one(model_client, t: Transaction, model_name: str, sem: asyncio.Semaphore):
+    async with sem:
+        try:
+            return await model_client.categorize(build_prompt(t.description, t.merchant), model=model_name)
+        except (ValueError, KeyError, AttributeError, TypeError):
+            return None  # swallow individual transaction errors
+
+
+async def _categorize_chunk(model_client, chunk: list, model_name: str, sem: asyncio.Semaphore):
+    async with sem:
         try:
-            db.rollback()
-        except Exception:
-            pass
+            resp = await model_client.categorize_batch(
+                build_batch_prompt([(t.description, t.merchant) for t in chunk]), model=model_name
+            )
+            return parse_batch_response(resp, len(chunk))
+        except (ValueError, KeyError, AttributeError, TypeError) as e:
+            logger.warning("enrich_batch_failed", size=len(chunk), error=str(e))
+    # Unusable batch reply: fall back to one prompt per transaction for this chunk
+    return await asyncio.gather(*(_categorize_one(model_client, t, model_name, sem) for t in chunk))
+
 
 async def categorize_with_model(
     db: Session,
@@ -54,59 +96,115 @@ async def categorize_with_model(
     promotion_min_confidence: float = 0.8,
     overwrite_existing: bool = False,
     allowed_categories: Optional[List[str]] = None,
+    concurrency: int = 1,
+    batch_size: int = 1,
+    use_cache: bool = True,
 ):
     """Categorize a list of transactions using provided model_client.
 
     Parameters:
       db: SQLAlchemy session
       model_client: object with async categorize(prompt:str, model:str) -> {category:str, confidence:float}
+        and optionally async categorize_batch(prompt:str, model:str) -> JSON array (str or list)
       txns: list of Transaction objects to categorize
       model_name: identifier for the model stored in TransactionCategory.model
       promote: if True, optionally writes back to Transaction.category when criteria met
       promotion_min_confidence: minimum confidence required for promotion
       overwrite_existing: if True, will overwrite a non-empty Transaction.category (default False)
       allowed_categories: optional override list; falls back to ALLOWED_CATEGORIES
+      concurrency: maximum model requests in flight (asyncio.Semaphore)
+      batch_size: transactions per prompt when the client supports categorize_batch
+      use_cache: answer repeat descriptions from the categorization cache (utils/category_cache)
+        and send only one prompt per distinct uncached text
 
     Promotion Rules:
       - category in allowed list
       - confidence >= promotion_min_confidence
       - (overwrite_existing or transaction.category is None/empty)
     """
-    # Ensure schema compatibility (promoted & original_category columns added after early deployments)
-    _ensure_category_table_columns(db)
     processed_ids = []
     promoted_ids = []
     allowed = set(allowed_categories or ALLOWED_CATEGORIES)
-    for t in txns:
-        prompt = build_prompt(t.description, t.merchant)
+    sem = asyncio.Semaphore(max(1, int(concurrency)))
+    start = time.perf_counter()
+    keys = [category_cache.cache_key(t.description, t.merchant) for t in txns] if use_cache else list(range(len(txns)))
+    cached, cache_stats = category_cache.lookup(db, keys, model_name) if use_cache else ({}, {"memory": 0, "db": 0})
+    to_ask = {}  # one representative transaction per distinct uncached key
+    for key, t in zip(keys, txns):
+        if key not in cached and key not in to_ask:
+            to_ask[key] = t
+    pending = list(to_ask.values())
+    if not pending:
+        responses = []
+    elif batch_size > 1 and hasattr(model_client, 'categorize_batch'):
+        chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        replies = await asyncio.gather(*(_categorize_chunk(model_client, c, model_name, sem) for c in chunks))
+        responses = [r for chunk_replies in replies for r in chunk_replies]
+    else:
+        responses = await asyncio.gather(*(_categorize_one(model_client, t, model_name, sem) for t in pending))
+    answers = {
+        key: {'category': cat, 'confidence': conf} for key, (cat, conf) in cached.items()
+    }
+    fresh = {}
+    for key, resp in zip(to_ask, responses):
+        answers[key] = resp
+        try:
+            if resp and resp.get('category') in allowed:
+                conf = resp.get('confidence')
+                fresh[key] = (resp['category'], float(conf) if conf is not None else None)
+        except (ValueError, TypeError, AttributeError):
+            continue
+    if use_cache and fresh:
+        category_cache.store(db, fresh, model_name)
+    history = []
+    for key, t in zip(keys, txns):
+        resp = answers.get(key)
         try:
-            resp = await model_client.categorize(prompt, model=model_name)
+            if not resp:
+                continue
             cat = resp.get('category')
             conf = resp.get('confidence')
+            if conf is not None:
+                conf = float(conf)
             if not cat or cat not in allowed:
                 continue
+            current = getattr(t, 'category', None)
             promoted_flag = False
             if promote and conf is not None:
-                current = getattr(t, 'category', None)
                 if (overwrite_existing or not current) and conf >= promotion_min_confidence:
                     t.category = cat
                     promoted_flag = True
-            else:
-                current = getattr(t, 'category', None)
-            db.add(TransactionCategory(
-                transaction_id=t.id,
-                source='model',
-                category=cat,
-                confidence=conf,
-                model=model_name,
-                promoted=promoted_flag,
-                original_category=current if promoted_flag else None,
-            ))
+            history.append({
+                'transaction_id': t.id,
+                'source': 'model',
+                'category': cat,
+                'confidence': conf,
+                'model': model_name,
+                'promoted': promoted_flag,
+                'original_category': current if promoted_flag else None,
+            })
             processed_ids.append(t.id)
             if promoted_flag:
                 promoted_ids.append(t.id)
         except (ValueError, KeyError, AttributeError, TypeError):
             # swallow individual transaction errors
             continue
+    if history:
+        db.execute(insert(TransactionCategory.__table__), history)
     db.commit()
-    return {"processed_ids": processed_ids, "promoted_ids": promoted_ids}
\ No newline at end of file
+    hits = sum(1 for key in keys if key in cached)
+    cache_report = {
+        "hits": hits,
+        "misses": len(txns) - hits,
+        "hit_ratio": round(hits / len(txns), 4) if txns else None,
+        "memory_hits": cache_stats["memory"],
+        "db_hits": cache_stats["db"],
+        "sent_to_model": len(pending),  # distinct uncached texts
+        "stored": len(fresh) if use_cache else 0,
+    }
+    logger.info(
+        "model_enrichment_complete", candidates=len(txns), processed=len(processed_ids),
+        concurrency=concurrency, batch_size=batch_size, seconds=round(time.perf_counter() - start, 3),
+        cache_hit_ratio=cache_report["hit_ratio"], sent_to_model=len(pending),
+    )
+    return {"processed_ids": processed_ids, "promoted_ids": promoted_ids, "cache": cache_report}
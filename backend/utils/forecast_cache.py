@@ -0,0 +1,164 @@
+"""Fitted forecast cache with background refits for `GET /forecast`.
+
+Forecasts are cached per (horizon, method) together with the data version
+they were fitted on: the dataset version (utils/dataset_version.py) plus
+today's date, since the fallback averages the last 30 days. A request whose
+version matches the cached entry is answered from memory. When the data has
+moved on, the last forecast is returned immediately (stale-while-revalidate)
+and a refit is queued; only a (horizon, method) that was never fitted makes
+the request wait. Concurrent requests for the same key share one refit.
+
+Fits run in a process pool (FORECAST_WORKERS, 0 = a thread in this process)
+so Prophet's CPU time neither blocks the event loop nor competes with request
+threads for the GIL. Workers are started by a forkserver, not forked from the
+multi-threaded server, so they never inherit a lock another thread held. Each refit starts from the previous fit's parameters
+(utils/forecasting.py) and its duration is exported as
+`forecast_fit_seconds`.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime, timezone
+
+from prometheus_client import Counter, Histogram
+
+from backend.utils import forecasting
+from backend.utils.logging import logger
+
+WORKERS = int(os.getenv('FORECAST_WORKERS', '1') or 0)
+CACHE_SIZE = int(os.getenv('FORECAST_CACHE_SIZE', '32') or 32)
+
+FIT_SECONDS = Histogram(
+    'forecast_fit_seconds', 'Forecast fit + predict time', ['method'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+REQUESTS = Counter('forecast_cache_requests_total', 'Forecast requests by cache outcome', ['outcome'])
+
+_LOCK = threading.Lock()
+_ENTRIES: "OrderedDict[tuple, dict]" = OrderedDict()  # (horizon, method) -> entry
+_INFLIGHT: dict = {}  # (horizon, method) -> (version, Future)
+_WARM: dict = {}  # method -> fitted prophet params for the next refit
+_STATE = {"executor": None}
+
+
+def data_version(dataset_version: int, today: date | None = None) -> tuple:
+    return (dataset_version, (today or date.today()).isoformat())
+
+
+def _executor():
+    with _LOCK:
+        if _STATE["executor"] is None:
+            if WORKERS > 0:
+                _STATE["executor"] = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context('forkserver'))
+            else:
+                _STATE["executor"] = ThreadPoolExecutor(max_workers=1, thread_name_prefix='forecast-fit')
+        return _STATE["executor"]
+
+
+def prime():
+    """Start the worker pool and import the fitting stack in it (utils/warmup.py)."""
+    return _executor().submit(forecasting.warm_up)
+
+
+def lookup(key: tuple, version: tuple):
+    """(entry, outcome): outcome is 'hit' for the current version, 'stale' for an older one, 'miss' when never fitted."""
+    with _LOCK:
+        entry = _ENTRIES.get(key)
+        if entry is None:
+            return None, 'miss'
+        _ENTRIES.move_to_end(key)
+        return entry, 'hit' if entry['version'] == version else 'stale'
+
+
+def refreshing(key: tuple, version: tuple | None = None) -> bool:
+    """Whether a refit of `key` is queued or running (one covering `version`, when given)."""
+    with _LOCK:
+        inflight = _INFLIGHT.get(key)
+        return inflight is not None and (version is None or inflight[0] >= version)
+
+
+def _store(key: tuple, version: tuple, observations: int, future):
+    method = key[1]
+    with _LOCK:
+        if _INFLIGHT.get(key, (None, None))[1] is future:
+            del _INFLIGHT[key]
+    try:
+        fit = future.result()
+    except Exception as e:  # noqa: BLE001 - keep serving the previous forecast
+        if isinstance(e, BrokenExecutor):  # a worker died; start a fresh pool on the next refit
+            with _LOCK:
+                _STATE["executor"] = None
+        logger.warning("forecast_refit_failed", horizon_days=key[0], method=method, error=str(e))
+        return
+    FIT_SECONDS.labels(fit['result'].get('forecast_method') or method).observe(fit['fit_seconds'])
+    entry = {
+        "version": version,
+        "result": fit['result'],
+        "fit_seconds": fit['fit_seconds'],
+        "warm_start": fit['warm_start'],
+        "observations": observations,
+        "fitted_at": datetime.now(timezone.utc),
+    }
+    with _LOCK:
+        if fit['warm'] is not None:
+            _WARM[method] = fit['warm']
+        current = _ENTRIES.get(key)
+        if current is None or current['version'] <= version:
+            _ENTRIES[key] = entry
+            _ENTRIES.move_to_end(key)
+        while len(_ENTRIES) > CACHE_SIZE:
+            _ENTRIES.popitem(last=False)
+    logger.info("forecast_fitted", horizon_days=key[0], method=method, dataset_version=version[0],
+                fit_seconds=round(fit['fit_seconds'], 4), warm_start=fit['warm_start'], observations=observations)
+
+
+def refit(key: tuple, version: tuple, rows: list):
+    """Queue a fit of `rows` for `key` (or join the one already running for this version); returns its Future."""
+    horizon_days, method = key
+    with _LOCK:
+        inflight = _INFLIGHT.get(key)
+        if inflight is not None and inflight[0] >= version:
+            return inflight[1]
+        warm = _WARM.get(method)
+    today = date.fromisoformat(version[1])
+    future = _executor().submit(forecasting.fit_forecast, rows, method, horizon_days, warm, today)
+    with _LOCK:
+        _INFLIGHT[key] = (version, future)
+    future.add_done_callback(lambda f: _store(key, version, len(rows), f))
+    return future
+
+
+async def wait(future) -> None:
+    await asyncio.wrap_future(future)
+
+
+def response(entry: dict, outcome: str, key: tuple) -> dict:
+    """The cached body plus `fit_metrics` describing the fit it came from."""
+    REQUESTS.labels(outcome).inc()
+    return {
+        **entry['result'],
+        "fit_metrics": {
+            "cache": outcome,
+            "refreshing": refreshing(key),
+            "dataset_version": entry['version'][0],
+            "fitted_at": entry['fitted_at'].isoformat(),
+            "age_seconds": round((datetime.now(timezone.utc) - entry['fitted_at']).total_seconds(), 3),
+            "fit_seconds": round(entry['fit_seconds'], 4),
+            "warm_start": entry['warm_start'],
+            "observations": entry['observations'],
+        },
+    }
+
+
+def clear():
+    with _LOCK:
+        _ENTRIES.clear()
+        _WARM.clear()
+
+
+def stats() -> dict:
+    with _LOCK:
+        return {"entries": len(_ENTRIES), "inflight": len(_INFLIGHT), "workers": WORKERS}
@@ -0,0 +1,192 @@
+"""Spend forecast fitting for `GET /forecast`.
+
+`fit_forecast` is a pure function of its arguments (expense rows in, response
+dict out) so it can run in a worker process (utils/forecast_cache.py). It
+also returns the fitted Prophet parameters; passing them back as `warm` on
+the next refit initializes the optimizer at the previous optimum, which
+converges in far fewer iterations when only a few days of data were added.
+
+Methods, from heaviest to lightest: `prophet`, `ets` (NumPy Holt-Winters
+with weekly seasonality and closed-form bands, utils/ets.py) and `simple`
+(flat average of the last 30 days). `auto` takes the first one the data and
+installed libraries allow.
+"""
+from __future__ import annotations
+
+import importlib
+import time
+from datetime import date, datetime, timedelta
+
+from backend.utils import ets
+from backend.utils.lazy import lazy_module
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+MIN_PROPHET_DAYS = 25  # need a minimum number of daily points
+MIN_ETS_DAYS = 2 * ets.SEASON  # two full weeks to initialise the weekly seasonals
+_PROPHET: dict = {}  # {"cls": Prophet or None} once the import has been tried
+
+
+def prophet_class():
+    """Prophet, imported on first use (it drags in cmdstanpy and plotting libraries); None when not installed."""
+    if "cls" not in _PROPHET:
+        try:
+            from prophet import Prophet  # type: ignore
+            _PROPHET["cls"] = Prophet
+        except Exception:  # pragma: no cover
+            _PROPHET["cls"] = None
+    return _PROPHET["cls"]
+
+
+def prophet_available() -> bool:
+    return prophet_class() is not None
+
+
+def warm_up() -> bool:
+    """Import pandas / NumPy / Prophet in this process (run in forecast workers by utils/warmup.py)."""
+    for name in ('numpy', 'pandas'):
+        importlib.import_module(name)
+    return prophet_available()
+
+
+def _warm_params(m) -> dict:
+    """Fitted parameters in the shape Prophet.fit(init=...) expects (see Prophet's warm-start docs)."""
+    params = {name: float(m.params[name][0][0]) for name in ('k', 'm', 'sigma_obs')}
+    for name in ('delta', 'beta'):
+        params[name] = m.params[name][0].tolist()
+    return params
+
+
+def _fit_prophet(df: pd.DataFrame, warm: dict | None):
+    """(model, warm_started); a warm start whose shape no longer fits (e.g. changepoint count) falls back to a cold fit."""
+    Prophet = prophet_class()
+    if warm:
+        m = Prophet(daily_seasonality=True, weekly_seasonality=True, yearly_seasonality=False)
+        try:
+            m.fit(df, init=warm)
+            return m, True
+        except Exception:  # noqa: BLE001 - any warm-start failure is retried cold
+            pass
+    m = Prophet(daily_seasonality=True, weekly_seasonality=True, yearly_seasonality=False)
+    m.fit(df)
+    return m, False
+
+
+def _ets_result(df: pd.DataFrame, horizon_days: int) -> dict:
+    """Holt-Winters on the gap-free daily series (days without expenses count as zero spend)."""
+    daily = df.set_index('ds')['y'].asfreq('D', fill_value=0.0)
+    model = ets.fit(daily.to_numpy())
+    mean, lower, upper = ets.forecast(model, horizon_days)
+    mean, lower, upper = np.maximum(mean, 0.0), np.maximum(lower, 0.0), np.maximum(upper, 0.0)  # spend is never negative
+    dates = pd.date_range(daily.index[-1] + pd.Timedelta(days=1), periods=horizon_days, freq='D')
+    return {
+        "next_30d_spend": round(float(mean[:30].sum()), 2),
+        "next_60d_spend": round(float(mean[:60].sum()), 2),
+        "next_90d_spend": round(float(mean[:90].sum()), 2),
+        "daily_forecast": [
+            {"date": d.date().isoformat(), "predicted_spend": round(float(p), 2), "lower": round(float(lo), 2), "upper": round(float(hi), 2)}
+            for d, p, lo, hi in zip(dates, mean, lower, upper)
+        ],
+    }
+
+
+def fit_forecast(rows, method: str, horizon_days: int, warm: dict | None = None, today: date | None = None) -> dict:
+    """Forecast from (date, amount) expense rows.
+
+    Returns {"result": response body, "warm": prophet params or None,
+    "fit_seconds": float, "warm_start": bool}.
+    """
+    start = time.perf_counter()
+    df = pd.DataFrame({
+        "ds": pd.to_datetime([d for d, _ in rows]),
+        "y": [float(-amount) for _, amount in rows],  # positive spend value
+    })
+    # Aggregate duplicates per day
+    df = df.groupby('ds', as_index=False)['y'].sum().sort_values('ds')
+
+    # Compute simple metrics for fallback & annual projection
+    today = today or datetime.utcnow().date()
+    last_30_cutoff = today - timedelta(days=30)
+    last_30 = df[df['ds'].dt.date > last_30_cutoff]
+    avg_daily_last_30 = last_30['y'].mean() if not last_30.empty else df['y'].mean()
+    simple_annual_projection = (avg_daily_last_30 or 0) * 365
+
+    use_prophet = False
+    reason = ""
+    if method in ("auto", "prophet"):
+        if not prophet_available():
+            reason = "prophet_not_installed"
+        elif len(df) < MIN_PROPHET_DAYS:
+            reason = "insufficient_history"
+        else:
+            use_prophet = True
+
+    if use_prophet:
+        try:
+            m, warm_started = _fit_prophet(df, warm)
+            future = m.make_future_dataframe(periods=horizon_days)
+            fc = m.predict(future)
+            # Keep only future (and maybe recent past for context)
+            fc_future = fc[fc['ds'] > df['ds'].max()].copy()
+            # Summaries
+            next_30_end = df['ds'].max() + pd.Timedelta(days=30)
+            next_60_end = df['ds'].max() + pd.Timedelta(days=60)
+            next_90_end = df['ds'].max() + pd.Timedelta(days=90)
+            def window_sum(end):
+                return float(fc_future[fc_future['ds'] <= end]['yhat'].sum())
+            result = {
+                "forecast_method": "prophet",
+                "reason": reason or None,
+                "horizon_days": horizon_days,
+                "annual_spend_projection": simple_annual_projection,  # keep legacy style (heuristic)
+                "next_30d_spend": round(window_sum(next_30_end),2),
+                "next_60d_spend": round(window_sum(next_60_end),2),
+                "next_90d_spend": round(window_sum(next_90_end),2),
+                "daily_forecast": [
+                    {
+                        "date": r.ds.date().isoformat(),
+                        "predicted_spend": round(float(r.yhat), 2),
+                        "lower": round(float(r.yhat_lower), 2),
+                        "upper": round(float(r.yhat_upper), 2)
+                    }
+                    for _, r in fc_future.head(horizon_days).iterrows()
+                ]
+            }
+            return {"result": result, "warm": _warm_params(m), "fit_seconds": time.perf_counter() - start, "warm_start": warm_started}
+        except Exception as e:  # fallback silently
+            reason = f"prophet_error:{type(e).__name__}"  # pragma: no cover
+
+    if method in ("auto", "ets"):
+        span_days = (df['ds'].max() - df['ds'].min()).days + 1
+        if span_days >= MIN_ETS_DAYS:
+            result = {
+                "forecast_method": "ets",
+                "reason": reason or None,
+                "horizon_days": horizon_days,
+                "annual_spend_projection": simple_annual_projection,
+                **_ets_result(df, horizon_days),
+            }
+            return {"result": result, "warm": None, "fit_seconds": time.perf_counter() - start, "warm_start": False}
+        reason = reason or "insufficient_history"
+
+    # Simple fallback method
+    next_30 = avg_daily_last_30 * 30
+    next_60 = avg_daily_last_30 * 60
+    next_90 = avg_daily_last_30 * 90
+    simple_daily = []
+    base_date = df['ds'].max()
+    for i in range(1, horizon_days+1):
+        d = (base_date + pd.Timedelta(days=i)).date().isoformat()
+        simple_daily.append({"date": d, "predicted_spend": round(float(avg_daily_last_30),2)})
+    result = {
+        "forecast_method": f"{method}_fallback" if method in ("prophet", "ets") else "simple",
+        "reason": reason or None,
+        "horizon_days": horizon_days,
+        "annual_spend_projection": simple_annual_projection,
+        "next_30d_spend": round(float(next_30),2),
+        "next_60d_spend": round(float(next_60),2),
+        "next_90d_spend": round(float(next_90),2),
+        "daily_forecast": simple_daily
+    }
+    return {"result": result, "warm": None, "fit_seconds": time.perf_counter() - start, "warm_start": False}
@@ -0,0 +1,248 @@
+"""Columnar CSV normalization used by /upload.
+
+`normalize_frame` turns a header-normalized DataFrame (see routes/upload.py)
+into ready-to-persist transaction records using whole-column pandas/NumPy
+operations. `normalize_rows` keeps the original per-row implementation as the
+reference: it is used for parity tests, the ingest benchmark and as a fallback
+for frames the columnar path cannot address unambiguously (duplicate headers).
+
+Both return the same shape:
+    {"frame": DataFrame[date, description, amount, merchant, category],
+     "records": int, "skipped": int, "sign_inferred": int, "errors": [...]}
+"""
+from __future__ import annotations
+
+from datetime import datetime
+
+from backend.utils.categorize import (  # noqa: F401 (keyword sets re-exported for callers of this module)
+    INCOME_KEYWORDS, EXPENSE_KEYWORDS, categorize_series, keyword_pattern, simple_category,
+)
+from backend.utils.lazy import lazy_module
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+DATE_FORMATS = ["%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y", "%d-%m-%Y"]
+
+DEBIT_TOKENS = {"debit","withdrawal","payment","purchase","fee","dr","out"}
+CREDIT_TOKENS = {"credit","deposit","refund","income","cr","in"}
+
+RECORD_COLUMNS = ["date", "description", "amount", "merchant", "category"]
+MAX_ERROR_SAMPLES = 5
+
+_INCOME_RE = keyword_pattern(INCOME_KEYWORDS)
+
+
+def parse_date(val: str):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(val, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date format: {val}")
+
+
+def _column_or_blank(df: pd.DataFrame, name: str) -> pd.Series:
+    """str() of every cell like `str(row.get(name, ''))` in the row loop ('nan' for missing cells)."""
+    if name not in df.columns:
+        return pd.Series('', index=df.index, dtype=object)
+    return df[name].astype(str)
+
+
+def _parse_dates(raw: pd.Series):
+    """Parse stripped date strings once per distinct value.
+
+    Bank exports repeat the same few hundred dates across thousands of rows, so
+    resolving uniques with the exact strptime cascade keeps parity with
+    `parse_date` while doing O(distinct dates) work.
+    """
+    codes, uniques = pd.factorize(raw)
+    parsed = np.empty(len(uniques), dtype=object)
+    failed = np.zeros(len(uniques), dtype=bool)
+    for i, val in enumerate(uniques):
+        try:
+            parsed[i] = parse_date(val)
+        except ValueError:
+            failed[i] = True
+    return pd.Series(parsed[codes], index=raw.index), pd.Series(failed[codes], index=raw.index)
+
+
+def _coerce_amounts(col: pd.Series):
+    """Return (float values, error message or None) matching `float(row['amount'])`."""
+    if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+        return col.astype(float), pd.Series(None, index=col.index, dtype=object)
+    codes, uniques = pd.factorize(col, use_na_sentinel=False)
+    values = np.full(len(uniques), np.nan)
+    messages = np.full(len(uniques), None, dtype=object)
+    for i, val in enumerate(uniques):
+        try:
+            values[i] = float(val)
+        except (ValueError, TypeError) as e:
+            messages[i] = str(e)
+    return pd.Series(values[codes], index=col.index), pd.Series(messages[codes], index=col.index)
+
+
+def normalize_frame(df: pd.DataFrame, description_source: str | None) -> dict:
+    """Columnar equivalent of `normalize_rows`; returns identical records and counters."""
+    if df.columns.duplicated().any():
+        return normalize_rows(df, description_source)
+    n = len(df)
+    raw_date = df['date'].astype(str).str.strip()
+    blank = raw_date.eq('') | raw_date.str.startswith('#')
+    dates, date_failed = _parse_dates(raw_date)
+    date_failed &= ~blank
+    amounts, amount_errors = _coerce_amounts(df['amount'])
+    amount_failed = amount_errors.notna() & ~blank & ~date_failed
+
+    error_msg = pd.Series(None, index=df.index, dtype=object)
+    error_msg[date_failed] = 'Invalid date format: ' + raw_date[date_failed]
+    error_msg[amount_failed] = amount_errors[amount_failed]
+    valid = ~(blank | date_failed | amount_failed)
+
+    raw_desc = df['description']
+    desc = raw_desc.where(raw_desc.notna(), '').astype(str).str.strip()
+    desc = desc.mask(desc.eq(''), 'UNKNOWN')
+    merchant = _column_or_blank(df, 'merchant').str.strip()
+
+    # Sign inference for non-negative amounts: explicit debit/credit tokens first,
+    # otherwise anything without an income keyword is treated as an outflow.
+    # (The expense keyword check in the original loop never changes the outcome.)
+    txn_type_raw = _column_or_blank(df, 'txn_type')
+    txn_type = txn_type_raw.str.strip().str.lower()
+    non_negative = amounts >= 0
+    debit = non_negative & txn_type.isin(DEBIT_TOKENS)
+    credit = non_negative & txn_type.isin(CREDIT_TOKENS) & ~debit
+    undecided = non_negative & ~debit & ~credit
+    outflow = pd.Series(False, index=df.index)
+    if undecided.any():
+        combined = (
+            desc[undecided] + ' ' + _column_or_blank(df, 'category')[undecided]
+            + ' ' + _column_or_blank(df, 'labels')[undecided]
+            + ' ' + _column_or_blank(df, 'notes')[undecided]
+            + ' ' + txn_type_raw[undecided]
+        ).str.lower()
+        has_income = combined.str.contains(_INCOME_RE, regex=True)
+        outflow[has_income.index] = ~has_income
+    negate = debit | outflow
+    amounts = amounts.where(~negate, -amounts.abs())
+    amounts = amounts.where(~credit, amounts.abs())
+
+    # Category precedence mirrors the row loop: explicit category column, then
+    # description-as-category, then keyword heuristic.
+    category = pd.Series(None, index=df.index, dtype=object)
+    if description_source != 'category' and 'category' in df.columns:
+        rc = df['category']
+        txt = rc.where(rc.notna(), '').astype(str).str.strip()
+        category = txt.where(txt.ne(''), None)
+    elif description_source == 'category':
+        category = desc.where(desc.ne('UNKNOWN'), None)
+    missing = category.isna() & valid
+    if missing.any():
+        category[missing] = categorize_series(desc[missing], merchant[missing])
+    category = category.astype(object).where(category.notna(), None)
+
+    frame = pd.DataFrame({
+        'date': dates[valid],
+        'description': desc[valid],
+        'amount': amounts[valid].astype(float),
+        'merchant': merchant[valid],
+        'category': category[valid],
+    }, columns=RECORD_COLUMNS)
+    errors = [
+        {"row": int(idx), "error": msg}
+        for idx, msg in error_msg.dropna().head(MAX_ERROR_SAMPLES).items()
+    ]
+    return {
+        "frame": frame,
+        "records": int(valid.sum()),
+        "skipped": int(n - valid.sum()),
+        "sign_inferred": int((negate & valid).sum()),
+        "errors": errors,
+    }
+
+
+def normalize_rows(df: pd.DataFrame, description_source: str | None) -> dict:
+    """Reference per-row implementation (original /upload loop)."""
+    records = []
+    skipped = 0
+    errors = []
+    sign_inferred = 0
+    for idx, row in df.iterrows():
+        try:
+            raw_date = str(row['date']).strip()
+            if raw_date.startswith('#') or raw_date == '':  # comment / blank line
+                skipped += 1
+                continue
+            date_obj = parse_date(raw_date)
+            raw_desc = row['description']
+            if raw_desc is None or (isinstance(raw_desc, float) and pd.isna(raw_desc)):
+                raw_desc = ''
+            desc = str(raw_desc).strip()
+            if not desc:
+                desc = 'UNKNOWN'  # ensure non-empty to avoid downstream clustering nulls
+            merchant = str(row.get('merchant', '')).strip()
+            amount_val = float(row['amount'])
+            # Sign inference only if non-negative raw amount
+            if amount_val >= 0:
+                txntype = str(row.get('txn_type','')).strip().lower()
+                if txntype in DEBIT_TOKENS:
+                    amount_val = -abs(amount_val)
+                    sign_inferred += 1
+                elif txntype in CREDIT_TOKENS:
+                    amount_val = abs(amount_val)  # explicit, still counts if changed from negative? skip
+                else:
+                    # Fallback to keyword heuristic on combined text
+                    combined = ' '.join([
+                        str(desc),
+                        str(row.get('category','')),
+                        str(row.get('labels','')),
+                        str(row.get('notes','')),
+                        str(row.get('txn_type','')),
+                    ]).lower()
+                    has_income = any(k in combined for k in INCOME_KEYWORDS)
+                    has_expense = any(k in combined for k in EXPENSE_KEYWORDS)
+                    if has_expense and not has_income:
+                        amount_val = -abs(amount_val)
+                        sign_inferred += 1
+                    # If neither detected, default assumption: treat as outflow unless obviously income keyword present
+                    elif not has_income:
+                        amount_val = -abs(amount_val)
+                        sign_inferred += 1
+            # Category resolution precedence:
+            # 1. If original category column existed AND wasn't repurposed as description, prefer its value
+            # 2. If the user explicitly selected the 'category' column as description (description_source == 'category'),
+            #    we treat the description text itself as the category label (better than leaving empty)
+            # 3. Fallback to heuristic simple_category
+            raw_category_val = None
+            if description_source != 'category' and 'category' in df.columns:
+                try:
+                    rc = row.get('category')
+                    if rc is not None and not (isinstance(rc, float) and pd.isna(rc)):
+                        txt = str(rc).strip()
+                        if txt:
+                            raw_category_val = txt
+                except Exception:
+                    pass
+            elif description_source == 'category':
+                # Original category column became description; reuse that text as category directly
+                raw_category_val = desc if desc and desc != 'UNKNOWN' else None
+            category = raw_category_val if raw_category_val else simple_category(desc, merchant)
+            records.append({
+                'date': date_obj,
+                'description': desc,
+                'amount': amount_val,
+                'merchant': merchant,
+                'category': category,
+            })
+        except (ValueError, TypeError) as e:
+            skipped += 1
+            if len(errors) < MAX_ERROR_SAMPLES:  # cap error detail
+                errors.append({"row": int(idx), "error": str(e)})
+            continue
+    return {
+        "frame": pd.DataFrame(records, columns=RECORD_COLUMNS),
+        "records": len(records),
+        "skipped": skipped,
+        "sign_inferred": sign_inferred,
+        "errors": errors,
+    }
@@ -0,0 +1,62 @@
+"""Local background job runner for ingestion work.
+
+A small thread pool executes jobs off the request path while a bounded slot
+semaphore caps how many jobs may be running or waiting at once, so a burst of
+large uploads cannot monopolise the process. Job state is published through
+`backend.utils.progress` under the job id.
+
+Threads (not processes) are used because jobs share the SQLAlchemy engine and
+the progress registry; the heavy pandas work releases the GIL for most of its
+runtime.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.utils import progress
+from backend.utils.logging import logger
+
+MAX_WORKERS = int(os.getenv('INGEST_JOB_WORKERS', '2') or 2)
+MAX_QUEUED = int(os.getenv('INGEST_JOB_QUEUE_LIMIT', '8') or 8)
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='ingest-job')
+_SLOTS = threading.BoundedSemaphore(MAX_WORKERS + MAX_QUEUED)
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when all running + queued job slots are taken."""
+    pass
+
+
+def reserve_slot():
+    """Claim a slot before doing any expensive preparation; raises JobQueueFull."""
+    if not _SLOTS.acquire(blocking=False):
+        raise JobQueueFull("ingestion queue is full; retry later")
+
+
+def release_slot():
+    _SLOTS.release()
+
+
+def submit(job_id: str, fn, *args, **kwargs) -> str:
+    """Run fn(job_id, *args, **kwargs) in the pool. The caller must hold a slot.
+
+    fn returns a summary dict that is stored as the job's `result`; its
+    optional `phase` key (default 'done') becomes the final phase.
+    """
+    progress.update(job_id, phase='queued')
+
+    def _run():
+        try:
+            progress.update(job_id, phase='running')
+            result = fn(job_id, *args, **kwargs) or {}
+            progress.update(job_id, phase=result.get('phase', 'done'), finished=True, result=result)
+        except Exception as e:  # noqa: BLE001 - surface any failure on the job record
+            detail = getattr(e, 'detail', None) or str(e)
+            progress.update(job_id, phase='failed', finished=True, error=detail)
+            logger.warning("ingest_job_failed", job_id=job_id, error=detail)
+        finally:
+            release_slot()
+
+    _EXECUTOR.submit(_run)
+    return job_id
@@ -0,0 +1,40 @@
+"""Deferred imports for heavy scientific libraries.
+
+`pd = lazy_module('pandas')` binds a stand-in that imports pandas on its
+first attribute access, so importing the API (every worker start, every test
+client, every /health probe) does not pay for pandas / NumPy until an upload,
+forecast or analytics request actually uses them. Modules that use the proxy
+also `from __future__ import annotations` so `pd.DataFrame` in signatures is
+not evaluated at import time.
+
+The import goes through importlib.import_module, which holds the per-module
+import lock, so concurrent first requests are safe. Attributes are cached on
+the proxy after the first lookup; later accesses cost a normal attribute read.
+"""
+import importlib
+import sys
+
+
+class LazyModule:
+    def __init__(self, name: str):
+        self.__dict__['_lazy_name'] = name
+
+    def _load(self):
+        return importlib.import_module(self._lazy_name)
+
+    def __getattr__(self, attr: str):
+        value = getattr(self._load(), attr)
+        self.__dict__[attr] = value
+        return value
+
+    def __repr__(self):
+        state = 'loaded' if self._lazy_name in sys.modules else 'not loaded'
+        return f"<lazy module {self._lazy_name!r} ({state})>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def loaded(name: str) -> bool:
+    return name in sys.modules
@@ -0,0 +1,214 @@
+"""Canonical merchant resolution (see models/merchant.py).
+
+`merchant_key` strips what banks append to a merchant name — processor
+prefixes ("SQ *", "PAYPAL *"), reference / store numbers after '*' or '#',
+domains, phone numbers and long digit runs, corporate suffixes — and keeps
+only letters and digits: "NETFLIX.COM 866-579", "Netflix" and "NETFLIX *2341"
+all become `netflix`. The regexes are compiled once at import.
+
+`resolve` maps raw strings to merchant ids through three tiers: a bounded
+in-process LRU of raw string -> id, the `merchant_aliases` table, and only
+for never-seen strings the normalizer plus an insert into `merchants` /
+`merchant_aliases`. Uploads repeat the same few hundred merchant strings, so
+almost every row is answered from memory.
+
+Cached ids are only trusted within one merchant generation: a random token in
+`schema_meta` that is replaced whenever merchants or aliases are inserted or
+wiped. A wipe, another worker's inserts, or a rolled-back insert of our own
+all leave a token the LRU was not filled under, so it is dropped rather than
+returning ids that were reassigned (SQLite reuses rowids after a wipe).
+Inserts use ON CONFLICT DO NOTHING, so workers creating the same merchant
+concurrently do not collide on the unique keys.
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+
+from sqlalchemy import bindparam, delete, event, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from backend.db import LOOKUP_BATCH, connection_for, dialect_insert
+from backend.models.merchant import Merchant, MerchantAlias
+from backend.models.schema_meta import SchemaMeta
+from backend.models.transaction import Transaction
+from backend.utils.lazy import lazy_module
+
+pd = lazy_module('pandas')
+
+LRU_SIZE = int(os.getenv('MERCHANT_ALIAS_CACHE_SIZE', '50000') or 50000)
+GENERATION_KEY = 'merchant_generation'
+_META = SchemaMeta.__table__
+
+_PREFIX_RE = re.compile(r"^\s*(?:sq|tst|paypal|pp|sp|ck|py|pos|ach|dd)\s*\*\s*", re.IGNORECASE)
+_REFERENCE_RE = re.compile(r"\s*[*#].*$")
+_DOMAIN_RE = re.compile(r"\.(?:com|net|org|io|co\.uk|co)\b", re.IGNORECASE)
+_DIGIT_TOKEN_RE = re.compile(r"\S*(?:\d{4,}|\d[-/]\d)\S*")  # phone / store / card numbers, not "Studio 54"
+_SUFFIX_RE = re.compile(r"\s+(?:inc|llc|ltd|corp|co|gmbh)\.?$", re.IGNORECASE)
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+_SPACES_RE = re.compile(r"\s+")
+
+_LOCK = threading.Lock()
+_LRU: "OrderedDict[str, int]" = OrderedDict()
+_STATE = {"key": None}
+
+
+def clean_name(raw: str | None) -> str:
+    """Display form with reference noise removed: 'NETFLIX.COM 866-579' -> 'NETFLIX'."""
+    text = _PREFIX_RE.sub('', raw or '')
+    text = _REFERENCE_RE.sub('', text)
+    text = _DOMAIN_RE.sub('', text)
+    text = _DIGIT_TOKEN_RE.sub(' ', text)
+    return _SPACES_RE.sub(' ', text).strip(' -_.,/')
+
+
+def merchant_key(raw: str | None) -> str | None:
+    """Normalized grouping key, or None for a blank merchant."""
+    if raw is None or not str(raw).strip():
+        return None
+    key = _NON_ALNUM_RE.sub('', _SUFFIX_RE.sub('', clean_name(raw)).lower())
+    # All noise (e.g. '7-Eleven' loses its only token): fall back to the bare characters
+    return key or _NON_ALNUM_RE.sub('', str(raw).lower()) or str(raw).strip().lower()
+
+
+def display_name(raw: str) -> str:
+    name = clean_name(raw) or str(raw).strip()
+    return name.title() if name.isupper() else name
+
+
+def clear_memory():
+    with _LOCK:
+        _LRU.clear()
+        _STATE["key"] = None
+
+
+def _generation(conn) -> str | None:
+    return conn.execute(select(_META.c.value).where(_META.c.key == GENERATION_KEY)).scalar()
+
+
+def _new_generation(conn) -> str:
+    value = uuid.uuid4().hex
+    stmt = dialect_insert(conn, _META).values(key=GENERATION_KEY, value=value)
+    conn.execute(stmt.on_conflict_do_update(index_elements=['key'], set_={'value': value}))
+    return value
+
+
+def _remember(pairs: dict, generation: str):
+    with _LOCK:
+        if _STATE["key"] != generation:
+            _LRU.clear()
+        _STATE["key"] = generation
+        for raw, mid in pairs.items():
+            _LRU[raw] = mid
+            _LRU.move_to_end(raw)
+        while len(_LRU) > LRU_SIZE:
+            _LRU.popitem(last=False)
+
+
+def resolve(db, raws) -> dict:
+    """{raw string: merchant id} for every non-blank raw, creating merchants / aliases as needed (caller commits)."""
+    wanted = [r for r in dict.fromkeys(raws) if isinstance(r, str) and r.strip()]
+    if not wanted:
+        return {}
+    conn = connection_for(db)
+    generation = _generation(conn)
+    found = {}
+    with _LOCK:
+        if generation is not None and _STATE["key"] == generation:
+            for raw in wanted:
+                mid = _LRU.get(raw)
+                if mid is not None:
+                    _LRU.move_to_end(raw)
+                    found[raw] = mid
+        else:
+            _LRU.clear()
+            _STATE["key"] = None
+    missing = [r for r in wanted if r not in found]
+    for offset in range(0, len(missing), LOOKUP_BATCH):
+        batch = missing[offset:offset + LOOKUP_BATCH]
+        found.update(dict(conn.execute(select(MerchantAlias.raw, MerchantAlias.merchant_id).where(MerchantAlias.raw.in_(batch))).all()))
+    unaliased = [r for r in missing if r not in found]
+    if unaliased:
+        by_key = {}
+        for raw in unaliased:
+            by_key.setdefault(merchant_key(raw), []).append(raw)
+        keys = list(by_key)
+        known = {}
+        for offset in range(0, len(keys), LOOKUP_BATCH):
+            known.update(dict(conn.execute(select(Merchant.key, Merchant.id).where(Merchant.key.in_(keys[offset:offset + LOOKUP_BATCH]))).all()))
+        new_keys = [k for k in keys if k not in known]
+        if new_keys:
+            conn.execute(
+                dialect_insert(conn, Merchant.__table__).on_conflict_do_nothing(index_elements=['key']),
+                [{'key': k, 'name': display_name(by_key[k][0])} for k in new_keys],
+            )
+            for offset in range(0, len(new_keys), LOOKUP_BATCH):
+                known.update(dict(conn.execute(select(Merchant.key, Merchant.id).where(Merchant.key.in_(new_keys[offset:offset + LOOKUP_BATCH]))).all()))
+        # A raw string maps to one key and a key to one merchant, so an alias another worker inserted first agrees with ours
+        aliases = [{'raw': raw, 'merchant_id': known[key]} for key, group in by_key.items() for raw in group]
+        conn.execute(dialect_insert(conn, MerchantAlias.__table__).on_conflict_do_nothing(index_elements=['raw']), aliases)
+        found.update({a['raw']: a['merchant_id'] for a in aliases})
+        generation = _new_generation(conn)
+    if generation is not None:
+        _remember({r: found[r] for r in wanted}, generation)
+    return found
+
+
+def merchant_ids(db, merchants: pd.Series) -> pd.Series:
+    """`resolve` for an upload frame's merchant column: one lookup per distinct string, None for blanks."""
+    mapping = resolve(db, merchants.dropna().unique().tolist())
+    return pd.Series([mapping.get(m) for m in merchants], index=merchants.index, dtype=object)
+
+
+def names(db, ids) -> dict:
+    """{merchant id: display name}."""
+    ids = sorted({i for i in ids if i is not None})
+    out = {}
+    conn = connection_for(db)
+    for offset in range(0, len(ids), LOOKUP_BATCH):
+        out.update(dict(conn.execute(select(Merchant.id, Merchant.name).where(Merchant.id.in_(ids[offset:offset + LOOKUP_BATCH]))).all()))
+    return out
+
+
+def backfill(db) -> int:
+    """Point every transaction at its canonical merchant; returns the number of distinct raw strings."""
+    conn = connection_for(db)
+    tx = Transaction.__table__
+    raws = [r for (r,) in conn.execute(select(tx.c.merchant).where(tx.c.merchant.isnot(None)).distinct()).all()]
+    mapping = resolve(conn, raws)
+    if mapping:
+        conn.execute(
+            tx.update().where(tx.c.merchant == bindparam('raw_merchant')).values(merchant_id=bindparam('mid')),
+            [{'raw_merchant': raw, 'mid': mid} for raw, mid in mapping.items()],
+        )
+    return len(mapping)
+
+
+def clear(db):
+    conn = connection_for(db)
+    conn.execute(delete(MerchantAlias.__table__))
+    conn.execute(delete(Merchant.__table__))
+    _new_generation(conn)
+    clear_memory()
+
+
+# --- ORM unit-of-work capture ------------------------------------------------
+
+@event.listens_for(Session, 'before_flush')
+def _assign_merchant_ids(session, flush_context, instances):
+    pending = []
+    for obj in session.new:
+        if isinstance(obj, Transaction):
+            pending.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, Transaction) and sa_inspect(obj).attrs.merchant.history.has_changes():
+            pending.append(obj)
+    if not pending:
+        return
+    mapping = resolve(session.connection(), [obj.merchant for obj in pending])
+    for obj in pending:
+        obj.merchant_id = mapping.get(obj.merchant)
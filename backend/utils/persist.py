@@ -0,0 +1,201 @@
+"""Bulk persistence for normalized upload batches.
+
+Writes go through SQLAlchemy Core `insert()` with executemany parameter lists
+instead of one ORM `Transaction` per row, so large uploads skip unit-of-work
+bookkeeping (identity map, per-object flush) entirely.
+
+`persist_records` layers content-hash dedupe on top: every row gets a stable
+fingerprint stored in `transaction_fingerprints` (unique index), so uploading
+an overlapping export only inserts rows that are not already present.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from collections import Counter
+
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.orm import Session
+
+from backend.db import LOOKUP_BATCH, dialect_insert
+from backend.models.transaction import Transaction
+from backend.models.transaction_fingerprint import TransactionFingerprint
+from backend.utils import merchants, recurrence, rollups
+from backend.utils.lazy import lazy_module
+
+pd = lazy_module('pandas')
+
+DEFAULT_CHUNK_SIZE = int(os.getenv('UPLOAD_INSERT_CHUNK_SIZE', '5000') or 5000)
+DEDUPE_MODES = ('skip', 'upsert', 'off')
+
+
+def bulk_insert_transactions(
+    db: Session,
+    frame: pd.DataFrame,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    returning: bool = False,
+) -> dict:
+    """Insert normalized records (see utils/ingest.RECORD_COLUMNS) in chunks.
+
+    The caller owns the transaction: rows are executed on the session's
+    connection but not committed here.
+
+    Returns {"inserted": int, "ids": list[int] | None, "seconds": float}.
+    """
+    chunk_size = max(1, int(chunk_size))
+    table = Transaction.__table__
+    stmt = insert(table)
+    if returning:
+        stmt = stmt.returning(table.c.id, sort_by_parameter_order=True)
+    ids = [] if returning else None
+    inserted = 0
+    start = time.perf_counter()
+    for offset in range(0, len(frame), chunk_size):
+        rows = frame.iloc[offset:offset + chunk_size].to_dict('records')
+        result = db.execute(stmt, rows)
+        if returning:
+            ids.extend(result.scalars().all())
+        inserted += len(rows)
+    return {"inserted": inserted, "ids": ids, "seconds": time.perf_counter() - start}
+
+
+def _normalize_text(col: pd.Series) -> pd.Series:
+    return col.fillna('').astype(str).str.lower().str.split().str.join(' ')
+
+
+def fingerprint_frame(frame: pd.DataFrame, occurrences: Counter | None = None) -> pd.Series:
+    """Return a sha1 fingerprint per record.
+
+    The key is (date, amount to the cent, normalized description, normalized
+    merchant, occurrence) where occurrence numbers identical rows within the
+    upload, so two genuine same-day coffees stay distinct while a re-upload of
+    either collapses onto the stored pair. Pass the same `occurrences` Counter
+    across chunks of one upload to keep numbering continuous.
+    """
+    if frame.empty:
+        return pd.Series([], index=frame.index, dtype=object)
+    base = (
+        frame['date'].astype(str)
+        + '|' + frame['amount'].map('{:.2f}'.format)
+        + '|' + _normalize_text(frame['description'])
+        + '|' + _normalize_text(frame['merchant'])
+    )
+    ordinal = base.groupby(base, sort=False).cumcount()
+    if occurrences is not None:
+        ordinal = ordinal + base.map(lambda k: occurrences.get(k, 0))
+        occurrences.update(base.tolist())
+    keys = base + '|' + ordinal.astype(str)
+    return keys.map(lambda k: hashlib.sha1(k.encode('utf-8')).hexdigest())
+
+
+def existing_fingerprints(db: Session, fingerprints: list) -> dict:
+    """Map already-stored fingerprints to their transaction id (None for tombstones)."""
+    found = {}
+    for offset in range(0, len(fingerprints), LOOKUP_BATCH):
+        batch = fingerprints[offset:offset + LOOKUP_BATCH]
+        rows = db.execute(
+            select(TransactionFingerprint.fingerprint, TransactionFingerprint.transaction_id)
+            .where(TransactionFingerprint.fingerprint.in_(batch))
+        ).all()
+        found.update({fp: tid for fp, tid in rows})
+    return found
+
+
+def claim_fingerprints(db: Session, fingerprints: list, chunk_size: int = DEFAULT_CHUNK_SIZE) -> set:
+    """Record fingerprints not stored yet and return the ones this call inserted.
+
+    Uses INSERT ... ON CONFLICT DO NOTHING, so when two uploads race on the same
+    rows exactly one of them claims each fingerprint (and inserts the
+    transaction); the other sees it as already existing instead of failing on
+    the unique index. Claimed rows start as tombstones until `link_fingerprints`.
+    """
+    table = TransactionFingerprint.__table__
+    stmt = dialect_insert(db, table).on_conflict_do_nothing(index_elements=['fingerprint']).returning(table.c.fingerprint)
+    claimed = set()
+    chunk_size = max(1, int(chunk_size))
+    for offset in range(0, len(fingerprints), chunk_size):
+        rows = [{'fingerprint': fp} for fp in fingerprints[offset:offset + chunk_size]]
+        claimed.update(db.execute(stmt, rows).scalars().all())
+    return claimed
+
+
+def link_fingerprints(db: Session, pairs: list, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Point claimed fingerprints at their inserted transactions; pairs: [(fingerprint, transaction id)]."""
+    table = TransactionFingerprint.__table__
+    stmt = update(table).where(table.c.fingerprint == bindparam('fp')).values(transaction_id=bindparam('tid'))
+    chunk_size = max(1, int(chunk_size))
+    for offset in range(0, len(pairs), chunk_size):
+        db.execute(stmt, [{'fp': fp, 'tid': tid} for fp, tid in pairs[offset:offset + chunk_size]])
+
+
+def _rollup_recategorize(db: Session, changes: list):
+    """Feed pending {'id', 'category'} updates to the monthly rollups before they are applied."""
+    new_category = {c['id']: c['category'] for c in changes}
+    ids = list(new_category)
+    rows = []
+    for offset in range(0, len(ids), LOOKUP_BATCH):
+        rows.extend(db.execute(
+            select(Transaction.id, Transaction.date, Transaction.amount, Transaction.merchant, Transaction.category)
+            .where(Transaction.id.in_(ids[offset:offset + LOOKUP_BATCH]))
+        ).all())
+    rollups.recategorize(db, [(d, amount, merchant, old, new_category[tid]) for tid, d, amount, merchant, old in rows])
+
+
+def persist_records(
+    db: Session,
+    frame: pd.DataFrame,
+    mode: str = 'skip',
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    returning: bool = False,
+    occurrences: Counter | None = None,
+) -> dict:
+    """Fingerprint, dedupe and bulk insert a normalized frame (caller commits).
+
+    Modes:
+      skip   - rows whose fingerprint already exists are left untouched
+      upsert - existing rows get their category refreshed from the upload
+      off    - insert everything (only previously unseen fingerprints are recorded)
+
+    Returns {"inserted", "existing", "updated", "ids", "seconds", "new_ids", "new_index"};
+    new_ids/new_index always describe the inserted rows (ids aligned with frame index labels).
+    """
+    if mode not in DEDUPE_MODES:
+        raise ValueError(f"Unknown dedupe mode '{mode}' (expected one of {DEDUPE_MODES})")
+    start = time.perf_counter()
+    fps = fingerprint_frame(frame, occurrences)
+    known = existing_fingerprints(db, fps.unique().tolist()) if len(fps) else {}
+    is_new = ~fps.isin(known.keys())
+    existing = int((~is_new).sum())
+    updated = 0
+    if mode == 'upsert' and existing:
+        changes = [
+            {'id': known[fp], 'category': cat}
+            for fp, cat in zip(fps[~is_new], frame.loc[~is_new, 'category'])
+            if known[fp] is not None and cat is not None
+        ]
+        if changes:
+            _rollup_recategorize(db, changes)
+            db.execute(update(Transaction), changes)  # ORM bulk UPDATE by primary key
+            updated = len(changes)
+    claimed = claim_fingerprints(db, fps[is_new].tolist(), chunk_size=chunk_size)
+    if mode == 'off':
+        to_insert = frame
+    else:
+        # Fingerprints another upload claimed since the lookup above count as existing
+        to_insert = frame[is_new & fps.isin(claimed)]
+        existing += int(is_new.sum()) - len(to_insert)
+    to_insert = to_insert.assign(merchant_id=merchants.merchant_ids(db, to_insert['merchant']))
+    result = bulk_insert_transactions(db, to_insert, chunk_size=chunk_size, returning=True)
+    rollups.apply_frame(db, to_insert)
+    recurrence.apply_inserts(db, result['ids'], to_insert)
+    link_fingerprints(db, [(fp, tid) for fp, tid in zip(fps[to_insert.index], result['ids']) if fp in claimed], chunk_size=chunk_size)
+    return {
+        "inserted": result["inserted"],
+        "existing": existing,
+        "updated": updated,
+        "ids": result["ids"] if returning else None,
+        "seconds": time.perf_counter() - start,
+        "new_ids": result["ids"],
+        "new_index": to_insert.index,
+    }
@@ -0,0 +1,76 @@
+"""In-process progress registry for long-running uploads.
+
+Entries are plain dicts keyed by an upload id so request handlers can publish
+counters while a file is being ingested and a separate request can poll them.
+The registry is bounded; the oldest entries are evicted first.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+MAX_TRACKED = 200
+
+_LOCK = threading.Lock()
+_ENTRIES: "OrderedDict[str, dict]" = OrderedDict()
+
+
+class ProgressKeyInUse(RuntimeError):
+    """Raised when a client-chosen id still belongs to an unfinished upload."""
+    pass
+
+
+def start(key: str | None = None, **fields) -> str:
+    """Register a new entry; raises ProgressKeyInUse when `key` is tracked and not finished."""
+    key = key or uuid.uuid4().hex
+    now = time.time()
+    entry = {
+        'id': key,
+        'phase': 'queued',
+        'rows_read': 0,
+        'records': 0,
+        'skipped': 0,
+        'chunks': 0,
+        'started_at': now,
+        'updated_at': now,
+        'finished': False,
+    }
+    entry.update(fields)
+    with _LOCK:
+        current = _ENTRIES.get(key)
+        if current is not None and not current['finished']:
+            raise ProgressKeyInUse(f"upload id '{key}' is still in progress")
+        _ENTRIES[key] = entry
+        _ENTRIES.move_to_end(key)
+        while len(_ENTRIES) > MAX_TRACKED:
+            _ENTRIES.popitem(last=False)
+    return key
+
+
+def update(key: str, **fields):
+    with _LOCK:
+        entry = _ENTRIES.get(key)
+        if entry is None:
+            return
+        entry.update(fields)
+        entry['updated_at'] = time.time()
+
+
+def increment(key: str, **deltas):
+    with _LOCK:
+        entry = _ENTRIES.get(key)
+        if entry is None:
+            return
+        for name, delta in deltas.items():
+            entry[name] = entry.get(name, 0) + delta
+        now = time.time()
+        entry['updated_at'] = now
+        elapsed = now - entry['started_at']
+        if elapsed > 0:
+            entry['rows_per_sec'] = round(entry.get('rows_read', 0) / elapsed, 1)
+
+
+def get(key: str) -> dict | None:
+    with _LOCK:
+        entry = _ENTRIES.get(key)
+        return dict(entry) if entry is not None else None
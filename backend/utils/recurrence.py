@@ -0,0 +1,313 @@
+"""Persisted recurring-charge detection (see models/merchant_recurrence.py).
+
+Each merchant's expenses are folded in (date, id) order into a running state:
+occurrence count, first/last charge, distinct months, and Welford mean/M2 for
+both the day interval between consecutive charges and the absolute amount.
+The subscription flags and the estimated next charge are pure functions of
+that state, so they are stored next to it and readers never touch
+`transactions`.
+
+Write paths:
+
+* uploads (utils/persist.py) call `apply_inserts`; charges dated on or after a
+  merchant's last charge are folded in place, older ones (a back-filled
+  export) trigger `refresh` for that merchant;
+* ORM unit-of-work changes are captured by the session flush hooks below and
+  refresh the merchants involved;
+* bulk deletes call `refresh`, wipes call `clear`, and schema upgrades call
+  `rebuild`.
+
+States are keyed by canonical merchant (`transactions.merchant_id`, see
+utils/merchants.py), so spelling variants of one merchant share a state.
+`refresh` recomputes a merchant from its transactions through
+ix_transactions_merchant_id_date, so only the merchants a write touched are
+ever re-read.
+"""
+from __future__ import annotations
+
+import math
+from datetime import date, timedelta
+
+from sqlalchemy import bindparam, delete, event, insert, select, update
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from backend.db import LOOKUP_BATCH, connection_for
+from backend.models.merchant import Merchant
+from backend.models.merchant_recurrence import MerchantRecurrence
+from backend.models.transaction import Transaction
+from backend.utils import merchants
+from backend.utils.lazy import lazy_module
+
+pd = lazy_module('pandas')
+
+TRACKED = ('date', 'amount', 'merchant')
+UPCOMING_DAYS = 14
+STATE_COLUMNS = (
+    'merchant_id', 'merchant', 'occurrences', 'first_date', 'first_amount', 'last_date', 'last_id', 'last_amount', 'distinct_months',
+    'interval_mean', 'interval_m2', 'amount_mean', 'amount_m2', 'amount_min', 'amount_max', 'flags', 'next_charge',
+)
+_T = MerchantRecurrence.__table__
+_TX = Transaction.__table__
+
+
+def _start(merchant_id: int, merchant: str, tid: int, d: date, amount: float) -> dict:
+    a = abs(float(amount))
+    return {
+        'merchant_id': merchant_id, 'merchant': merchant, 'occurrences': 1, 'first_date': d, 'first_amount': a,
+        'last_date': d, 'last_id': tid, 'last_amount': float(amount), 'distinct_months': 1,
+        'interval_mean': 0.0, 'interval_m2': 0.0, 'amount_mean': a, 'amount_m2': 0.0, 'amount_min': a, 'amount_max': a,
+    }
+
+
+def _fold(state: dict, tid: int, d: date, amount: float):
+    """Add one charge dated on/after state['last_date'] (Welford updates, in place)."""
+    a = abs(float(amount))
+    interval = (d - state['last_date']).days
+    k = state['occurrences']  # intervals once this charge is counted
+    delta = interval - state['interval_mean']
+    state['interval_mean'] += delta / k
+    state['interval_m2'] += delta * (interval - state['interval_mean'])
+    n = k + 1
+    delta = a - state['amount_mean']
+    state['amount_mean'] += delta / n
+    state['amount_m2'] += delta * (a - state['amount_mean'])
+    state['amount_min'] = min(state['amount_min'], a)
+    state['amount_max'] = max(state['amount_max'], a)
+    if (d.year, d.month) != (state['last_date'].year, state['last_date'].month):
+        state['distinct_months'] += 1
+    state.update(occurrences=n, last_date=d, last_id=tid, last_amount=float(amount))
+
+
+def _avg_interval(state) -> float:
+    # Mean of consecutive gaps telescopes to span / gaps; exact, unlike the running mean
+    return (state['last_date'] - state['first_date']).days / (state['occurrences'] - 1)
+
+
+def derive(state) -> tuple:
+    """(flags, next_charge) for a state; the rules of the original per-request analysis."""
+    n = state['occurrences']
+    if n < 2:
+        return [], None
+    avg_interval = _avg_interval(state)
+    avg_amount, first_amount = state['amount_mean'], state['first_amount']
+    flags = []
+    # Recurring if average interval roughly monthly (25-35 days) OR >=3 charges spanning >=2 months
+    if 25 <= avg_interval <= 35 or (state['distinct_months'] >= 2 and n >= 3):
+        flags.append('recurring')
+    # Trial conversion: very low / zero first amount then higher subsequent average
+    if first_amount <= 1 and avg_amount > max(2, first_amount * 2):
+        flags.append('trial_converted')
+    if 'recurring' in flags and avg_amount < 15:
+        flags.append('small_recurring')
+    if avg_amount > 0 and (state['amount_max'] - state['amount_min']) / avg_amount > 0.3:
+        flags.append('variable_amount')
+    next_charge = state['last_date'] + timedelta(days=round(avg_interval)) if 'recurring' in flags else None
+    return flags, next_charge
+
+
+def _finish(state: dict) -> dict:
+    flags, next_charge = derive(state)
+    state['flags'] = ','.join(flags)
+    state['next_charge'] = next_charge
+    return state
+
+
+def _fold_rows(rows) -> dict:
+    """{merchant_id: state} from (merchant_id, name, id, date, amount) rows ordered by merchant_id, date, id."""
+    states = {}
+    for merchant_id, name, tid, d, amount in rows:
+        state = states.get(merchant_id)
+        if state is None:
+            states[merchant_id] = _start(merchant_id, name, tid, d, amount)
+        else:
+            _fold(state, tid, d, amount)
+    return states
+
+
+def _charges(where):
+    return (
+        select(_TX.c.merchant_id, Merchant.name, _TX.c.id, _TX.c.date, _TX.c.amount)
+        .join(Merchant, Merchant.id == _TX.c.merchant_id)
+        .where(_TX.c.amount < 0, where)
+        .order_by(_TX.c.merchant_id, _TX.c.date, _TX.c.id)
+    )
+
+
+def _write(conn, states: dict, existing: dict):
+    """Update states whose merchant has a row in `existing` ({merchant_id: row id}), insert the rest."""
+    updates, inserts = [], []
+    for merchant_id, state in states.items():
+        _finish(state)
+        rid = existing.get(merchant_id)
+        if rid is None:
+            inserts.append({c: state[c] for c in STATE_COLUMNS})
+        else:
+            updates.append({'rid': rid, **{f'v_{c}': state[c] for c in STATE_COLUMNS if c != 'merchant_id'}})
+    if updates:
+        conn.execute(
+            update(_T).where(_T.c.id == bindparam('rid')).values({c: bindparam(f'v_{c}') for c in STATE_COLUMNS if c != 'merchant_id'}),
+            updates,
+        )
+    if inserts:
+        conn.execute(insert(_T), inserts)
+
+
+def refresh(db, merchant_ids) -> int:
+    """Recompute the state of `merchant_ids` from their transactions; returns how many still have charges."""
+    merchant_ids = sorted({m for m in merchant_ids if m is not None})
+    if not merchant_ids:
+        return 0
+    conn = connection_for(db)
+    kept = 0
+    for offset in range(0, len(merchant_ids), LOOKUP_BATCH):
+        batch = merchant_ids[offset:offset + LOOKUP_BATCH]
+        conn.execute(delete(_T).where(_T.c.merchant_id.in_(batch)))
+        states = _fold_rows(conn.execute(_charges(_TX.c.merchant_id.in_(batch))))
+        _write(conn, states, {})
+        kept += len(states)
+    return kept
+
+
+def apply_inserts(db, ids: list, frame: pd.DataFrame):
+    """Fold freshly inserted rows (frame with merchant_id, aligned with `ids`) into the merchant states."""
+    if not len(frame):
+        return
+    charges = pd.DataFrame({
+        'merchant_id': frame['merchant_id'].to_numpy(), 'id': ids,
+        'date': frame['date'].to_numpy(), 'amount': frame['amount'].astype(float).to_numpy(),
+    })
+    charges = charges[(charges['amount'] < 0) & charges['merchant_id'].notna()]
+    if charges.empty:
+        return
+    charges = charges.sort_values(['merchant_id', 'date', 'id'], kind='stable')
+    conn = connection_for(db)
+    merchant_ids = [int(m) for m in charges['merchant_id'].unique()]
+    states, existing = {}, {}
+    for offset in range(0, len(merchant_ids), LOOKUP_BATCH):
+        for row in conn.execute(select(_T).where(_T.c.merchant_id.in_(merchant_ids[offset:offset + LOOKUP_BATCH]))).mappings():
+            existing[row['merchant_id']] = row['id']
+            states[row['merchant_id']] = {c: row[c] for c in STATE_COLUMNS}
+    names = merchants.names(conn, [m for m in merchant_ids if m not in states])
+    stale = set()
+    for merchant_id, group in charges.groupby('merchant_id', sort=False):
+        merchant_id = int(merchant_id)
+        state = states.get(merchant_id)
+        rows = zip(group['id'].tolist(), group['date'].tolist(), group['amount'].tolist())
+        if state is None:
+            tid, d, amount = next(rows)
+            state = states[merchant_id] = _start(merchant_id, names[merchant_id], tid, d, amount)
+        elif (group['date'].iat[0], group['id'].iat[0]) < (state['last_date'], state['last_id']):
+            stale.add(merchant_id)  # older than the folded history: the running state cannot absorb it
+            continue
+        for tid, d, amount in rows:
+            _fold(state, tid, d, amount)
+    _write(conn, {m: s for m, s in states.items() if m not in stale}, existing)
+    refresh(conn, stale)
+
+
+def clear(db):
+    connection_for(db).execute(delete(_T))
+
+
+def rebuild(db) -> int:
+    """Recompute every merchant with one ordered pass over the expenses."""
+    conn = connection_for(db)
+    conn.execute(delete(_T))
+    states = _fold_rows(conn.execute(_charges(_TX.c.merchant_id.isnot(None))))
+    _write(conn, states, {})
+    return len(states)
+
+
+# --- readers -----------------------------------------------------------------
+
+def _row_state(row) -> dict:
+    return {c: getattr(row, c) for c in STATE_COLUMNS}
+
+
+def describe(row) -> dict:
+    """The /subscriptions entry for a state row."""
+    state = _row_state(row)
+    n = state['occurrences']
+    return {
+        'merchant': state['merchant'],
+        'occurrences': n,
+        'first_date': state['first_date'].isoformat(),
+        'last_date': state['last_date'].isoformat(),
+        'avg_interval_days': round(_avg_interval(state), 1),
+        'interval_jitter_days': round(math.sqrt(max(state['interval_m2'], 0.0) / (n - 1)), 1),
+        'avg_amount': round(state['amount_mean'], 2),
+        'amount_range': [round(state['amount_min'], 2), round(state['amount_max'], 2)],
+        'estimated_next_charge': state['next_charge'].isoformat() if state['next_charge'] else None,
+        'flags': [f for f in state['flags'].split(',') if f],
+    }
+
+
+def subscriptions_query():
+    """States flagged recurring or trial_converted (what /subscriptions lists)."""
+    return select(_T).where(_T.c.flags.like('%recurring%') | _T.c.flags.like('%trial_converted%'))
+
+
+def order_subscriptions(entries: list) -> list:
+    # Trial conversions first, then soonest next charge
+    return sorted(entries, key=lambda x: (
+        0 if 'trial_converted' in x['flags'] else 1,
+        x['estimated_next_charge'] or '9999-12-31',
+        x['merchant'],
+    ))
+
+
+def upcoming(db: Session, today: date, days: int = UPCOMING_DAYS) -> list:
+    """Subscriptions whose estimated next charge falls within [today, today + days] (indexed on next_charge)."""
+    rows = db.execute(
+        subscriptions_query()
+        .where(_T.c.next_charge >= today, _T.c.next_charge <= today + timedelta(days=days))
+        .order_by(_T.c.next_charge, _T.c.merchant)
+    ).all()
+    return [
+        {'merchant': r.merchant, 'last_amount': float(r.last_amount), 'next_estimate': r.next_charge.isoformat()}
+        for r in rows
+    ]
+
+
+# --- ORM unit-of-work capture ------------------------------------------------
+
+def _committed(obj, name):
+    hist = sa_inspect(obj).attrs[name].history
+    if hist.deleted:
+        return hist.deleted[0]
+    return hist.unchanged[0] if hist.unchanged else getattr(obj, name)
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_merchants(session, flush_context, instances):
+    # merchant_id of new / re-pointed rows is assigned in utils/merchants.py's hook, so
+    # the objects are kept and their ids read after the flush
+    old_ids = session.info.setdefault('recurrence_merchant_ids', set())
+    objects = session.info.setdefault('recurrence_objects', [])
+    for obj in session.new:
+        if isinstance(obj, Transaction):
+            objects.append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Transaction):
+            old_ids.add(_committed(obj, 'merchant_id'))
+    for obj in session.dirty:
+        if isinstance(obj, Transaction) and session.is_modified(obj, include_collections=False):
+            if any(_committed(obj, name) != getattr(obj, name) for name in TRACKED):
+                old_ids.add(_committed(obj, 'merchant_id'))
+                objects.append(obj)
+
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_merchants(session, flush_context):
+    old_ids = session.info.pop('recurrence_merchant_ids', None) or set()
+    objects = session.info.pop('recurrence_objects', None) or []
+    touched = old_ids | {obj.merchant_id for obj in objects}
+    if touched - {None}:
+        refresh(session.connection(), touched)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_merchants(session):
+    session.info.pop('recurrence_merchant_ids', None)
+    session.info.pop('recurrence_objects', None)
@@ -0,0 +1,102 @@
+"""In-process response cache for the read-heavy analytics endpoints.
+
+Responses are keyed by (path, normalized query string, today's date, dataset
+version). The dataset version (utils/dataset_version.py) changes on every
+write that can affect these endpoints, so entries never need explicit
+invalidation; stale ones simply stop being requested and age out of the LRU.
+Today's date is part of the key because several endpoints use
+date.today() windows.
+
+Each cached response carries a weak ETag derived from the same key. A request
+whose If-None-Match matches gets a 304 without touching the handler or the
+cache body. Disable with RESPONSE_CACHE_ENABLED=false.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+
+from backend.db import engine
+from backend.utils import dataset_version
+
+CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '256') or 256)
+CACHED_PATHS = ('/dashboard', '/insights', '/breakdown/categories', '/breakdown/merchants', '/breakdown/timeline',
+                '/subscriptions', '/anomalies/')
+
+_LOCK = threading.Lock()
+_ENTRIES: "OrderedDict[str, tuple[bytes, str, int]]" = OrderedDict()  # etag -> (body, media type, status)
+_STATS = {"hits": 0, "misses": 0, "not_modified": 0}
+
+
+def _current_version() -> int:
+    with engine.connect() as conn:
+        return dataset_version.current(conn)
+
+
+def etag_for(path: str, query: str, version: int) -> str:
+    query = '&'.join(sorted(query.split('&'))) if query else ''
+    digest = hashlib.sha1(f"{path}?{query}|{date.today().isoformat()}|{version}".encode('utf-8')).hexdigest()[:20]
+    return f'W/"{version}-{digest}"'
+
+
+def get(etag: str):
+    with _LOCK:
+        entry = _ENTRIES.get(etag)
+        if entry is not None:
+            _ENTRIES.move_to_end(etag)
+        return entry
+
+
+def put(etag: str, body: bytes, media_type: str, status: int):
+    with _LOCK:
+        _ENTRIES[etag] = (body, media_type, status)
+        _ENTRIES.move_to_end(etag)
+        while len(_ENTRIES) > CACHE_SIZE:
+            _ENTRIES.popitem(last=False)
+
+
+def clear():
+    with _LOCK:
+        _ENTRIES.clear()
+
+
+def stats() -> dict:
+    with _LOCK:
+        return {**_STATS, "entries": len(_ENTRIES)}
+
+
+def _count(name: str):
+    with _LOCK:
+        _STATS[name] += 1
+
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        if not CACHE_ENABLED or request.method != 'GET' or request.url.path not in CACHED_PATHS:
+            return await call_next(request)
+        version = await run_in_threadpool(_current_version)
+        etag = etag_for(request.url.path, request.url.query, version)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}  # clients revalidate with If-None-Match
+        if etag in (t.strip() for t in request.headers.get('if-none-match', '').split(',')):
+            _count("not_modified")
+            return Response(status_code=304, headers=headers)
+        entry = get(etag)
+        if entry is not None:
+            _count("hits")
+            body, media_type, status = entry
+            return Response(content=body, status_code=status, media_type=media_type, headers={**headers, 'X-Cache': 'hit'})
+        _count("misses")
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+        body = b''.join([chunk async for chunk in response.body_iterator])
+        put(etag, body, response.media_type or response.headers.get('content-type', 'application/json'), response.status_code)
+        return Response(content=body, status_code=response.status_code, media_type=response.headers.get('content-type'),
+                        headers={**headers, 'X-Cache': 'miss'})
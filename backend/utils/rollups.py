@@ -0,0 +1,291 @@
+"""Incrementally maintained monthly rollups (see models/monthly_rollup.py).
+
+Every write path that changes a transaction's (date, amount, category,
+merchant) feeds the change here as +1/-1 row deltas:
+
+* ORM unit-of-work changes (session.add / attribute edits / session.delete)
+  are captured by the session flush hooks registered at import time;
+* Core bulk statements (upload inserts, bulk category updates, cluster
+  renames, wipes) call `apply_frame`, `apply_rows`, `recategorize`,
+  `rename_category` or `clear` explicitly.
+
+Because every transaction change passes through here, applying a delta also
+bumps the dataset version (utils/dataset_version.py) in the same transaction.
+
+Read helpers return per-category / per-month / per-merchant totals straight
+from the rollup table, so analytics cost O(months x categories x merchants)
+instead of O(transactions).
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import case, delete, event, func, insert, select, text
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from backend.db import connection_for, dialect_insert
+from backend.models.merchant import Merchant, MerchantAlias
+from backend.models.monthly_rollup import MonthlyRollup
+from backend.models.transaction import Transaction
+from backend.utils import dataset_version
+from backend.utils.lazy import lazy_module
+
+pd = lazy_module('pandas')
+
+TRACKED = ('date', 'amount', 'category', 'merchant')
+_T = MonthlyRollup.__table__
+
+
+def month_key(d) -> str:
+    if isinstance(d, str):
+        return d[:7]
+    return f"{d.year:04d}-{d.month:02d}"
+
+
+def _sign(amount: float) -> int:
+    return 1 if amount > 0 else (-1 if amount < 0 else 0)
+
+
+def _key(d, amount, category, merchant):
+    return (month_key(d), category or '', merchant or '', _sign(amount))
+
+
+def _apply(conn, deltas: dict):
+    """Add {(month, category, merchant, sign): [total, count]} onto the table.
+
+    One INSERT ... ON CONFLICT DO UPDATE per batch, so concurrent writers that
+    both create the same key add up instead of colliding on uq_monthly_rollups_key.
+    """
+    deltas = {k: v for k, v in deltas.items() if v[1] or v[0]}
+    if not deltas:
+        return
+    stmt = dialect_insert(conn, _T)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['month', 'category', 'merchant', 'sign'],
+        set_={'total': _T.c.total + stmt.excluded.total, 'count': _T.c.count + stmt.excluded.count},
+    )
+    conn.execute(stmt, [
+        {'month': m, 'category': c, 'merchant': mer, 'sign': s, 'total': total, 'count': count}
+        for (m, c, mer, s), (total, count) in deltas.items()
+    ])
+    if any(count < 0 for _, count in deltas.values()):
+        months = sorted({k[0] for k in deltas})
+        conn.execute(delete(_T).where(_T.c.count <= 0, _T.c.month.in_(months)))
+    dataset_version.bump(conn)
+
+
+def apply_rows(db, rows, direction: int = 1):
+    """rows: iterable of (date, amount, category, merchant)."""
+    deltas = defaultdict(lambda: [0.0, 0])
+    for d, amount, category, merchant in rows:
+        acc = deltas[_key(d, amount, category, merchant)]
+        acc[0] += direction * float(amount)
+        acc[1] += direction
+    _apply(connection_for(db), deltas)
+
+
+def apply_frame(db, frame: pd.DataFrame, direction: int = 1):
+    """Vectorized `apply_rows` for a normalized upload frame (date, amount, category, merchant columns)."""
+    if frame.empty:
+        return
+    amount = frame['amount'].astype(float)
+    keys = pd.DataFrame({
+        'month': frame['date'].map(month_key),
+        'category': frame['category'].where(frame['category'].notna(), '').astype(str),
+        'merchant': frame['merchant'].where(frame['merchant'].notna(), '').astype(str),
+        'sign': (amount > 0).astype(int) - (amount < 0).astype(int),
+        'amount': amount,
+    })
+    grouped = keys.groupby(['month', 'category', 'merchant', 'sign'], sort=False)['amount'].agg(['sum', 'count'])
+    deltas = {
+        (m, c, mer, int(s)): [direction * float(total), direction * int(n)]
+        for (m, c, mer, s), total, n in zip(grouped.index, grouped['sum'], grouped['count'])
+    }
+    _apply(connection_for(db), deltas)
+
+
+def recategorize(db, rows):
+    """rows: iterable of (date, amount, merchant, old_category, new_category)."""
+    rows = [r for r in rows if (r[3] or '') != (r[4] or '')]
+    if not rows:
+        return
+    deltas = defaultdict(lambda: [0.0, 0])
+    for d, amount, merchant, old, new in rows:
+        for category, direction in ((old, -1), (new, 1)):
+            acc = deltas[_key(d, amount, category, merchant)]
+            acc[0] += direction * float(amount)
+            acc[1] += direction
+    _apply(connection_for(db), deltas)
+
+
+def rename_category(db, old: str, new: str):
+    """Move every rollup row of category `old` onto `new` (mirrors a bulk Transaction.category rename)."""
+    conn = connection_for(db)
+    rows = conn.execute(select(_T.c.month, _T.c.merchant, _T.c.sign, _T.c.total, _T.c.count).where(_T.c.category == (old or ''))).all()
+    if not rows:
+        return
+    deltas = defaultdict(lambda: [0.0, 0])
+    for month, merchant, sign, total, count in rows:
+        deltas[(month, old or '', merchant, sign)] = [-total, -count]
+        acc = deltas[(month, new or '', merchant, sign)]
+        acc[0] += total
+        acc[1] += count
+    _apply(conn, deltas)
+
+
+def clear(db):
+    conn = connection_for(db)
+    conn.execute(delete(_T))
+    dataset_version.bump(conn)
+
+
+def month_expr(dialect_name: str, column):
+    if dialect_name == 'postgresql':
+        return func.to_char(column, 'YYYY-MM')
+    return func.strftime('%Y-%m', column)
+
+
+def rebuild(db) -> int:
+    """Recompute the whole table from `transactions` with one INSERT ... SELECT."""
+    conn = connection_for(db)
+    tx = Transaction.__table__
+    sign = case((tx.c.amount > 0, 1), (tx.c.amount < 0, -1), else_=0)
+    source = select(
+        month_expr(conn.dialect.name, tx.c.date).label('month'),
+        func.coalesce(tx.c.category, '').label('category'),
+        func.coalesce(tx.c.merchant, '').label('merchant'),
+        sign.label('sign'),
+        func.sum(tx.c.amount).label('total'),
+        func.count().label('count'),
+    ).group_by(text('1'), text('2'), text('3'), text('4'))
+    conn.execute(delete(_T))
+    conn.execute(insert(_T).from_select(['month', 'category', 'merchant', 'sign', 'total', 'count'], source))
+    dataset_version.bump(conn)
+    return conn.execute(select(func.count()).select_from(_T)).scalar() or 0
+
+
+# --- readers -----------------------------------------------------------------
+
+def category_totals(db: Session, since_month: str | None = None, until_month: str | None = None):
+    """[(category or None, income, spend_as_negative_sum, count)] over an inclusive month range."""
+    q = select(
+        _T.c.category,
+        func.sum(case((_T.c.sign > 0, _T.c.total), else_=0.0)),
+        func.sum(case((_T.c.sign < 0, _T.c.total), else_=0.0)),
+        func.sum(_T.c.count),
+    )
+    if since_month:
+        q = q.where(_T.c.month >= since_month)
+    if until_month:
+        q = q.where(_T.c.month <= until_month)
+    return [(c or None, float(i or 0), float(s or 0), int(n or 0)) for c, i, s, n in db.execute(q.group_by(_T.c.category)).all()]
+
+
+def compare_months(db: Session, this_month: str, prev_month: str):
+    """[(category or None, this income, this spend_neg, prev spend_neg)] from one conditional-SUM query."""
+    this, prev = _T.c.month == this_month, _T.c.month == prev_month
+    q = select(
+        _T.c.category,
+        func.sum(case((this & (_T.c.sign > 0), _T.c.total), else_=0.0)),
+        func.sum(case((this & (_T.c.sign < 0), _T.c.total), else_=0.0)),
+        func.sum(case((prev & (_T.c.sign < 0), _T.c.total), else_=0.0)),
+    ).where(_T.c.month.in_([this_month, prev_month])).group_by(_T.c.category)
+    return [(c or None, float(i or 0), float(s or 0), float(p or 0)) for c, i, s, p in db.execute(q).all()]
+
+
+def month_totals(db: Session, since_month: str | None = None):
+    """[(month, income, spend_as_negative_sum)] ordered by month."""
+    q = select(
+        _T.c.month,
+        func.sum(case((_T.c.sign > 0, _T.c.total), else_=0.0)),
+        func.sum(case((_T.c.sign < 0, _T.c.total), else_=0.0)),
+    )
+    if since_month:
+        q = q.where(_T.c.month >= since_month)
+    return [(m, float(i or 0), float(s or 0)) for m, i, s in db.execute(q.group_by(_T.c.month).order_by(_T.c.month)).all()]
+
+
+def categories_matching(db: Session, pattern: str) -> list:
+    """Distinct non-empty categories matching an ILIKE pattern, read from the (small) rollup table."""
+    q = select(_T.c.category).where(_T.c.category != '', _T.c.category.ilike(pattern)).distinct()
+    return [c for (c,) in db.execute(q).all()]
+
+
+def merchant_totals(db: Session, limit: int | None = None):
+    """[(canonical merchant name or None, count, income, spend_as_negative_sum)], largest spend first.
+
+    Rollup rows stay keyed by the raw merchant string; spelling variants are
+    merged here through `merchant_aliases`, which holds one row per distinct
+    raw string, so the join costs no more than the rollup table itself.
+    """
+    spend = func.sum(case((_T.c.sign < 0, _T.c.total), else_=0.0))
+    q = select(
+        Merchant.name,
+        func.sum(_T.c.count),
+        func.sum(case((_T.c.sign > 0, _T.c.total), else_=0.0)),
+        spend,
+    ).select_from(_T).outerjoin(MerchantAlias, MerchantAlias.raw == _T.c.merchant).outerjoin(
+        Merchant, Merchant.id == MerchantAlias.merchant_id,
+    ).group_by(MerchantAlias.merchant_id, Merchant.name).order_by(spend.asc(), Merchant.name)
+    if limit:
+        q = q.limit(limit)
+    return [(m or None, int(n or 0), float(i or 0), float(s or 0)) for m, n, i, s in db.execute(q).all()]
+
+
+# --- ORM unit-of-work capture ------------------------------------------------
+
+def _current(obj):
+    return tuple(getattr(obj, name) for name in TRACKED)
+
+
+def _committed(obj):
+    state = sa_inspect(obj)
+    values = []
+    for name in TRACKED:
+        hist = state.attrs[name].history
+        if hist.deleted:
+            values.append(hist.deleted[0])
+        elif hist.unchanged:
+            values.append(hist.unchanged[0])
+        else:
+            values.append(getattr(obj, name))
+    return tuple(values)
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_transaction_changes(session, flush_context, instances):
+    pending = session.info.setdefault('rollup_rows', [])
+    for obj in session.new:
+        if isinstance(obj, Transaction) and obj.date is not None and obj.amount is not None:
+            pending.append((_current(obj), 1))
+    for obj in session.deleted:
+        if isinstance(obj, Transaction):
+            pending.append((_committed(obj), -1))
+    for obj in session.dirty:
+        if isinstance(obj, Transaction) and session.is_modified(obj, include_collections=False):
+            old, new = _committed(obj), _current(obj)
+            if old != new:
+                pending.append((old, -1))
+                pending.append((new, 1))
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_transaction_changes(session, flush_context):
+    pending = session.info.pop('rollup_rows', None)
+    if not pending:
+        return
+    deltas = defaultdict(lambda: [0.0, 0])
+    for (d, amount, category, merchant), direction in pending:
+        if isinstance(d, str):
+            d = date.fromisoformat(d)
+        acc = deltas[_key(d, float(amount), category, merchant)]
+        acc[0] += direction * float(amount)
+        acc[1] += direction
+    _apply(session.connection(), deltas)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop('rollup_rows', None)
@@ -0,0 +1,117 @@
+"""One-time schema upgrade run at application startup.
+
+`ensure_schema` creates missing tables, then compares the `schema_version`
+marker in `schema_meta` with SCHEMA_VERSION. Only when they differ does it
+inspect the live schema (through SQLAlchemy's inspector, so SQLite and
+Postgres both work) and add columns that older deployments created with
+`create_all` are missing, creates indexes declared after the table existed
+(version 3: models/transaction_indexes.py) and backfills derived tables
+introduced since the stored version (version 2: `monthly_rollups`, version 4:
+`merchant_recurrences`, version 5: canonical merchants, which also re-keys
+`merchant_recurrences` on `merchant_id`).
+Request handlers never introspect or alter the schema; alembic-managed
+databases get the same marker from the latest revision
+(`20261016_09_merchants`).
+"""
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Engine
+
+from backend.db import Base, dialect_insert
+from backend.models.merchant import Merchant, MerchantAlias  # noqa: F401  (registers the tables for create_all)
+from backend.models.merchant_recurrence import MerchantRecurrence
+from backend.models.monthly_rollup import MonthlyRollup  # noqa: F401
+from backend.models.schema_meta import SchemaMeta
+from backend.models.transaction_indexes import TRANSACTION_INDEXES
+from backend.utils import merchants, recurrence, rollups
+from backend.utils.logging import logger
+
+SCHEMA_VERSION = '5'
+
+# (table, column, DDL type, default per dialect) added after early deployments
+LEGACY_COLUMNS = [
+    ('transaction_categories', 'promoted', 'BOOLEAN NOT NULL', {'sqlite': '0', 'default': 'FALSE'}),
+    ('transaction_categories', 'original_category', 'VARCHAR NULL', None),
+    ('transactions', 'merchant_id', 'INTEGER NULL', None),
+]
+
+
+def _add_missing_columns(engine: Engine) -> list:
+    added = []
+    inspector = inspect(engine)
+    for table, column, ddl_type, defaults in LEGACY_COLUMNS:
+        if not inspector.has_table(table):
+            continue
+        if column in {c['name'] for c in inspector.get_columns(table)}:
+            continue
+        ddl = f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"
+        if defaults:
+            ddl += f" DEFAULT {defaults.get(engine.dialect.name, defaults['default'])}"
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(ddl))
+            added.append(f"{table}.{column}")
+        except Exception as e:  # another worker may have added it concurrently
+            inspector = inspect(engine)
+            if column not in {c['name'] for c in inspector.get_columns(table)}:
+                raise
+            logger.info("schema_column_added_elsewhere", table=table, column=column, error=str(e))
+    return added
+
+
+def _create_missing_indexes(engine: Engine) -> list:
+    """create_all skips indexes on tables that already exist; add them here."""
+    inspector = inspect(engine)
+    existing = {ix['name'] for ix in inspector.get_indexes('transactions')}
+    created = []
+    for index in TRANSACTION_INDEXES:
+        if index.name not in existing:
+            index.create(bind=engine, checkfirst=True)
+            created.append(index.name)
+    return created
+
+
+def _rekey_recurrences(engine: Engine) -> bool:
+    """Version 4 keyed merchant_recurrences on the raw merchant string; recreate it (it is rebuilt right after)."""
+    columns = {c['name'] for c in inspect(engine).get_columns(MerchantRecurrence.__tablename__)}
+    if 'merchant_id' in columns:
+        return False
+    table = MerchantRecurrence.__table__
+    table.drop(bind=engine)
+    table.create(bind=engine)
+    return True
+
+
+def schema_version(engine: Engine) -> str | None:
+    with engine.connect() as conn:
+        return conn.execute(select(SchemaMeta.value).where(SchemaMeta.key == 'schema_version')).scalar()
+
+
+def ensure_schema(engine: Engine) -> dict:
+    """Create tables and bring legacy schemas up to SCHEMA_VERSION; returns what was done."""
+    Base.metadata.create_all(bind=engine)
+    current = schema_version(engine)
+    if current == SCHEMA_VERSION:
+        return {"version": current, "upgraded": False, "columns_added": []}
+    added = _add_missing_columns(engine)
+    indexes = _create_missing_indexes(engine)
+    _rekey_recurrences(engine)
+    with engine.begin() as conn:
+        # Claim the upgrade by writing the marker first: every worker runs this at import, and a
+        # worker that finds the marker already at SCHEMA_VERSION (it waits on the row until the
+        # upgrading worker commits) changes nothing and skips the rebuilds
+        table = SchemaMeta.__table__
+        stmt = dialect_insert(conn, table).values(key='schema_version', value=SCHEMA_VERSION)
+        claimed = conn.execute(stmt.on_conflict_do_update(
+            index_elements=['key'], set_={'value': SCHEMA_VERSION}, where=table.c.value != SCHEMA_VERSION,
+        )).rowcount
+        if not claimed:
+            return {"version": SCHEMA_VERSION, "upgraded": False, "columns_added": added}
+        rollup_rows = rollups.rebuild(conn) if current in (None, '1') else None
+        merchant_aliases = merchants.backfill(conn) if current in (None, '1', '2', '3', '4') else None
+        recurrence_rows = recurrence.rebuild(conn) if current in (None, '1', '2', '3', '4') else None
+    logger.info("schema_upgraded", previous=current, version=SCHEMA_VERSION, columns_added=added, indexes_created=indexes, rollup_rows=rollup_rows, merchant_aliases=merchant_aliases, recurrence_rows=recurrence_rows)
+    return {
+        "version": SCHEMA_VERSION, "upgraded": True, "columns_added": added,
+        "indexes_created": indexes, "rollup_rows": rollup_rows,
+        "merchant_aliases": merchant_aliases, "recurrence_rows": recurrence_rows,
+    }
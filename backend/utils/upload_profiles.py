@@ -0,0 +1,99 @@
+"""Reusable upload schema profiles and server-held frames awaiting confirmation.
+
+A profile remembers, per bank export layout, the delimiter and which column was
+picked as `description`. Layouts are identified by a sha1 of the header line,
+which can be computed from the raw bytes before any parsing, so a known layout
+skips delimiter sniffing, candidate scoring and the confirmation round-trip.
+
+When confirmation is still needed, the parsed frame is parked in memory under
+a short-lived token so the follow-up request does not have to resend the file.
+"""
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.db import dialect_insert
+from backend.models.upload_profile import UploadSchemaProfile
+
+HOLD_TTL_SECONDS = int(os.getenv('UPLOAD_CONFIRM_TTL_SECONDS', '600') or 600)
+MAX_HELD_FRAMES = int(os.getenv('UPLOAD_CONFIRM_MAX_HELD', '4') or 4)
+
+_LOCK = threading.Lock()
+_HELD: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+
+
+def header_line(text: str) -> str | None:
+    """First line pandas would treat as the header (skips blanks and '#' comments)."""
+    for line in text.splitlines():
+        stripped = line.strip().lstrip('\ufeff').strip()
+        if stripped and not stripped.startswith('#'):
+            return stripped
+    return None
+
+
+def header_signature(text: str) -> str | None:
+    line = header_line(text)
+    if line is None:
+        return None
+    return hashlib.sha1(line.lower().encode('utf-8')).hexdigest()
+
+
+def find_profile(db: Session, signature: str | None) -> UploadSchemaProfile | None:
+    if not signature:
+        return None
+    return db.query(UploadSchemaProfile).filter(UploadSchemaProfile.signature == signature).first()
+
+
+def touch_profile(profile: UploadSchemaProfile):
+    profile.use_count = (profile.use_count or 0) + 1
+    profile.last_used_at = datetime.now(timezone.utc)
+
+
+def save_profile(db: Session, signature: str | None, delimiter: str, columns: list, description_source: str) -> bool:
+    """Create or refresh the profile for a layout (caller commits). Returns True if written."""
+    if not signature or not description_source:
+        return False
+    table = UploadSchemaProfile.__table__
+    values = {
+        'delimiter': delimiter,
+        'columns': json.dumps(list(columns)),
+        'description_source': description_source,
+        'last_used_at': datetime.now(timezone.utc),
+    }
+    # Upsert: concurrent uploads of the same new layout must not collide on the unique signature
+    stmt = dialect_insert(db, table).values(signature=signature, use_count=1, **values)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=['signature'],
+        set_={**values, 'use_count': func.coalesce(table.c.use_count, 0) + 1},
+    ))
+    return True
+
+
+def hold_frame(payload: dict, token: str | None = None) -> str:
+    """Park a parsed frame (plus request context) and return a one-time token."""
+    token = token or secrets.token_urlsafe(16)
+    now = time.time()
+    with _LOCK:
+        for key in [k for k, (exp, _) in _HELD.items() if exp < now]:
+            del _HELD[key]
+        _HELD[token] = (now + HOLD_TTL_SECONDS, payload)
+        while len(_HELD) > MAX_HELD_FRAMES:
+            _HELD.popitem(last=False)
+    return token
+
+
+def claim_frame(token: str) -> dict | None:
+    """Pop a held frame; None if unknown or expired."""
+    with _LOCK:
+        entry = _HELD.pop(token, None)
+    if entry is None or entry[0] < time.time():
+        return None
+    return entry[1]
@@ -0,0 +1,43 @@
+"""Optional warm-up for the lazily imported scientific stack (utils/lazy.py).
+
+With WARMUP_ON_STARTUP=true the app imports NumPy, pandas and Prophet (when
+installed) in a background thread once it has started, and primes the
+forecast worker pool the same way, so the first upload or forecast does not
+pay those imports while /health is already answering. It is off by default:
+a worker that never serves those requests never loads them.
+"""
+import importlib
+import os
+import threading
+import time
+
+from backend.utils import forecast_cache, forecasting
+from backend.utils.logging import logger
+
+MODULES = ('numpy', 'pandas')
+
+
+def enabled() -> bool:
+    # Read at startup rather than import so a .env loaded by main.py applies
+    return os.getenv('WARMUP_ON_STARTUP', 'false').lower() in ('1', 'true', 'yes')
+
+
+def warm_up() -> dict:
+    """Import the heavy modules now; returns seconds spent per module."""
+    timings = {}
+    for name in MODULES:
+        start = time.perf_counter()
+        importlib.import_module(name)  # the lazy proxies resolve to these on first use
+        timings[name] = round(time.perf_counter() - start, 4)
+    start = time.perf_counter()
+    forecasting.prophet_available()
+    timings['prophet'] = round(time.perf_counter() - start, 4)
+    forecast_cache.prime()
+    logger.info("warmup_done", seconds=timings)
+    return timings
+
+
+def start() -> threading.Thread:
+    thread = threading.Thread(target=warm_up, name='warmup', daemon=True)
+    thread.start()
+    return thread
@@ -37,6 +37,7 @@ export default function ForecastPage({ API }) {
           <select value={method} onChange={e=>setMethod(e.target.value)} className="border rounded px-2 py-1 text-sm">
             <option value="auto">Auto</option>
             <option value="prophet">Prophet</option>
+            <option value="ets">Holt-Winters</option>
             <option value="simple">Simple</option>
           </select>
         </div>
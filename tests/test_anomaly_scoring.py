@@ -0,0 +1,38 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from backend.utils.anomaly import score_expenses
+
+
+def _frame(rows):
+    start = date(2026, 1, 1)
+    return pd.DataFrame(
+        [(i + 1, start + timedelta(days=i), desc, amount, category, merchant) for i, (desc, amount, category, merchant) in enumerate(rows)],
+        columns=['id', 'date', 'description', 'amount', 'category', 'merchant'],
+    )
+
+
+def test_robust_scores_use_most_specific_baseline():
+    rows = [('Latte', -(4.5 + 0.1 * (i % 3)), 'Food & Drink', 'Starbucks') for i in range(12)]
+    rows += [('Catering order', -60.0, 'Food & Drink', 'Starbucks')]
+    rows += [('Rent', -1500.0, 'Housing', 'Landlord') for _ in range(6)]
+    rows += [('Dinner', -40.0, 'Food & Drink', 'Bistro'), ('Vet', -400.0, None, 'VetCare')]
+    scored = score_expenses(_frame(rows), min_group_size=5)
+    by_desc = scored.set_index('description')
+    assert by_desc.loc['Catering order', 'basis'] == 'merchant'
+    assert by_desc.loc['Catering order', 'score'] > 20
+    assert (scored.loc[scored['description'] == 'Latte', 'score'].abs() < 3.5).all()
+    # Fixed-price charges have MAD 0: the scale floor keeps them at score 0, not NaN/inf
+    rent = scored[scored['description'] == 'Rent']
+    assert (rent['score'] == 0).all() and (rent['basis'] == 'merchant').all()
+    # Too few Bistro rows -> category baseline; no merchant/category peers -> global
+    assert by_desc.loc['Dinner', 'basis'] == 'category'
+    assert by_desc.loc['Vet', 'basis'] == 'global' and by_desc.loc['Vet', 'score'] > 3.5
+    assert np.isfinite(scored['score']).all()
+
+
+def test_small_history_is_not_scored():
+    scored = score_expenses(_frame([('A', -10.0, 'X', 'M'), ('B', -900.0, 'X', 'M')]), min_group_size=5)
+    assert scored['score'].isna().all() and scored['basis'].isna().all()
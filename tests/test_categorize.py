@@ -0,0 +1,47 @@
+import asyncio
+import re
+
+import pandas as pd
+
+from backend.routes.enrichment import SimpleModelClient
+from backend.utils.categorize import CATEGORY_RULES, WHOLE_WORD_KEYWORDS, categorize_text, classify_series
+from backend.utils.enrich import build_prompt
+
+
+def _first_rule(text):
+    low = text.lower()
+    for label, confidence, words in CATEGORY_RULES:
+        if any(re.search(rf"\b{w}\b", low) if w in WHOLE_WORD_KEYWORDS else w in low for w in words):
+            return label, confidence
+    return None, None
+
+
+def test_compiled_rules_match_per_rule_scan_and_enrich_client():
+    samples = [
+        ('Starbucks grocery run', ''), ('Monthly RENT', 'Landlord LLC'), ('Uber trip', 'UBER'),
+        ('Payroll ACME', 'Employer'), ('Random Item', 'ShopX'), ('Spotify', None), ('Cinema tickets', 'AMC'),
+        ('Business lunch', ''), ('Gas station', 'Shell'), ('Apple Store', None),
+    ]
+    for desc, merchant in samples:
+        assert categorize_text(desc, merchant) == _first_rule(f"{desc} {merchant or ''}"), desc
+    frame = classify_series(pd.Series([d for d, _ in samples]), pd.Series([m for _, m in samples]))
+    client = SimpleModelClient()
+    for (desc, merchant), (_, row) in zip(samples, frame.iterrows()):
+        expected = categorize_text(desc, merchant)[0]
+        assert (row['category'] if pd.notna(row['category']) else None) == expected
+        resp = asyncio.run(client.categorize(build_prompt(desc, merchant)))
+        assert resp['category'] == (expected or 'Other')
+
+
+def test_short_keywords_match_whole_words_only():
+    for text in ('Business lunch', 'Las Vegas hotel', 'Current account fee', 'Parent teacher assoc',
+                 'Restore hardware', 'Small batch bakery', 'Shellfish platter'):
+        assert categorize_text(text) == (None, None), text
+    assert categorize_text('City bus pass')[0] == 'Transport'
+    assert categorize_text('Monthly rent')[0] == 'Housing'
+    assert categorize_text('Corner store')[0] == 'Shopping'
+    assert categorize_text('Supermarket run')[0] == 'Groceries'  # other keywords still match inside words
+
+
+def test_groceries_outrank_food_and_drink():
+    assert categorize_text('Starbucks Market St') == ('Groceries', 0.92)
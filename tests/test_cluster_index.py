@@ -0,0 +1,44 @@
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from backend.db import Base, SessionLocal, engine
+from backend.main import app
+from backend.models.transaction import Transaction
+
+client = TestClient(app)
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add_all([
+        Transaction(date=date(2025, 7, d), description='Blue Bottle latte', amount=-5.0, merchant='BlueBottle', category=None)
+        for d in (1, 2, 3)
+    ] + [
+        Transaction(date=date(2025, 7, d), description='Parking garage fee', amount=-12.0, merchant='CityPark', category=None)
+        for d in (4, 5)
+    ])
+    db.commit()
+    db.close()
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_clusters_persist_and_new_uploads_join_renamed_label():
+    first = client.post('/enrich/?cluster_mode=true&promote=false&only_uncategorized=false').json()
+    labels = sorted(c['label'] for c in first['clusters'])
+    assert labels == ['Cluster: blue_bluebottle', 'Cluster: citypark_fee']
+    assert first['index_entries'] == 2
+    again = client.post('/enrich/?cluster_mode=true&recluster=true&promote=false&only_uncategorized=false').json()
+    assert sorted(c['label'] for c in again['clusters']) == labels  # same seeds, same labels
+
+    r = client.post('/enrich/rename_cluster', json={'old_label': 'Cluster: blue_bluebottle', 'new_label': 'Coffee shops'})
+    assert r.json()['status'] == 'renamed'
+    csv_content = "date,description,amount,merchant\n2025-07-09,Blue Bottle latte,-5.50,BlueBottle\n2025-07-09,Hardware,-9.00,Tools\n"
+    up = client.post('/upload', files={'file': ('new.csv', csv_content, 'text/csv')}).json()
+    assert up['clustered'] == 1
+    latest = client.get('/enrich/latest?limit=1').json()[0]
+    assert latest['category'] == 'Coffee shops' and latest['model'] == 'cluster-index'
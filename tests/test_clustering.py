@@ -0,0 +1,23 @@
+from pathlib import Path
+
+import pandas as pd
+
+from backend.utils.clustering import cluster_exact, cluster_token_sets, tokenize
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _canonical(clusters):
+    return sorted(tuple(sorted(members)) for members, _ in clusters)
+
+
+def test_lsh_clusters_match_exact_on_sample_data():
+    df = pd.read_csv(ROOT / 'sample_data' / 'transactions_sample.csv')
+    sets = [tokenize(d, m) for d, m in zip(df['description'], df['merchant'].fillna(''))]
+    sets += [frozenset(), frozenset()]  # empty descriptions never join a cluster
+    for threshold in (0.3, 0.5, 0.8):
+        for min_size in (1, 2):
+            exact = cluster_exact(sets, threshold, min_size)
+            lsh = cluster_token_sets(sets, threshold, min_size)
+            assert _canonical(lsh) == _canonical(exact)
+            assert sorted(map(sorted, (s for _, s in lsh))) == sorted(map(sorted, (s for _, s in exact)))
@@ -0,0 +1,42 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+from backend.db import Base, SessionLocal, engine
+from backend.main import app
+from backend.models.transaction import Transaction
+
+client = TestClient(app)
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_dashboard_sql_aggregates():
+    today = date.today()
+    last = today - timedelta(days=20)
+    db = SessionLocal()
+    db.add_all(
+        [Transaction(date=last - timedelta(days=30 * k), description='Gym plan', amount=-30.0 - k, merchant='Gym', category='Health') for k in range(3)]
+        + [Transaction(date=today - timedelta(days=20 + 30 * k), description='Cloud', amount=-5.0, merchant='Cloud', category=None) for k in range(2)]
+        + [Transaction(date=today.replace(day=1), description=f'Buy {i}', amount=-float(i), merchant='Shop', category='Shopping') for i in range(1, 8)]
+        + [Transaction(date=today.replace(day=1), description='Salary', amount=1000.0, merchant='Employer', category='Income')]
+    )
+    db.commit()
+    db.close()
+    data = client.get('/dashboard').json()
+    assert [e['amount'] for e in data['largest_expenses']] == [-7.0, -6.0, -5.0, -4.0, -3.0]
+    assert data['mtd_income'] == 1000.0 and data['mtd_spend'] >= 28.0
+    # Same recurrence rules as /subscriptions: two monthly Cloud charges already count as recurring
+    assert data['upcoming_subscriptions'] == [
+        {'merchant': 'Cloud', 'last_amount': -5.0, 'next_estimate': (last + timedelta(days=30)).isoformat()},
+        {'merchant': 'Gym', 'last_amount': -30.0, 'next_estimate': (last + timedelta(days=30)).isoformat()},
+    ]
+    subs = client.get('/subscriptions').json()['subscriptions']
+    due = sorted(s['merchant'] for s in subs if s['estimated_next_charge'] and s['estimated_next_charge'] <= (today + timedelta(days=14)).isoformat())
+    assert due == [u['merchant'] for u in data['upcoming_subscriptions']]
@@ -0,0 +1,41 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from backend.db import Base, apply_sqlite_pragmas, engine, engine_options
+from backend.main import app
+
+client = TestClient(app)
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_sqlite_pragmas(tmp_path):
+    url = f"sqlite:///{tmp_path / 'pragmas.db'}"
+    file_engine = create_engine(url, **engine_options(url))
+    apply_sqlite_pragmas(file_engine)
+    try:
+        with file_engine.connect() as conn:
+            assert conn.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+            assert conn.exec_driver_sql('PRAGMA busy_timeout').scalar() == 5000
+    finally:
+        file_engine.dispose()
+
+
+def test_pool_metrics():
+    client.get('/insights')
+    body = client.get('/metrics').text
+    assert 'db_pool_checkouts_total{engine="sync"}' in body
+    assert 'db_pool_checkout_wait_seconds_bucket' in body
+    assert 'db_pool_checked_out{engine="sync"}' in body
+
+
+def test_postgres_pool_options():
+    opts = engine_options('postgresql+psycopg://u@localhost/app')
+    assert opts['pool_pre_ping'] is True and opts['pool_recycle'] == 1800
+    assert opts['pool_size'] == 5 and opts['max_overflow'] == 10
@@ -0,0 +1,86 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from backend.db import Base, SessionLocal, engine
+from backend.main import app
+from backend.models.monthly_rollup import MonthlyRollup
+from backend.models.transaction import Transaction
+from backend.models.transaction_fingerprint import TransactionFingerprint
+from backend.utils import rollups
+
+client = TestClient(app)
+GROUPS = 40
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    today = date.today()
+    rows = []
+    for g in range(GROUPS):
+        d = today - timedelta(days=g % 30)
+        # Three copies per group; NULL and blank merchants/categories compare equal
+        rows += [
+            Transaction(date=d, description='Coffee', amount=-4.5 - g, merchant=None if g % 2 else '', category='Food & Drink'),
+            Transaction(date=d, description='Coffee', amount=-4.5 - g, merchant='' if g % 2 else None, category='Food & Drink'),
+            Transaction(date=d, description='Coffee', amount=-4.5 - g, merchant=None, category='Food & Drink'),
+        ]
+    rows += [
+        Transaction(date=today, description='One-off', amount=-99.0, merchant='Solo', category='Shopping'),
+        Transaction(date=today, description='Refund', amount=99.0, merchant='Solo', category='Shopping'),
+    ]
+    db.add_all(rows)
+    db.commit()
+    db.add_all([TransactionFingerprint(fingerprint=f'fp{t.id}', transaction_id=t.id) for t in rows])
+    db.commit()
+    db.close()
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def _snapshot(db):
+    return {(r.month, r.category, r.merchant, r.sign): (round(r.total, 6), r.count) for r in db.query(MonthlyRollup).all()}
+
+
+def test_set_based_dedupe_in_constant_statements():
+    groups = client.get('/anomalies/').json()['duplicates']
+    assert len(groups) == GROUPS and all(g['count'] == 3 for g in groups)
+    ids = [t['id'] for g in groups for t in g['transactions']]
+
+    db = SessionLocal()
+    solo = db.query(Transaction).filter(Transaction.merchant == 'Solo').order_by(Transaction.amount).all()
+    db.close()
+    assert client.post('/anomalies/dedupe', json={'transaction_ids': [solo[0].id]}).status_code == 400  # group of one
+    assert client.post('/anomalies/dedupe', json={'transaction_ids': [solo[1].id]}).status_code == 400  # not an expense
+    assert client.post('/anomalies/dedupe', json={'transaction_ids': [10**9]}).status_code == 404
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        r = client.post('/anomalies/dedupe', json={'transaction_ids': ids, 'keep_one_per_group': True})
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body['deleted_count'] == 2 * GROUPS
+    assert sorted(body['skipped_ids']) == sorted(min(t['id'] for t in g['transactions']) for g in groups)
+    touching = [s for s in statements if 'transactions' in s]
+    assert len(touching) <= 5, touching  # lookup, window validation, tombstones, one DELETE
+    assert sum(s.lstrip().upper().startswith('DELETE FROM TRANSACTIONS') for s in statements) == 1
+
+    assert client.get('/anomalies/').json()['duplicates'] == []
+    db = SessionLocal()
+    assert db.query(TransactionFingerprint).filter(TransactionFingerprint.transaction_id.is_(None)).count() == 2 * GROUPS
+    maintained = _snapshot(db)
+    rollups.rebuild(db)
+    assert maintained == _snapshot(db)
+    db.rollback()
+    db.close()
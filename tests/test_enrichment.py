@@ -25,4 +25,57 @@ def test_enrichment_flow():
     data = r.json()
     assert data['enriched'] >= 1
     latest = client.get('/enrich/latest').json()
-    assert len(latest) >= 1
\ No newline at end of file
+    assert len(latest) >= 1
+
+def test_batched_concurrent_model_categorization():
+    import asyncio
+    import json
+    from backend.utils.enrich import BATCH_MARKER, categorize_with_model
+
+    class SlowClient:
+        def __init__(self):
+            self.in_flight = self.peak = self.batch_calls = 0
+
+        async def categorize(self, prompt, model='m'):
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            await asyncio.sleep(0.02)
+            self.in_flight -= 1
+            return {'category': 'Other', 'confidence': 0.5}
+
+        async def categorize_batch(self, prompt, model='m'):
+            self.batch_calls += 1
+            items = json.loads(prompt.split(BATCH_MARKER, 1)[1])
+            await asyncio.sleep(0.02)
+            return json.dumps([{'index': i['index'], 'category': 'Shopping', 'confidence': 0.9} for i in items])
+
+    db = SessionLocal()
+    db.add_all([Transaction(date=date.today(), description=f'Item {i}', amount=-1.0, merchant='M', category=None) for i in range(40)])
+    db.commit()
+    txns = db.query(Transaction).filter(Transaction.description.like('Item %')).all()
+    client_ = SlowClient()
+    single = asyncio.run(categorize_with_model(db, client_, txns, model_name='m', promote=False, concurrency=8, use_cache=False))
+    assert len(single['processed_ids']) == 40 and client_.peak == 8
+    batched = asyncio.run(categorize_with_model(db, client_, txns, model_name='m', concurrency=2, batch_size=15, use_cache=False))
+    assert client_.batch_calls == 3 and len(batched['promoted_ids']) == 40
+    db.close()
+
+def test_categorization_cache_skips_repeat_descriptions():
+    r1 = client.post('/enrich/?only_uncategorized=false&include_already_enriched=true&promote=false&limit=500').json()
+    assert r1['cache']['sent_to_model'] <= r1['cache']['misses']
+    r2 = client.post('/enrich/?only_uncategorized=false&include_already_enriched=true&promote=false&limit=500').json()
+    assert r2['cache']['sent_to_model'] == 0
+    assert r2['cache']['hit_ratio'] == 1.0
+
+def test_categorization_cache_store_overwrites_existing_answer():
+    from backend.models.categorization_cache import CategorizationCache
+    from backend.utils import category_cache
+
+    db = SessionLocal()
+    key = category_cache.cache_key('Desk lamp', 'LampCo')
+    category_cache.store(db, {key: ('Shopping', 0.6)}, 'm-store')
+    category_cache.store(db, {key: ('Home', 0.9)}, 'm-store')  # e.g. a concurrent worker answering again
+    db.commit()
+    rows = db.query(CategorizationCache).filter_by(text_hash=key, model='m-store').all()
+    assert [(r.category, r.confidence) for r in rows] == [('Home', 0.9)]
+    db.close()
@@ -0,0 +1,34 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from backend.utils import ets
+from backend.utils.forecasting import fit_forecast
+
+WEEK = np.array([10.0, 0.0, 0.0, 5.0, 20.0, 40.0, 30.0])
+
+
+def test_holt_winters_recovers_weekly_pattern_and_noise():
+    rng = np.random.default_rng(1)
+    n = 364
+    y = 50 + np.tile(WEEK, n // 7) + rng.normal(0, 8, n)
+    model = ets.fit(y)
+    mean, lower, upper = ets.forecast(model, 28)
+    # The next days continue the weekly cycle (n is a whole number of weeks)
+    assert np.abs(mean[:7] - (50 + WEEK)).max() < 6
+    assert abs(np.sqrt(model['sigma2']) - 8) < 1
+    width = upper - lower
+    assert np.all(np.diff(width) >= -1e-9) and np.allclose(width[0], 2 * ets.INTERVAL_Z * np.sqrt(model['sigma2']))
+
+
+def test_forecast_uses_ets_tier_and_falls_back_on_short_history():
+    today = date.today()
+    rows = [(today - timedelta(days=k), -float(20 + WEEK[(today - timedelta(days=k)).weekday()])) for k in range(1, 57)]
+    result = fit_forecast(rows, 'ets', 30, today=today)['result']
+    assert result['forecast_method'] == 'ets' and len(result['daily_forecast']) == 30
+    day = result['daily_forecast'][0]
+    assert day['lower'] <= day['predicted_spend'] <= day['upper']
+    assert abs(result['next_30d_spend'] - sum(20 + WEEK[(today + timedelta(days=k)).weekday()] for k in range(30))) < 30
+
+    short = fit_forecast(rows[:10], 'ets', 30, today=today)['result']
+    assert short['forecast_method'] == 'ets_fallback' and short['reason'] == 'insufficient_history'
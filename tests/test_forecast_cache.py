@@ -0,0 +1,95 @@
+import time
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+from backend.db import Base, SessionLocal, engine
+from backend.main import app
+from backend.models.transaction import Transaction
+from backend.utils import forecast_cache
+
+client = TestClient(app)
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+    forecast_cache.clear()
+    db = SessionLocal()
+    today = date.today()
+    db.add_all([
+        Transaction(date=today - timedelta(days=k), description='Groceries', amount=-20.0, merchant='Market', category='Groceries')
+        for k in range(1, 41)
+    ])
+    db.commit()
+    db.close()
+
+
+def teardown_module(module):
+    forecast_cache.clear()
+    Base.metadata.drop_all(bind=engine)
+
+
+def _get(**params):
+    body = client.get('/forecast', params={'method': 'simple', 'horizon_days': 30, **params}).json()
+    return body, body.pop('fit_metrics')
+
+
+def test_forecast_is_cached_and_refit_in_the_background():
+    first, metrics = _get()
+    assert metrics['cache'] == 'miss' and metrics['observations'] == 40 and metrics['fit_seconds'] >= 0
+    assert first['next_30d_spend'] == 600.0
+    again, metrics = _get()
+    assert metrics['cache'] == 'hit' and again == first
+    # Each (horizon, method) has its own entry
+    assert _get(horizon_days=60)[1]['cache'] == 'miss'
+
+    csv_content = 'date,description,amount,category,merchant\n' + ''.join(
+        f"{(date.today() - timedelta(days=k)).isoformat()},Dinner,-10.00,Food & Drink,Bistro\n" for k in range(1, 31)
+    )
+    assert client.post('/upload', files={'file': ('f.csv', csv_content, 'text/csv')}).status_code == 200
+    stale, metrics = _get()
+    # The previous forecast is served while the refit runs
+    assert metrics['cache'] == 'stale' and stale == first
+    deadline = time.monotonic() + 30
+    while metrics['cache'] != 'hit' and time.monotonic() < deadline:
+        time.sleep(0.05)
+        fresh, metrics = _get()
+    assert metrics['cache'] == 'hit' and metrics['observations'] == 70
+    assert fresh['next_30d_spend'] == 900.0
+    assert 'forecast_fit_seconds_count' in client.get('/metrics').text
+
+
+def test_stale_request_skips_the_table_read_while_a_refit_is_queued():
+    from concurrent.futures import Future
+
+    from sqlalchemy import event
+
+    from backend.db import async_engine
+    from backend.utils import dataset_version
+
+    _get()  # make sure an entry exists for this key
+    db = SessionLocal()
+    db.add(Transaction(date=date.today(), description='Snack', amount=-3.0, merchant='Kiosk', category='Food & Drink'))
+    db.commit()
+    version = forecast_cache.data_version(dataset_version.current(db))
+    db.close()
+    key = (30, 'simple')
+    pending = Future()  # a refit for this version that has not finished yet
+    forecast_cache._INFLIGHT[key] = (version, pending)
+    reads = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM transactions' in statement:
+            reads.append(statement)
+
+    engines = [engine] + ([async_engine.sync_engine] if async_engine is not None else [])
+    for e in engines:
+        event.listen(e, 'before_cursor_execute', capture)
+    try:
+        _, metrics = _get()
+    finally:
+        for e in engines:
+            event.remove(e, 'before_cursor_execute', capture)
+        forecast_cache._INFLIGHT.pop(key, None)
+    assert metrics['cache'] == 'stale' and metrics['refreshing'] is True
+    assert reads == []
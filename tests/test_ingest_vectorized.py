@@ -0,0 +1,59 @@
+import io
+import os
+
+import pandas as pd
+
+from backend.routes.upload import _remap_headers
+from backend.utils.ingest import normalize_frame, normalize_rows
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+EDGE_CSV = """date,description,amount,merchant,category,txn_type,labels
+2025-01-01,Coffee,3.5,Starbucks,,debit,
+2025/01/02,,10,,Food,,x
+01/03/2025,Salary,2000,Employer,,credit,
+03-01-2025,Refund thing,5,Shop,,,
+bad,Nothing,1,Shop,,,
+2025-01-04,Stuff,abc,Shop,,,
+,Blank,1,,,,
+2025-01-05,Rent,0,Landlord,,,
+2025-01-06,Spotify music,1_000,,,DR,
+2025-1-8,uber ride,12,,,in,
+2025-01-09,x,-4,,  ,,
+2025-13-09,x,-4,,,,
+"""
+
+
+def _assert_parity(df, description_source='description'):
+    fast = normalize_frame(df.copy(), description_source)
+    slow = normalize_rows(df.copy(), description_source)
+    for key in ('records', 'skipped', 'sign_inferred', 'errors'):
+        assert fast[key] == slow[key], key
+    left = fast['frame'].reset_index(drop=True)
+    right = slow['frame'].reset_index(drop=True)
+    assert left.to_dict('records') == right.to_dict('records')
+    return fast
+
+
+def _load(path):
+    df = pd.read_csv(path, comment='#')
+    df.columns = _remap_headers(df.columns)
+    if 'merchant' not in df.columns:
+        df['merchant'] = ''
+    return df
+
+
+def test_parity_on_sample_datasets():
+    for name in ('sample_transactions.csv', 'sample_transactions_rich.csv', 'sample_anomalies.csv'):
+        result = _assert_parity(_load(os.path.join(DATA_DIR, name)))
+        assert result['records'] > 0
+
+
+def test_parity_on_edge_cases():
+    df = pd.read_csv(io.StringIO(EDGE_CSV))
+    result = _assert_parity(df)
+    assert result['skipped'] == 4
+    assert [e['row'] for e in result['errors']] == [4, 5, 6, 11]
+    # description column sourced from the original category column
+    renamed = df.drop(columns=['description']).rename(columns={'category': 'description'})
+    _assert_parity(renamed, description_source='category')
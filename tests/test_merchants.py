@@ -0,0 +1,116 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from backend.db import Base, SessionLocal, engine
+from backend.main import app
+from backend.models.merchant import Merchant, MerchantAlias
+from backend.models.transaction import Transaction
+from backend.utils import merchants
+
+client = TestClient(app)
+VARIANTS = ['NETFLIX.COM 866-579', 'Netflix', 'NETFLIX *2341']
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_merchant_key_strips_reference_noise():
+    assert {merchants.merchant_key(v) for v in VARIANTS} == {'netflix'}
+    assert merchants.merchant_key('SQ *BLUE BOTTLE COFFEE') == merchants.merchant_key('Blue Bottle Coffee')
+    assert merchants.merchant_key('STARBUCKS STORE 12345') == merchants.merchant_key('Starbucks Store')
+    # Short numbers are part of the name
+    assert merchants.merchant_key('Studio 54') != merchants.merchant_key('Studio 55')
+    assert merchants.merchant_key('7-Eleven') == '7eleven'
+    assert merchants.merchant_key('') is None and merchants.merchant_key(None) is None
+    assert merchants.display_name('NETFLIX.COM 866-579') == 'Netflix'
+
+
+def test_spelling_variants_share_one_merchant_across_reports():
+    today = date.today()
+    lines = [
+        f"{(today - timedelta(days=10 + 30 * k)).isoformat()},Streaming,-15.99,Subscriptions,{variant}"
+        for k, variant in enumerate(VARIANTS)
+    ]
+    csv_content = 'date,description,amount,category,merchant\n' + '\n'.join(lines) + '\n'
+    assert client.post('/upload', files={'file': ('m.csv', csv_content, 'text/csv')}).status_code == 200
+
+    db = SessionLocal()
+    assert [m.name for m in db.query(Merchant).all()] == ['Netflix']
+    assert db.query(MerchantAlias).count() == 3
+    ids = {t.merchant: t.merchant_id for t in db.query(Transaction).all()}
+    assert len(set(ids.values())) == 1
+    # ORM writes resolve through the same aliases; a blank merchant has none
+    db.add_all([
+        Transaction(date=today, description='Streaming', amount=-1.0, category='Subscriptions', merchant='Netflix'),
+        Transaction(date=today, description='Lunch', amount=-12.0, category='Food & Drink', merchant=''),
+    ])
+    db.commit()
+    assert db.query(Transaction).filter(Transaction.amount == -1.0).one().merchant_id == ids['Netflix']
+    assert db.query(Transaction).filter(Transaction.amount == -12.0).one().merchant_id is None
+    db.close()
+
+    breakdown = client.get('/breakdown/merchants').json()['merchants']
+    netflix = [m for m in breakdown if m['merchant'] == 'Netflix']
+    assert len(netflix) == 1 and netflix[0]['transactions'] == 4
+    subs = client.get('/subscriptions').json()['subscriptions']
+    assert [s['merchant'] for s in subs] == ['Netflix'] and subs[0]['occurrences'] == 4
+
+
+def test_repeat_strings_are_served_from_the_alias_cache():
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    db = SessionLocal()
+    first = merchants.resolve(db, VARIANTS + ['Spotify'])
+    db.commit()
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        again = merchants.resolve(db, VARIANTS + ['Spotify'])
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    db.close()
+    assert again == first
+    # Only the generation probe; no alias lookups or inserts
+    assert len(statements) == 1 and 'merchant_aliases' not in statements[0]
+
+
+def test_alias_cache_is_dropped_when_another_worker_rebuilds_merchants():
+    from sqlalchemy import delete, insert
+
+    db = SessionLocal()
+    merchants.clear(db)
+    before = merchants.resolve(db, ['Netflix', 'Spotify'])
+    db.commit()
+    # Another worker wipes and re-creates the same number of merchants in the opposite order,
+    # without touching this process's LRU; SQLite hands out the same rowids again
+    conn = db.connection()
+    conn.execute(delete(MerchantAlias.__table__))
+    conn.execute(delete(Merchant.__table__))
+    merchants._new_generation(conn)
+    conn.execute(insert(Merchant.__table__), [{'id': before['Netflix'], 'key': 'spotify', 'name': 'Spotify'},
+                                              {'id': before['Spotify'], 'key': 'netflix', 'name': 'Netflix'}])
+    conn.execute(insert(MerchantAlias.__table__), [{'raw': 'Spotify', 'merchant_id': before['Netflix']},
+                                                   {'raw': 'Netflix', 'merchant_id': before['Spotify']}])
+    db.commit()
+    after = merchants.resolve(db, ['Netflix', 'Spotify'])
+    db.close()
+    assert after == {'Netflix': before['Spotify'], 'Spotify': before['Netflix']}
+
+
+def test_rolled_back_merchants_are_not_served_from_the_cache():
+    db = SessionLocal()
+    merchants.resolve(db, ['Ghost Cafe'])
+    db.rollback()
+    mid = merchants.resolve(db, ['Ghost Cafe'])['Ghost Cafe']
+    db.commit()
+    assert db.get(Merchant, mid).name == 'Ghost Cafe'
+    db.close()
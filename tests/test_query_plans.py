@@ -0,0 +1,63 @@
+import re
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from backend.db import Base, SessionLocal, engine
+from backend.main import app
+from backend.models.transaction import Transaction
+
+client = TestClient(app)
+
+HOT_ROUTES = [
+    '/dashboard', '/insights', '/breakdown/categories', '/breakdown/merchants', '/breakdown/timeline',
+    '/anomalies/', '/subscriptions', '/transactions',
+]
+AUDITED_TABLES = ('transactions', 'transaction_categories')
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')  # "SCAN t USING [COVERING] INDEX ..." walks an index instead
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    today = date.today()
+    db.add_all([
+        Transaction(date=today - timedelta(days=i), description=f'Purchase {i}', amount=-(i % 40) - 1.0,
+                    merchant=f'M{i % 7}', category=('Uncategorized' if i % 5 == 0 else 'Shopping'))
+        for i in range(200)
+    ])
+    db.commit()
+    db.close()
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.mark.skipif(engine.dialect.name != 'sqlite', reason="audits SQLite's EXPLAIN QUERY PLAN output")
+def test_hot_routes_avoid_full_table_scans():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and any(t in statement for t in AUDITED_TABLES):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        for path in HOT_ROUTES:
+            assert client.get(path).status_code == 200, path
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+
+    assert statements
+    offenders = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+            for _, _, _, detail in plan:
+                m = FULL_SCAN.match(detail)
+                if m and m.group(1) in AUDITED_TABLES:
+                    offenders.append((detail, ' '.join(statement.split())))
+    assert not offenders, offenders
@@ -0,0 +1,41 @@
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from backend.db import Base, SessionLocal, engine
+from backend.main import app
+from backend.models.transaction import Transaction
+
+client = TestClient(app)
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(Transaction(date=date.today(), description='Lunch', amount=-12.0, merchant='Cafe', category='Food & Drink'))
+    db.commit()
+    db.close()
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_cached_reads_revalidate_and_follow_writes():
+    first = client.get('/insights')
+    assert first.headers['x-cache'] == 'miss'
+    etag = first.headers['etag']
+    again = client.get('/insights')
+    assert again.headers['x-cache'] == 'hit' and again.json() == first.json()
+    assert client.get('/insights', headers={'If-None-Match': etag}).status_code == 304
+
+    txn_id = client.get('/transactions').json()[0]['id']
+    client.patch(f'/transactions/{txn_id}/category', json={'category': 'Dining'})
+    after = client.get('/insights', headers={'If-None-Match': etag})
+    assert after.status_code == 200 and after.headers['etag'] != etag
+    assert after.json()['spending_by_category'] == [{'category': 'Dining', 'total': 12.0}]
+
+    dash = client.get('/dashboard').headers['etag']
+    client.put('/settings/MONTHLY_BUDGET', json={'value': '500'})
+    assert client.get('/dashboard').json()['monthly_budget'] == 500.0
+    assert client.get('/dashboard').headers['etag'] != dash
@@ -0,0 +1,91 @@
+from collections import defaultdict
+
+from fastapi.testclient import TestClient
+
+from backend.db import Base, SessionLocal, engine
+from backend.main import app
+from backend.models.monthly_rollup import MonthlyRollup
+from backend.models.transaction import Transaction
+from backend.utils import rollups
+
+client = TestClient(app)
+
+
+def setup_module(module):
+    Base.metadata.create_all(bind=engine)
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(bind=engine)
+
+
+def _snapshot(db):
+    return {
+        (r.month, r.category, r.merchant, r.sign): (round(r.total, 6), r.count)
+        for r in db.query(MonthlyRollup).all()
+    }
+
+
+def _insights_from_transactions(db):
+    spending, income = defaultdict(float), 0.0
+    for t in db.query(Transaction).all():
+        if t.amount < 0:
+            spending[t.category or 'Uncategorized'] += -t.amount
+        elif t.amount > 0:
+            income += t.amount
+    return {c: round(v, 2) for c, v in spending.items()}, round(income, 2)
+
+
+def test_rollups_track_every_write_path():
+    csv_content = (
+        "date,description,amount,merchant\n"
+        "2025-06-03,Whole Foods groceries,-80.00,WholeFoods\n"
+        "2025-06-20,Payroll deposit,2500.00,Employer\n"
+        "2025-07-01,Netflix subscription,-15.99,Netflix\n"
+        "2025-07-02,Mystery charge,-42.00,Acme\n"
+        "2025-07-02,Mystery charge,-42.00,Acme\n"
+    )
+    assert client.post('/upload?dedupe=off', files={'file': ('a.csv', csv_content, 'text/csv')}).status_code == 200
+    # Re-upload with an explicit category: upsert changes categories in bulk
+    relabel = "date,description,amount,merchant,category\n2025-07-01,Netflix subscription,-15.99,Netflix,Streaming\n"
+    assert client.post('/upload?dedupe=upsert', files={'file': ('b.csv', relabel, 'text/csv')}).status_code == 200
+
+    db = SessionLocal()
+    mystery = db.query(Transaction).filter(Transaction.merchant == 'Acme').first()
+    assert client.patch(f'/transactions/{mystery.id}/category', json={'category': 'Misc'}).status_code == 200
+    db.expire_all()
+    db.delete(db.get(Transaction, mystery.id))  # ORM delete goes through the flush hooks
+    db.commit()
+
+    spending, income = _insights_from_transactions(db)
+    body = client.get('/insights').json()
+    assert {row['category']: row['total'] for row in body['spending_by_category']} == spending
+    assert body['total_income'] == income
+    timeline = {p['month']: p['spend'] for p in client.get('/breakdown/timeline?months=600').json()['timeline']}
+    assert timeline == {'2025-06': 80.0, '2025-07': 57.99}
+
+    incremental = _snapshot(db)
+    rollups.rebuild(db)
+    db.commit()
+    assert _snapshot(db) == incremental
+
+    client.post('/admin/wipe')
+    db.expire_all()
+    assert db.query(MonthlyRollup).count() == 0
+    db.close()
+
+
+def test_rollup_deltas_upsert_onto_rows_other_writers_created():
+    from datetime import date
+    from sqlalchemy import insert
+
+    db = SessionLocal()
+    key = ('2001-02', 'Race', 'Writer', -1)
+    # A concurrent writer created the key after this session started; no lookup stands between them
+    db.execute(insert(MonthlyRollup.__table__).values(month='2001-02', category='Race', merchant='Writer', sign=-1, total=-5.0, count=1))
+    rollups.apply_rows(db, [(date(2001, 2, 3), -7.0, 'Race', 'Writer')])
+    assert _snapshot(db)[key] == (-12.0, 2)
+    rollups.apply_rows(db, [(date(2001, 2, 3), -7.0, 'Race', 'Writer'), (date(2001, 2, 4), -5.0, 'Race', 'Writer')], direction=-1)
+    assert key not in _snapshot(db)
+    db.rollback()
+    db.close()
@@ -0,0 +1,34 @@
+from sqlalchemy import create_engine, inspect, text
+
+from backend.utils.schema import SCHEMA_VERSION, ensure_schema, schema_version
+
+
+def test_ensure_schema_upgrades_legacy_tables_once(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with eng.begin() as conn:
+        # transaction_categories as created by early deployments (no promoted / original_category)
+        conn.execute(text(
+            "CREATE TABLE transaction_categories (id INTEGER PRIMARY KEY, transaction_id INTEGER NOT NULL, "
+            "source VARCHAR NOT NULL, category VARCHAR NOT NULL, confidence FLOAT, model VARCHAR, created_at DATETIME)"
+        ))
+    first = ensure_schema(eng)
+    assert first['upgraded'] and sorted(first['columns_added']) == [
+        'transaction_categories.original_category', 'transaction_categories.promoted',
+    ]
+    cols = {c['name'] for c in inspect(eng).get_columns('transaction_categories')}
+    assert {'promoted', 'original_category'} <= cols
+    assert schema_version(eng) == SCHEMA_VERSION
+    assert ensure_schema(eng) == {"version": SCHEMA_VERSION, "upgraded": False, "columns_added": []}
+
+
+def test_concurrent_worker_does_not_redo_a_claimed_upgrade(tmp_path, monkeypatch):
+    from backend.utils import schema
+
+    eng = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert ensure_schema(eng)['upgraded']
+    # A second worker read the marker before the first committed it
+    monkeypatch.setattr(schema, 'schema_version', lambda engine: None)
+    monkeypatch.setattr(schema.rollups, 'rebuild', lambda conn: (_ for _ in ()).throw(AssertionError('rebuilt twice')))
+    assert ensure_schema(eng)['upgraded'] is False
+    with eng.connect() as conn:
+        assert conn.execute(text("SELECT value FROM schema_meta WHERE key = 'schema_version'")).scalar() == SCHEMA_VERSION
@@ -0,0 +1,22 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def test_app_import_defers_scientific_libraries(tmp_path):
+    code = (
+        "import json, sys\n"
+        "import backend.main\n"
+        "from backend.utils import anomaly\n"
+        "eager = [m for m in ('pandas', 'numpy', 'prophet') if m in sys.modules]\n"
+        "frame = anomaly.score_expenses(anomaly.pd.DataFrame({'amount': [-1.0], 'merchant': ['A'], 'category': ['B']}))\n"
+        "print(json.dumps({'eager': eager, 'loaded': 'pandas' in sys.modules, 'rows': len(frame)}))\n"
+    )
+    env = {**os.environ, 'PYTHONPATH': ROOT, 'DATABASE_URL': f"sqlite:///{tmp_path / 'startup.db'}"}
+    out = subprocess.run([sys.executable, '-c', code], env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    # Nothing heavy at import; first use loads it transparently
+    assert result == {'eager': [], 'loaded': True, 'rows': 1}
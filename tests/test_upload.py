@@ -25,3 +25,60 @@ def test_coach_validation():
     r = client.post('/coach', json={"message": "hi"})
     # 'hi' too short (min_length=3) => 422
     assert r.status_code == 422
+
+def test_upload_bulk_insert_chunks_and_ids():
+    csv_content = "date,description,amount,merchant\n" + "".join(
+        f"2025-02-{d:02d},Item {d},-{d}.25,Shop\n" for d in range(1, 8)
+    )
+    files = {"file": ("bulk.csv", csv_content, "text/csv")}
+    r = client.post('/upload?chunk_size=3&return_ids=true', files=files)
+    assert r.status_code == 200
+    data = r.json()
+    assert data['records'] == 7
+    assert len(data['inserted_ids']) == 7
+    assert data['rows_per_sec'] is None or data['rows_per_sec'] > 0
+    dry = client.post('/upload?dry_run=true', files={"file": ("bulk.csv", csv_content, "text/csv")}).json()
+    assert dry['records'] == 7 and dry['inserted_ids'] is None
+
+def test_upload_async_job_status():
+    import time
+    csv_content = "date,description,amount,merchant\n2025-04-01,Lunch,-11.00,Deli\n2025-04-02,Dinner,-21.00,Bistro\n"
+    r = client.post('/upload?async=true', files={"file": ("job.csv", csv_content, "text/csv")})
+    assert r.status_code == 200
+    job_id = r.json()['job_id']
+    status = {}
+    for _ in range(100):
+        status = client.get(f'/upload/jobs/{job_id}').json()
+        if status.get('finished'):
+            break
+        time.sleep(0.05)
+    assert status['phase'] == 'done', status
+    assert status['result']['records'] == 2
+    assert status['rows_read'] == 2
+    assert client.get('/upload/jobs/does-not-exist').status_code == 404
+
+def test_upload_async_job_needing_confirmation_asks_for_reupload():
+    import time
+    csv_content = "date,amount,memo_text,ref\n2025-04-01,-11.00,Lunch at deli,a1\n2025-04-02,-21.00,Dinner out,b2\n"
+    job_id = client.post('/upload?async=true', files={"file": ("pick.csv", csv_content, "text/csv")}).json()['job_id']
+    status = {}
+    for _ in range(100):
+        status = client.get(f'/upload/jobs/{job_id}').json()
+        if status.get('finished'):
+            break
+        time.sleep(0.05)
+    assert status['phase'] == 'needs_confirmation', status
+    assert status['result']['confirmation_token'] is None
+    assert 'chosen_description' in status['result']['error']
+
+def test_upload_id_of_unfinished_upload_is_rejected():
+    from backend.utils import progress
+    csv_content = "date,description,amount,merchant\n2025-04-03,Tea,-3.00,Cafe\n"
+    progress.start('busy-id', file='other.csv')  # another upload still running under this id
+    for query in ('stream=true', 'async=true'):
+        r = client.post(f'/upload?{query}&upload_id=busy-id', files={"file": ("dup.csv", csv_content, "text/csv")})
+        assert r.status_code == 409, query
+    assert progress.get('busy-id')['file'] == 'other.csv'
+    progress.update('busy-id', finished=True)
+    r = client.post('/upload?stream=true&upload_id=busy-id', files={"file": ("dup.csv", csv_content, "text/csv")})
+    assert r.status_code == 200 and progress.get('busy-id')['phase'] == 'done'
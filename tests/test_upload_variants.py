@@ -17,4 +17,79 @@ def test_upload_semicolon_and_synonyms():
     assert r.status_code == 200, r.text
     assert r.json()['records'] == 1
     txns = client.get('/transactions').json()
-    assert any(t['description'] == 'Test Purchase' for t in txns)
\ No newline at end of file
+    assert any(t['description'] == 'Test Purchase' for t in txns)
+
+def test_upload_streaming_matches_buffered():
+    rows = "".join(f"2025-03-{(i % 28) + 1:02d};Item {i};{i}.5;Shop{i % 3};debit\n" for i in range(250))
+    csv_content = "date;memo;amount;payee;type\n" + rows + "not-a-date;Broken;1;Shop;debit\n"
+    buffered = client.post('/upload?dry_run=true', files={'file': ('big.csv', csv_content, 'text/csv')}).json()
+    streamed = client.post(
+        '/upload?dry_run=true&stream=true&stream_chunk_rows=100&upload_id=stream-test',
+        files={'file': ('big.csv', csv_content, 'text/csv')},
+    ).json()
+    for key in ('records', 'skipped', 'sign_inferred', 'errors_sample', 'delimiter', 'normalized_columns'):
+        assert streamed[key] == buffered[key], key
+    assert streamed['chunks'] == 3
+    prog = client.get('/upload/progress/stream-test').json()
+    assert prog['phase'] == 'done' and prog['rows_read'] == 251
+
+
+def test_reupload_is_idempotent():
+    csv_content = (
+        "date,description,amount,merchant\n"
+        "2025-05-01,Coffee,-4.50,Starbucks\n"
+        "2025-05-01,Coffee,-4.50,Starbucks\n"
+        "2025-05-02,Groceries,-40.00,Market\n"
+    )
+    first = client.post('/upload', files={'file': ('a.csv', csv_content, 'text/csv')}).json()
+    assert first['new_records'] == 3 and first['already_existed'] == 0
+    overlap = csv_content + "2025-05-03,Lunch,-12.00,Deli\n"
+    second = client.post('/upload', files={'file': ('b.csv', overlap, 'text/csv')}).json()
+    assert second['new_records'] == 1
+    assert second['already_existed'] == 3
+    coffees = [t for t in client.get('/transactions').json() if t['description'] == 'Coffee' and t['date'] == '2025-05-01']
+    assert len(coffees) == 2
+
+
+def test_fingerprint_claimed_by_concurrent_upload_is_skipped(monkeypatch):
+    from backend.utils import persist
+    csv_content = "date,description,amount,merchant\n2025-05-01,Coffee,-4.50,Starbucks\n2025-05-04,Books,-22.00,Shop\n"
+    client.post('/upload', files={'file': ('c.csv', csv_content, 'text/csv')})
+    # Another writer committed the same rows after this upload's lookup: only the claim can see them
+    monkeypatch.setattr(persist, 'existing_fingerprints', lambda db, fps: {})
+    again = client.post('/upload', files={'file': ('d.csv', csv_content, 'text/csv')}).json()
+    assert again['new_records'] == 0 and again['already_existed'] == 2
+    books = [t for t in client.get('/transactions').json() if t['description'] == 'Books']
+    assert len(books) == 1
+
+
+def test_confirm_token_then_schema_profile_reuse():
+    header = "date;label;amount;reference\n"
+    first_csv = header + "2025-06-01;Bakery Bread;-3.20;A1\n2025-06-02;Hardware Screws;-8.00;A2\n"
+    pending = client.post('/upload', files={'file': ('p1.csv', first_csv, 'text/csv')}).json()
+    assert pending['status'] == 'needs_confirmation'
+    token = pending['confirmation_token']
+    confirmed = client.post(f'/upload/confirm?token={token}&chosen_description=label').json()
+    assert confirmed['records'] == 2 and confirmed['schema_profile']['saved']
+    assert client.post(f'/upload/confirm?token={token}&chosen_description=label').status_code == 404
+
+    second_csv = header + "2025-06-03;Bakery Cake;-12.00;A3\n"
+    reused = client.post('/upload', files={'file': ('p2.csv', second_csv, 'text/csv')}).json()
+    assert reused['status'] == 'ok', reused
+    assert reused['schema_profile']['applied'] and reused['description_source'] == 'label'
+    assert reused['candidates_evaluated'] is None and reused['delimiter'] == ';'
+
+
+def test_save_profile_twice_for_one_signature_upserts():
+    from backend.db import SessionLocal
+    from backend.models.upload_profile import UploadSchemaProfile
+    from backend.utils.upload_profiles import save_profile
+
+    db = SessionLocal()
+    # e.g. two concurrent uploads of the same new layout, both of which missed the profile
+    assert save_profile(db, 'f' * 40, ',', ['date', 'memo', 'amount'], 'memo')
+    assert save_profile(db, 'f' * 40, ';', ['date', 'note', 'amount'], 'note')
+    db.commit()
+    rows = db.query(UploadSchemaProfile).filter_by(signature='f' * 40).all()
+    assert [(r.delimiter, r.description_source, r.use_count) for r in rows] == [(';', 'note', 2)]
+    db.close()